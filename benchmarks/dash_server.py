@@ -0,0 +1,154 @@
+"""합성 DASH 조각을 내보내는 로컬 HTTP 서버
+
+fake_ytdlp.py가 실제 네트워크 대신 이 서버에서 조각을 받아 다운로드 처리량을 측정한다.
+
+    python benchmarks/dash_server.py --port 8765
+    python benchmarks/dash_server.py --rate 5 --latency 0.02   # 연결당 5MiB/s, 요청당 20ms 지연
+
+경로:
+    /dash/<format_id>/manifest.mpd         세그먼트 목록 (?segments=N&size=BYTES)
+    /dash/<format_id>/init.mp4             초기화 세그먼트
+    /dash/<format_id>/seg-<n>.m4s          미디어 세그먼트 (?size=BYTES, 기본 --fragment-size)
+
+내용은 format_id와 세그먼트 번호로 정해지는 반복 바이트라 같은 요청에는 항상 같은 데이터가 나간다.
+세그먼트마다 MP4 mdat 상자 하나이고 0번은 ftyp/moov 상자로 시작하므로, 이어 붙인 파일은
+후처리 verify 단계의 구조 검사를 통과한다.
+"""
+import argparse
+import hashlib
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CHUNK_SIZE = 64 * 1024
+SEGMENT_RE = re.compile(r'^/dash/([\w.-]+)/(init\.mp4|seg-(\d+)\.m4s|manifest\.mpd)$')
+
+FTYP_BOX = struct.pack(">I4s4sI4s", 20, b"ftyp", b"isom", 0x200, b"isom")
+MOOV_BOX = struct.pack(">I4s", 8, b"moov")
+
+def fragment_bytes(format_id, index, size):
+    """format_id/세그먼트 번호로 정해지는 size바이트 (size가 상자 헤더보다 작으면 반복 바이트만)"""
+    pattern = hashlib.sha256(f"{format_id}:{index}".encode()).digest() * 128  # 4KiB
+    header = FTYP_BOX + MOOV_BOX if index == 0 else b""
+    if size >= len(header) + 8:
+        header += struct.pack(">I4s", size - len(header), b"mdat")
+    else:
+        header = b""
+    repeat, remainder = divmod(size - len(header), len(pattern))
+    return header + pattern * repeat + pattern[:remainder]
+
+def manifest(format_id, segments, size):
+    """세그먼트 목록만 담은 최소한의 MPD"""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static">\n'
+        '  <Period>\n'
+        f'    <AdaptationSet><Representation id="{format_id}" bandwidth="{size * 8}">\n'
+        '      <SegmentList>\n'
+        '        <Initialization sourceURL="init.mp4"/>\n'
+        + "".join(f'        <SegmentURL media="seg-{n}.m4s?size={size}"/>\n' for n in range(segments))
+        + '      </SegmentList>\n'
+        '    </Representation></AdaptationSet>\n'
+        '  </Period>\n'
+        '</MPD>\n'
+    ).encode()
+
+class DashRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        match = SEGMENT_RE.match(parsed.path)
+        if not match:
+            self.send_error(404)
+            return
+
+        query = parse_qs(parsed.query)
+        size = int(query.get("size", [self.server.fragment_size])[0])
+        format_id, name, index = match.groups()
+        if name == "manifest.mpd":
+            body = manifest(format_id, int(query.get("segments", [100])[0]), size)
+            content_type = "application/dash+xml"
+        elif name == "init.mp4":
+            body = fragment_bytes(format_id, "init", 1024)
+            content_type = "video/mp4"
+        else:
+            body = fragment_bytes(format_id, int(index), size)
+            content_type = "video/iso.segment"
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.server.count_request(len(body))
+
+        # 연결당 속도 제한 (bytes/s, 0 = 무제한)
+        rate = self.server.rate
+        start = time.monotonic()
+        for offset in range(0, len(body), CHUNK_SIZE):
+            self.wfile.write(body[offset:offset + CHUNK_SIZE])
+            if rate:
+                ahead = (offset + CHUNK_SIZE) / rate - (time.monotonic() - start)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 stderr에 찍으면 측정이 흔들림
+
+class DashServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fragment_size=256 * 1024, rate=0, latency=0.0):
+        super().__init__(address, DashRequestHandler)
+        self.fragment_size = fragment_size
+        self.rate = rate
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self, size):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """백그라운드 스레드에서 서버 시작 (port=0이면 빈 포트 사용)"""
+    server = DashServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 DASH 조각 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fragment-size", type=int, default=256 * 1024, help="기본 세그먼트 크기 (바이트)")
+    parser.add_argument("--rate", type=float, default=0, help="연결당 속도 제한 (MiB/s, 0 = 무제한)")
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 지연 (초)")
+    args = parser.parse_args()
+
+    server = DashServer(
+        (args.host, args.port), fragment_size=args.fragment_size,
+        rate=args.rate * 1024 * 1024, latency=args.latency,
+    )
+    print(f"DASH 서버: {server.url}/dash/<format_id>/seg-<n>.m4s")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""yt-dlp 대역 (YouTube에 접속하지 않고 기록된 출력을 재생)
+
+앱이 실제로 쓰는 옵션만 흉내 낸다: --dump-json(--flat-playlist), --list-formats, -U/--version,
+-f/-o/--progress --newline/--continue/--limit-rate/--concurrent-fragments 다운로드.
+포맷 목록은 fixtures/<영상 ID>.json (없으면 fixtures/default.json)에서 읽고,
+다운로드 데이터는 dash_server.py에서 받거나 (FAKE_YTDLP_SERVER) 직접 만든다.
+
+    VR_DOWNLOADER_YTDLP="python benchmarks/fake_ytdlp.py" python vr_cli.py --engine subprocess download ...
+
+환경 변수:
+    FAKE_YTDLP_FIXTURES       fixture 폴더 (기본: benchmarks/fixtures)
+    FAKE_YTDLP_SERVER         DASH 서버 주소 (예: http://127.0.0.1:8765, 없으면 로컬 생성)
+    FAKE_YTDLP_SIZE           스트림 하나의 크기 (바이트, 기본 4MiB)
+    FAKE_YTDLP_FRAGMENTS      스트림 하나의 조각 수 = 진행률 줄 수 (기본 32)
+    FAKE_YTDLP_RATE           프로세스당 속도 제한 (bytes/s, 0 = 무제한)
+    FAKE_YTDLP_DELAY          영상 정보 추출에 걸리는 시간 (초)
+    FAKE_YTDLP_PLAYLIST_SIZE  재생목록/채널 항목 수 (기본 20)
+    FAKE_YTDLP_ERROR          지정하면 이 메시지로 실패 (예: "HTTP Error 429: Too Many Requests")
+    FAKE_YTDLP_UNAVAILABLE    "Video unavailable"로 실패할 영상 ID (쉼표로 구분)
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import urllib.request
+
+from dash_server import fragment_bytes
+
+FAKE_VERSION = "2025.01.01"
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+VIDEO_ID_RE = re.compile(r'(?:v=|youtu\.be/|shorts/|embed/)([\w-]{11})')
+PLAYLIST_MARKERS = ("list=", "/playlist", "/@", "/channel/", "/c/", "/user/")
+
+def env_number(name, default):
+    return float(os.environ.get(name) or default)
+
+def format_bytes(num_bytes):
+    """yt-dlp와 같은 형식 ('12.34MiB')"""
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.2f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f}TiB"
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+def parse_rate(text):
+    """--limit-rate 값 ('500K', '4.2M', '1000000')을 bytes/s로 변환"""
+    match = re.fullmatch(r'([0-9.]+)([KMG]?)', (text or "").strip().upper())
+    if not match:
+        return 0
+    return float(match.group(1)) * {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}[match.group(2)]
+
+def video_id(url):
+    match = VIDEO_ID_RE.search(url)
+    if match:
+        return match.group(1)
+    if re.fullmatch(r'[\w-]{11}', url):
+        return url
+    return hashlib.sha1(url.encode()).hexdigest()[:11]
+
+def is_playlist(url):
+    return not VIDEO_ID_RE.search(url) and any(marker in url for marker in PLAYLIST_MARKERS)
+
+def load_info(url):
+    """fixture의 영상 정보를 URL의 영상 ID에 맞게 바꿔서 반환"""
+    fixtures = os.environ.get("FAKE_YTDLP_FIXTURES") or os.path.join(BENCHMARK_DIR, "fixtures")
+    vid = video_id(url)
+    path = os.path.join(fixtures, f"{vid}.json")
+    recorded = os.path.exists(path)
+    with open(path if recorded else os.path.join(fixtures, "default.json"), "r", encoding="utf-8") as f:
+        info = json.load(f)
+
+    if not recorded:
+        # 작업마다 파일 이름이 겹치지 않도록
+        info["title"] = f"{info['title']} {vid}"
+    info["id"] = vid
+    info["webpage_url"] = f"https://www.youtube.com/watch?v={vid}"
+    info["original_url"] = url
+    return info
+
+def playlist_entries(url):
+    count = int(env_number("FAKE_YTDLP_PLAYLIST_SIZE", 20))
+    prefix = hashlib.sha1(url.encode()).hexdigest()[:4]
+    for index in range(count):
+        vid = f"p{prefix}{index:06d}"
+        yield {
+            "_type": "url",
+            "ie_key": "Youtube",
+            "id": vid,
+            "url": f"https://www.youtube.com/watch?v={vid}",
+            "title": f"Playlist entry {index + 1}",
+        }
+
+class FakeError(Exception):
+    """URL 하나의 추출/다운로드 실패 (--ignore-errors면 다음 URL로 넘어감)"""
+
+def fail(message, info=None):
+    vid = info["id"] if info else ""
+    raise FakeError(f"ERROR: [youtube] {vid}: {message}")
+
+def check_errors(info):
+    """환경 변수로 지정한 실패 재현"""
+    if os.environ.get("FAKE_YTDLP_ERROR"):
+        fail(os.environ["FAKE_YTDLP_ERROR"], info)
+    if info["id"] in (os.environ.get("FAKE_YTDLP_UNAVAILABLE") or "").split(","):
+        fail("Video unavailable. This video is unavailable", info)
+
+# 포맷 선택 -----------------------------------------------------------------
+
+def quality(fmt):
+    return (fmt.get("height") or 0, fmt.get("fps") or 0, fmt.get("tbr") or 0)
+
+def pick_format(formats, spec):
+    """포맷 ID 또는 bv/ba/b 하나에 맞는 포맷 ([...] 필터는 무시)"""
+    spec = re.sub(r'\[.*?\]', '', spec).strip()
+    for fmt in formats:
+        if fmt["format_id"] == spec:
+            return fmt
+
+    has_video = lambda fmt: fmt.get("vcodec") not in (None, "none")
+    has_audio = lambda fmt: fmt.get("acodec") not in (None, "none")
+    if spec in ("bv", "bv*", "bestvideo"):
+        candidates = [fmt for fmt in formats if has_video(fmt) and not has_audio(fmt)]
+    elif spec in ("ba", "bestaudio"):
+        candidates = [fmt for fmt in formats if has_audio(fmt) and not has_video(fmt)]
+    elif spec in ("b", "best"):
+        candidates = [fmt for fmt in formats if has_video(fmt) and has_audio(fmt)]
+    else:
+        return None
+    return max(candidates, key=quality, default=None)
+
+def select_formats(formats, selector):
+    """'a+b/c' 형태의 선택식에서 처음으로 모두 있는 대안의 포맷 목록"""
+    formats = [fmt for fmt in formats if fmt.get("ext") != "mhtml"]
+    for alternative in selector.split("/"):
+        picked = [pick_format(formats, part) for part in alternative.split("+")]
+        if all(picked):
+            return picked
+    return None
+
+# 다운로드 ------------------------------------------------------------------
+
+def render_template(template, info, fmt):
+    values = {**info, "ext": fmt["ext"], "format_id": fmt["format_id"]}
+    return re.sub(r'%\((\w+)\)s', lambda match: str(values.get(match.group(1), "NA")), template)
+
+def fetch_fragment(server, format_id, index, size):
+    if not server:
+        return fragment_bytes(format_id, index, size)
+    url = f"{server}/dash/{format_id}/seg-{index}.m4s?size={size}"
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+def download_stream(fmt, path, args):
+    """포맷 하나를 path로 받으며 yt-dlp와 같은 진행률 줄을 출력"""
+    print(f"[download] Destination: {path}", flush=True)
+    if os.path.exists(path):
+        print(f"[download] {path} has already been downloaded", flush=True)
+        return
+
+    total = int(env_number("FAKE_YTDLP_SIZE", 4 * 1024 * 1024))
+    fragments = max(1, int(env_number("FAKE_YTDLP_FRAGMENTS", 32)))
+    fragment_size = -(-total // fragments)
+    total = fragment_size * fragments
+    server = os.environ.get("FAKE_YTDLP_SERVER", "").rstrip("/")
+    rates = [rate for rate in (env_number("FAKE_YTDLP_RATE", 0), parse_rate(args.limit_rate)) if rate]
+    rate = min(rates) if rates else 0
+
+    # --continue: 조각 단위로 이어받기
+    part_path = path + ".part"
+    start_index = 0
+    if args.resume and os.path.exists(part_path):
+        start_index = min(fragments, os.path.getsize(part_path) // fragment_size)
+    with open(part_path, "r+b" if start_index else "wb") as f:
+        f.truncate(start_index * fragment_size)
+        f.seek(0, os.SEEK_END)
+
+        start = time.monotonic()
+        received = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrent_fragments) as executor:
+            indexes = range(start_index, fragments)
+            for index, data in zip(indexes, executor.map(
+                    lambda index: fetch_fragment(server, fmt["format_id"], index, fragment_size), indexes)):
+                f.write(data)
+                received += len(data)
+                elapsed = time.monotonic() - start
+                if rate and received / rate > elapsed:
+                    time.sleep(received / rate - elapsed)
+                    elapsed = received / rate
+
+                done = (index + 1) * fragment_size
+                speed = received / elapsed if elapsed > 0 else 0
+                eta = format_eta((total - done) / speed) if speed else "Unknown"
+                speed_text = f"{format_bytes(speed)}/s" if speed else "Unknown B/s"
+                print(
+                    f"[download] {done / total * 100:5.1f}% of {format_bytes(total):>10} "
+                    f"at {speed_text:>12} ETA {eta}",
+                    flush=True,
+                )
+
+    os.replace(part_path, path)
+    elapsed = max(time.monotonic() - start, 1e-6)
+    print(
+        f"[download] 100% of {format_bytes(total):>10} in {format_eta(elapsed)} "
+        f"at {format_bytes(received / elapsed)}/s",
+        flush=True,
+    )
+
+def command_download(url, args):
+    info = load_info(url)
+    print(f"[youtube] Extracting URL: {url}", flush=True)
+    print(f"[youtube] {info['id']}: Downloading webpage", flush=True)
+    time.sleep(env_number("FAKE_YTDLP_DELAY", 0))
+    check_errors(info)
+
+    picked = select_formats(info["formats"], args.format or "bv+ba/b")
+    if not picked:
+        fail("Requested format is not available. Use --list-formats for a list of available formats", info)
+    print(f"[info] {info['id']}: Downloading 1 format(s): {'+'.join(fmt['format_id'] for fmt in picked)}", flush=True)
+
+    template = args.output or "%(title)s [%(id)s].%(ext)s"
+    final_path = render_template(template, info, picked[-1] if len(picked) == 1 else picked[0])
+    directory = os.path.dirname(final_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if len(picked) == 1:
+        download_stream(picked[0], final_path, args)
+        return
+
+    # 여러 스트림은 .f<format_id>로 받은 뒤 이어 붙여 병합 흉내 (내용이 합성 데이터라 ffmpeg는 쓰지 않음)
+    base, _ = os.path.splitext(final_path)
+    parts = []
+    for fmt in picked:
+        parts.append(f"{base}.f{fmt['format_id']}.{fmt['ext']}")
+        download_stream(fmt, parts[-1], args)
+    print(f'[Merger] Merging formats into "{final_path}"', flush=True)
+    with open(final_path, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    out.write(chunk)
+    for part in parts:
+        print(f"Deleting original file {part} (pass -k to keep)", flush=True)
+        os.remove(part)
+
+def command_dump_json(url, args):
+    time.sleep(env_number("FAKE_YTDLP_DELAY", 0))
+    if is_playlist(url) and not args.no_playlist:
+        for entry in playlist_entries(url):
+            info = entry if args.flat_playlist else load_info(entry["url"])
+            print(json.dumps(info, ensure_ascii=False), flush=True)
+        return
+    info = load_info(url)
+    check_errors(info)
+    print(json.dumps(info, ensure_ascii=False), flush=True)
+
+def command_list_formats(url):
+    info = load_info(url)
+    print(f"[info] Available formats for {info['id']}:")
+    print("ID      EXT   RESOLUTION FPS │    FILESIZE   TBR │ VCODEC           ACODEC      MORE INFO")
+    print("─" * 96)
+    for fmt in info["formats"]:
+        if fmt.get("vcodec") in (None, "none"):
+            resolution = "audio only" if fmt.get("acodec") not in (None, "none") else "images"
+        else:
+            resolution = f"{fmt.get('width')}x{fmt.get('height')}"
+        size = format_bytes(fmt["filesize"]) if fmt.get("filesize") else ""
+        tbr = f"{fmt['tbr']:.0f}k" if fmt.get("tbr") else ""
+        print(
+            f"{fmt['format_id']:<7} {fmt['ext']:<5} {resolution:<10} {fmt.get('fps') or '':>3} │ "
+            f"{size:>11} {tbr:>5} │ {fmt.get('vcodec') or 'none':<16} {fmt.get('acodec') or 'none':<11} "
+            f"{fmt.get('format_note') or ''}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(prog="yt-dlp", add_help=False)
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("-f", "--format")
+    parser.add_argument("-o", "--output")
+    parser.add_argument("-j", "--dump-json", action="store_true")
+    parser.add_argument("-F", "--list-formats", action="store_true")
+    parser.add_argument("-U", "--update", action="store_true")
+    parser.add_argument("--version", action="store_true")
+    parser.add_argument("--flat-playlist", action="store_true")
+    parser.add_argument("--no-playlist", action="store_true")
+    parser.add_argument("-c", "--continue", dest="resume", action="store_true")
+    parser.add_argument("--limit-rate", "-r")
+    parser.add_argument("-N", "--concurrent-fragments", type=int, default=1)
+    parser.add_argument("--extractor-args")
+    parser.add_argument("-i", "--ignore-errors", action="store_true")
+    args, _ = parser.parse_known_args()
+
+    if args.version:
+        print(FAKE_VERSION)
+        return 0
+    if args.update:
+        print(f"Latest version: {FAKE_VERSION} from yt-dlp/yt-dlp")
+        print(f"yt-dlp is up to date ({FAKE_VERSION} from yt-dlp/yt-dlp)")
+        return 0
+    if not args.urls:
+        print("Usage: yt-dlp [OPTIONS] URL [URL...]", file=sys.stderr)
+        return 2
+
+    failed = False
+    for url in args.urls:
+        try:
+            if args.dump_json:
+                command_dump_json(url, args)
+            elif args.list_formats:
+                command_list_formats(url)
+            else:
+                command_download(url, args)
+        except FakeError as e:
+            print(e, file=sys.stderr, flush=True)
+            failed = True
+            if not args.ignore_errors:
+                break
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
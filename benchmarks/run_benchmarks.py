@@ -0,0 +1,423 @@
+"""오프라인 성능 벤치마크
+
+YouTube에 접속하지 않고 fake_ytdlp.py(yt-dlp 대역)와 dash_server.py(합성 DASH 서버)로 측정한다.
+
+    python benchmarks/run_benchmarks.py                              # 전체 측정
+    python benchmarks/run_benchmarks.py --only probe,progress        # 일부만
+    python benchmarks/run_benchmarks.py --output bench.json --compare previous.json
+
+측정 항목:
+    probe       yt-dlp JSON → ProbeResult 변환, 포맷 필터/정렬, 프로필 선택, 대역 yt-dlp로 probe_formats,
+                여러 URL을 하나씩 확인할 때와 batch_probe로 묶어 확인할 때
+    progress    parse_progress_line 한 줄 처리 시간, run_ytdlp_download가 진행률 줄마다 더 쓰는 시간
+    ui          UIEventPump로 보낸 진행률이 화면 갱신 콜백에 도착하기까지의 지연
+    startup     vr_core 가져오기/vr_cli.py 시작 시간, (디스플레이가 있으면) GUI 첫 화면까지 시간
+    throughput  대역 yt-dlp + DASH 서버로 여러 작업을 동시에 받을 때 처리량
+
+포맷 목록은 yt-dlp --dump-json 출력을 ProbeResult.from_info로 읽으므로 (--list-formats 표는 파싱하지 않음)
+probe 항목은 JSON 경로를 측정한다. 결과는 JSON으로 저장하며 --compare로 이전 결과와 비교해
+threshold 이상 느려진 항목을 표시한다.
+"""
+import argparse
+import contextlib
+import heapq
+import itertools
+import json
+import os
+import platform
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path[:0] = [REPO_DIR, BENCHMARK_DIR]
+
+from dash_server import start_server
+from startup_benchmark import run_once, summarize
+from vr_core import (
+    BUILTIN_FORMAT_PROFILES,
+    FORMAT_SORT_KEYS,
+    YTDLP_COMMAND_ENV,
+    DownloadJob,
+    DownloadQueue,
+    PostProcessPipeline,
+    ProbeResult,
+    SubprocessEngine,
+    batch_probe,
+    execute_job,
+    format_matches,
+    parse_progress_line,
+    probe_formats,
+    resolve_profiles,
+    run_ytdlp_download,
+    ytdlp_command,
+)
+
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+FAKE_YTDLP = [sys.executable, os.path.join(BENCHMARK_DIR, "fake_ytdlp.py")]
+BENCH_URL = "https://www.youtube.com/watch?v=vrBenchmark"
+MIB = 1024 * 1024
+
+@contextlib.contextmanager
+def fake_env(**values):
+    """대역 yt-dlp 설정 환경 변수를 잠시 바꿈 (자식 프로세스에 전달)"""
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update({name: str(value) for name, value in values.items()})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def timed(func, repeat, number):
+    """func를 number번 실행하는 시간을 repeat번 재서 1회당 시간(초) 요약"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return summarize(times)
+
+def scaled(summary, divisor):
+    return {key: value / divisor for key, value in summary.items()}
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def has_display():
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+def bench_probe(args):
+    with open(os.path.join(FIXTURES_DIR, "default.json"), "r", encoding="utf-8") as f:
+        info = json.load(f)
+    raw = json.dumps(info)
+    formats = ProbeResult.from_info(BENCH_URL, info).formats
+
+    def filter_sort():
+        rows = [fmt for fmt in formats if format_matches(fmt, "전체", vr_only=True)]
+        rows.sort(key=FORMAT_SORT_KEYS[2], reverse=True)
+
+    # URL마다 yt-dlp를 따로 띄우는 경우와 묶어서 여러 프로세스에 나누는 경우
+    engine = SubprocessEngine()
+    urls = [f"https://www.youtube.com/watch?v=vrBatch{index:04d}" for index in range(args.probe_urls)]
+    with fake_env(FAKE_YTDLP_DELAY=args.probe_delay):
+        sequential = timed(lambda: [engine.probe(url) for url in urls], args.runs, 1)
+        batch = timed(lambda: list(batch_probe(engine, urls, processes=args.probe_processes)), args.runs, 1)
+
+    return {
+        "formats": len(formats),
+        "parse_seconds": timed(lambda: ProbeResult.from_info(BENCH_URL, json.loads(raw)), args.runs, 200),
+        "filter_sort_seconds": timed(filter_sort, args.runs, 1000),
+        "profile_resolve_seconds": timed(lambda: resolve_profiles(BUILTIN_FORMAT_PROFILES, formats), args.runs, 200),
+        # 프로세스 시작 + JSON 출력 읽기 (대역이므로 추출 시간은 빠짐)
+        "probe_subprocess_seconds": timed(lambda: probe_formats(BENCH_URL), args.runs, 1),
+        "probe_sequential_seconds": sequential,
+        "probe_batch_seconds": batch,
+    }
+
+def bench_progress(args):
+    with open(os.path.join(FIXTURES_DIR, "progress.txt"), "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    parse = timed(lambda: [parse_progress_line(line) for line in lines], args.runs, 1000)
+
+    # 같은 출력을 그냥 읽기만 할 때와 run_ytdlp_download로 처리할 때의 차이 = 줄당 처리 비용
+    count = args.progress_lines
+    raw_times, app_times, callbacks = [], [], []
+    with fake_env(FAKE_YTDLP_FRAGMENTS=count, FAKE_YTDLP_SIZE=count * 64, FAKE_YTDLP_SERVER=""):
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as tmp:
+                cmd = ytdlp_command() + [
+                    "-f", "18", "-o", os.path.join(tmp, "raw.%(ext)s"), "--progress", "--newline", BENCH_URL,
+                ]
+                start = time.perf_counter()
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                for _ in process.stdout:
+                    pass
+                process.wait()
+                raw_times.append(time.perf_counter() - start)
+
+                job = DownloadJob(1, BENCH_URL, "18", tmp)
+                seen = itertools.count()
+                start = time.perf_counter()
+                run_ytdlp_download(job, log_callback=lambda message: None,
+                                   progress_callback=lambda job, progress: next(seen))
+                app_times.append(time.perf_counter() - start)
+                callbacks.append(next(seen))
+
+    return {
+        "parse_line_seconds": scaled(parse, len(lines)),
+        "stream_lines": count,
+        "progress_callbacks": min(callbacks),
+        "raw_read_seconds": summarize(raw_times),
+        "run_ytdlp_download_seconds": summarize(app_times),
+        "overhead_per_line_seconds": (statistics.median(app_times) - statistics.median(raw_times)) / count,
+    }
+
+class HeadlessLoop:
+    """디스플레이가 없을 때 Tk 대신 after()만 흉내 내는 이벤트 루프"""
+
+    def __init__(self):
+        self._timers = []
+        self._seq = itertools.count()
+
+    def after(self, ms, func):
+        heapq.heappush(self._timers, (time.perf_counter() + ms / 1000, next(self._seq), func))
+
+    def run(self, duration):
+        deadline = time.perf_counter() + duration
+        while self._timers and self._timers[0][0] < deadline:
+            due, _, func = heapq.heappop(self._timers)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            func()
+
+def bench_ui(args):
+    try:
+        from vr_gui import UIEventPump
+    except ImportError as e:
+        return {"skipped": f"GUI 모듈을 가져올 수 없음: {e}"}
+
+    loop = None
+    if has_display():
+        import tkinter
+        try:
+            loop = tkinter.Tk()
+            loop.withdraw()
+        except tkinter.TclError:
+            loop = None
+
+    headless = None if loop else HeadlessLoop()
+    latencies = []
+    frames = itertools.count()
+    pump = UIEventPump(
+        loop or headless,
+        on_log=lambda lines: None,
+        on_progress=lambda sent: latencies.append(time.perf_counter() - sent),
+        on_frame=lambda: next(frames),
+        fps=args.fps,
+    )
+    pump.start()
+
+    # 작업 스레드 흉내: 작업마다 초당 ui_rate번 진행률과 로그를 보냄
+    stop = threading.Event()
+    posted = itertools.count()
+
+    def producer(key):
+        interval = 1 / args.ui_rate
+        while not stop.is_set():
+            pump.post_progress(key, time.perf_counter())
+            pump.post_log(f"[#{key}] progress")
+            next(posted)
+            time.sleep(interval)
+
+    threads = [threading.Thread(target=producer, args=(key,), daemon=True) for key in range(args.ui_producers)]
+    for thread in threads:
+        thread.start()
+    if loop:
+        loop.after(int(args.ui_duration * 1000), loop.quit)
+        loop.mainloop()
+        loop.destroy()
+    else:
+        headless.run(args.ui_duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "loop": "tk" if loop else "headless",
+        "fps": args.fps,
+        "posted": next(posted),
+        "delivered": len(latencies),
+        "frames": next(frames),
+        "latency_seconds": {
+            "median": statistics.median(latencies),
+            "p95": percentile(latencies, 0.95),
+            "max": max(latencies),
+        },
+    }
+
+def bench_startup(args):
+    def wall(command):
+        times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=REPO_DIR, capture_output=True, check=True, timeout=120)
+            times.append(time.perf_counter() - start)
+        return summarize(times)
+
+    result = {
+        "import_core_seconds": wall([sys.executable, "-c", "import vr_core"]),
+        "cli_help_seconds": wall([sys.executable, os.path.join(REPO_DIR, "vr_cli.py"), "--help"]),
+    }
+    if not has_display():
+        result["gui"] = {"skipped": "디스플레이 없음"}
+        return result
+
+    walls, readies = [], []
+    for _ in range(args.runs):
+        seconds, ready = run_once([sys.executable, os.path.join(REPO_DIR, "vr_downloader.py")])
+        walls.append(seconds)
+        readies.append(ready)
+    result["gui"] = {"wall_seconds": summarize(walls), "ready_seconds": summarize(readies)}
+    return result
+
+def bench_throughput(args):
+    server = start_server(rate=args.server_rate * MIB, latency=args.server_latency)
+    finished = []
+    try:
+        with fake_env(FAKE_YTDLP_SERVER=server.url, FAKE_YTDLP_SIZE=int(args.size * MIB),
+                      FAKE_YTDLP_FRAGMENTS=args.fragments), tempfile.TemporaryDirectory() as tmp:
+            engine = SubprocessEngine()
+            pipeline = PostProcessPipeline(max_workers=2, steps=args.steps.split(","))
+
+            def run_job(job):
+                execute_job(job, engine, pipeline=pipeline, on_finished=finished.append)
+
+            download_queue = DownloadQueue(run_job, max_workers=args.workers, on_error=finished.append)
+            start = time.perf_counter()
+            for index in range(args.jobs):
+                url = f"https://www.youtube.com/watch?v=bench{index:06d}"
+                download_queue.submit(DownloadJob(index + 1, url, args.format, tmp))
+            download_queue.wait()
+            pipeline.wait()
+            wall = time.perf_counter() - start
+            pipeline.shutdown()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    succeeded = sum(1 for job in finished if job.state == "완료")
+    return {
+        "jobs": args.jobs,
+        "workers": args.workers,
+        "format": args.format,
+        "succeeded": succeeded,
+        "failed": len(finished) - succeeded,
+        "wall_seconds": wall,
+        "bytes": server.bytes_sent,
+        "requests": server.requests,
+        "throughput_mib_per_s": server.bytes_sent / wall / MIB,
+        "jobs_per_s": succeeded / wall,
+    }
+
+BENCHMARKS = {
+    "probe": bench_probe,
+    "progress": bench_progress,
+    "ui": bench_ui,
+    "startup": bench_startup,
+    "throughput": bench_throughput,
+}
+
+def flatten(data, prefix=""):
+    """중첩 dict의 숫자 값을 'a.b.c' 키로 펼침"""
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+def compare(current, previous, threshold):
+    """이전 결과 대비 threshold 이상 바뀐 항목 출력 (느려진 항목 수 반환)"""
+    old_values = dict(flatten(previous.get("results", {})))
+    regressions = 0
+    for name, value in flatten(current["results"]):
+        old = old_values.get(name)
+        # min/max는 흔들림이 커서 비교하지 않음
+        if not old or name.rsplit(".", 1)[-1] in ("min", "max"):
+            continue
+        change = value / old - 1
+        higher_is_better = name.endswith("per_s")
+        worse = -change if higher_is_better else change
+        if abs(change) < threshold:
+            continue
+        mark = "⚠️ 느려짐" if worse > 0 else "✅ 빨라짐"
+        regressions += worse > 0
+        print(f"{mark} {name}: {old:.6g} → {value:.6g} ({change:+.1%})", file=sys.stderr)
+    return regressions
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, timeout=10,
+        )
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="VR 다운로더 오프라인 벤치마크 (yt-dlp 대역 사용)")
+    parser.add_argument("--only", help=f"쉼표로 구분한 측정 항목 ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--runs", type=int, default=5, help="항목별 반복 횟수")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--threshold", type=float, default=0.1, help="비교 시 표시할 변화율 (기본 10%%)")
+    parser.add_argument("--probe-urls", type=int, default=16, help="probe: 한꺼번에 확인할 URL 수")
+    parser.add_argument("--probe-processes", type=int, default=4, help="probe: batch_probe 동시 프로세스 수")
+    parser.add_argument("--probe-delay", type=float, default=0.2, help="probe: 대역 yt-dlp의 영상당 추출 지연 (초)")
+    parser.add_argument("--progress-lines", type=int, default=20000, help="progress: 대역 yt-dlp가 출력할 진행률 줄 수")
+    parser.add_argument("--ui-duration", type=float, default=3.0, help="ui: 측정 시간(초)")
+    parser.add_argument("--ui-producers", type=int, default=8, help="ui: 진행률을 보내는 작업 스레드 수")
+    parser.add_argument("--ui-rate", type=float, default=100, help="ui: 스레드당 초당 진행률 갱신 수")
+    parser.add_argument("--fps", type=int, default=30, help="ui: UIEventPump 갱신 주기")
+    parser.add_argument("--jobs", type=int, default=8, help="throughput: 작업 수")
+    parser.add_argument("--workers", type=int, default=4, help="throughput: 동시 다운로드 수")
+    parser.add_argument("--size", type=float, default=8, help="throughput: 작업당 크기 (MiB)")
+    parser.add_argument("--fragments", type=int, default=64, help="throughput: 작업당 조각 수")
+    parser.add_argument("--format", default="18", help="throughput: 포맷 (합성 데이터라 병합이 필요 없는 단일 포맷)")
+    parser.add_argument("--steps", default="verify,hash,cleanup", help="throughput: 후처리 단계")
+    parser.add_argument("--server-rate", type=float, default=0, help="throughput: 연결당 속도 제한 (MiB/s)")
+    parser.add_argument("--server-latency", type=float, default=0.0, help="throughput: 요청당 지연 (초)")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"알 수 없는 측정 항목: {', '.join(unknown)}")
+
+    # 앱이 실행하는 yt-dlp를 대역으로 바꿈
+    command = subprocess.list2cmdline(FAKE_YTDLP) if sys.platform == 'win32' else shlex.join(FAKE_YTDLP)
+    os.environ[YTDLP_COMMAND_ENV] = command
+
+    results = {}
+    for name in selected:
+        print(f"▶ {name}", file=sys.stderr)
+        start = time.perf_counter()
+        results[name] = BENCHMARKS[name](args)
+        print(f"  {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    settings = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "only")}
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": settings,
+        "results": results,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        if compare(report, previous, args.threshold):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
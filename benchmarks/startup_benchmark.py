@@ -0,0 +1,82 @@
+"""시작 시간 벤치마크
+
+소스 실행과 PyInstaller 빌드의 콜드 스타트 시간을 측정한다.
+
+    python benchmarks/startup_benchmark.py                      # 소스 실행
+    python benchmarks/startup_benchmark.py --exe dist/vr_downloader.exe
+    python benchmarks/startup_benchmark.py --runs 10 --output startup.json
+
+각 실행은 `--startup-benchmark` 옵션으로 앱을 띄워 첫 화면이 그려지면 종료하며,
+프로세스 생성부터 종료까지의 전체 시간과 앱이 보고한 준비 시간을 함께 기록한다.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_once(command):
+    """앱을 한 번 실행하여 (전체 시간, 앱 준비 시간) 반환"""
+    fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    os.remove(result_path)
+    try:
+        start = time.perf_counter()
+        subprocess.run(command + ["--startup-benchmark", result_path], check=True, timeout=120)
+        wall = time.perf_counter() - start
+
+        with open(result_path, "r", encoding="utf-8") as f:
+            ready = json.load(f)["ready_seconds"]
+        return wall, ready
+    finally:
+        if os.path.exists(result_path):
+            os.remove(result_path)
+
+def summarize(values):
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "max": max(values),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="VR 다운로더 시작 시간 측정")
+    parser.add_argument("--exe", help="PyInstaller로 빌드한 실행 파일 경로 (없으면 소스 실행)")
+    parser.add_argument("--runs", type=int, default=5, help="측정 횟수")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    if args.exe:
+        command = [os.path.abspath(args.exe)]
+        target = "pyinstaller"
+    else:
+        command = [sys.executable, os.path.join(REPO_DIR, "vr_downloader.py")]
+        target = "source"
+
+    walls, readies = [], []
+    for i in range(args.runs):
+        wall, ready = run_once(command)
+        walls.append(wall)
+        readies.append(ready)
+        print(f"[{i + 1}/{args.runs}] 전체 {wall:.3f}s | 앱 준비 {ready:.3f}s")
+
+    result = {
+        "target": target,
+        "command": command,
+        "runs": args.runs,
+        "wall_seconds": summarize(walls),
+        "ready_seconds": summarize(readies),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from vr_core import BandwidthScheduler, DownloadJob, rate_limit_changed
+
+
+def make_job(job_id):
+    return DownloadJob(job_id, f"https://youtu.be/{'abcdefghijk'[job_id] * 11}", "18", "/tmp")
+
+
+def test_set_limit_updates_running_jobs():
+    scheduler = BandwidthScheduler()
+    first, second = make_job(1), make_job(2)
+    scheduler.register(first)
+    scheduler.register(second)
+    started = first.rate_limit
+    assert started is None
+
+    scheduler.set_limit(1e6)
+    assert first.rate_limit == second.rate_limit == 5e5
+    assert rate_limit_changed(started, first.rate_limit)
+
+    scheduler.unregister(second)
+    assert first.rate_limit == 1e6
+
+
+def test_refresh_applies_schedule_window_change():
+    scheduler = BandwidthScheduler(limit=1e6)
+    scheduler.REFRESH_INTERVAL = 0
+    job = make_job(1)
+    scheduler.register(job)
+    assert job.rate_limit == 1e6
+
+    # 시간대 제한이 시작된 것처럼 현재 제한을 바꿈
+    scheduler.current_limit = lambda now=None: 2e5
+    scheduler.refresh()
+    assert job.rate_limit == 2e5
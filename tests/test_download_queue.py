@@ -0,0 +1,56 @@
+import threading
+
+from vr_core import (
+    PROFILE_PREFIX,
+    DownloadJob,
+    DownloadQueue,
+    FormatProfile,
+    ProbeResult,
+    VideoFormat,
+    execute_job,
+    resolve_job_format,
+)
+
+
+class BlockingProbeEngine:
+    """probe가 release될 때까지 멈춰 있는 가짜 엔진 (download 호출은 기록만)"""
+    name = "stub"
+
+    def __init__(self):
+        self.probing = threading.Event()
+        self.release = threading.Event()
+        self.downloads = []
+
+    def probe(self, url):
+        self.probing.set()
+        self.release.wait(5)
+        formats = [VideoFormat("18", ext="mp4", width=640, height=360, vcodec="avc1", acodec="mp4a", filesize=1000)]
+        return ProbeResult(url=url, formats=formats)
+
+    def download(self, job, log_callback=None, progress_callback=None):
+        self.downloads.append(job.job_id)
+        return 0
+
+
+def test_cancel_during_format_resolution(tmp_path):
+    engine = BlockingProbeEngine()
+    profiles = {"any": FormatProfile("any")}
+    finished = []
+
+    def run_job(job):
+        resolve_job_format(job, engine, None, profiles)
+        execute_job(job, engine, on_finished=finished.append)
+
+    download_queue = DownloadQueue(run_job, max_workers=1)
+    job = DownloadJob(1, "https://youtu.be/aaaaaaaaaaa", PROFILE_PREFIX + "any", str(tmp_path))
+    download_queue.submit(job)
+
+    assert engine.probing.wait(5)
+    cancelled, running = download_queue.cancel(job.job_id)
+    assert cancelled is job and running
+    engine.release.set()
+    download_queue.wait()
+
+    assert engine.downloads == []
+    assert job.state == "취소됨"
+    assert finished == [job]
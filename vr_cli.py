@@ -0,0 +1,374 @@
+import argparse
+import multiprocessing
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict
+
+from vr_core import (
+    ENGINES,
+    INTERRUPT_REASONS,
+    PROFILE_PREFIX,
+    BandwidthScheduler,
+    DownloadArchive,
+    DownloadJob,
+    DownloadQueue,
+    FormatCache,
+    FragmentTuner,
+    MetadataPrefetcher,
+    MetricsExporter,
+    PostProcessPipeline,
+    ProbeError,
+    ProbeResult,
+    RetryController,
+    VolumeManager,
+    batch_probe,
+    execute_job,
+    expand_playlist,
+    job_from_journal,
+    load_format_profiles,
+    load_settings,
+    make_engine,
+    mbps_to_bytes,
+    open_journal,
+    resolve_job_format,
+    resolve_profiles,
+)
+
+class JsonEventWriter:
+    """진행 상황을 한 줄에 하나씩 JSON으로 출력 (여러 워커 스레드에서 호출)"""
+
+    def __init__(self, stream=None, progress_interval=1.0):
+        self.stream = stream or sys.stdout
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._last_progress = {}
+
+    def emit(self, event, **data):
+        data = {"event": event, "time": round(time.time(), 3), **data}
+        line = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def log(self, message):
+        self.emit("log", message=message.strip())
+
+    def progress(self, job, progress):
+        """작업별로 progress_interval마다 한 번만 출력"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_progress.get(job.job_id, 0) < self.progress_interval:
+                return
+            self._last_progress[job.job_id] = now
+
+        self.emit(
+            "progress",
+            job=job.job_id,
+            state=job.state,
+            percent=round(job.progress * 100, 1),
+            speed=job.speed,
+            eta=job.eta,
+            downloaded_bytes=progress.get("downloaded_bytes") if progress else None,
+            total_bytes=progress.get("total_bytes") if progress else None,
+        )
+
+def read_urls(sources):
+    """URL 인자와 목록 파일('-'는 표준 입력)에서 URL 목록 읽기 (빈 줄/# 주석 무시)"""
+    urls = []
+    for source in sources:
+        if source == "-":
+            lines = sys.stdin.read().splitlines()
+        elif os.path.isfile(source):
+            with open(source, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        else:
+            lines = [source]
+
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                urls.append(line)
+    return urls
+
+def command_download(args):
+    settings = load_settings()
+    profiles = load_format_profiles(settings, log_callback=lambda message: print(message, file=sys.stderr))
+    format_str = args.format
+    if args.profile:
+        if args.profile not in profiles:
+            print(f"알 수 없는 포맷 프로필: {args.profile}", file=sys.stderr)
+            return 2
+        format_str = PROFILE_PREFIX + args.profile
+
+    # 인자가 없으면 표준 입력에서 읽음 (--resume만 준 경우 제외)
+    urls = read_urls(args.sources or ([] if args.resume else ["-"]))
+    journal = open_journal(args.output)
+
+    # --resume: 저장 경로의 작업 기록에서 완료되지 않은 작업을 먼저 다시 실행
+    resume_rows = journal.unfinished() if args.resume else []
+    if not urls and not resume_rows:
+        print("URL이 없습니다.", file=sys.stderr)
+        return 2
+
+    writer = JsonEventWriter(progress_interval=args.progress_interval)
+    engine = make_engine(args.engine, log_callback=writer.log)
+    writer.emit("engine", name=engine.name)
+    format_cache = FormatCache()
+    # 프로필 지정 작업의 포맷 목록은 대기열에 넣을 때부터 미리 확인
+    prefetcher = MetadataPrefetcher(lambda: engine, format_cache, max_workers=settings["prefetch_workers"])
+    archive = DownloadArchive() if settings["download_archive"] and not args.force else None
+    bandwidth = BandwidthScheduler.from_settings(settings)
+    if args.limit_rate is not None:
+        bandwidth.set_limit(mbps_to_bytes(args.limit_rate))
+
+    tuner = None
+    if args.segmented or settings["segmented_download"]:
+        tuner = FragmentTuner(max_connections=args.max_connections or settings["max_connections"])
+
+    # 병합/검사는 별도 프로세스에서 하고 다운로드 워커는 다음 작업으로 넘어감
+    pipeline = PostProcessPipeline.from_settings(settings)
+
+    # 작업별 단계 시간/처리량 기록
+    if args.metrics_jsonl is not None:
+        settings["metrics_jsonl"] = args.metrics_jsonl
+    if args.metrics_prom is not None:
+        settings["metrics_prometheus_file"] = args.metrics_prom
+    if args.metrics_port is not None:
+        settings["metrics_port"] = args.metrics_port
+    metrics = MetricsExporter.from_settings(settings, log_callback=writer.log)
+
+    # 작업마다 예상 크기만큼 공간을 예약하고 여러 저장 폴더에 나눠 저장
+    if args.volume:
+        settings["output_volumes"] = settings["output_volumes"] + args.volume
+    if args.scratch is not None:
+        settings["scratch_dir"] = args.scratch
+    if args.min_free is not None:
+        settings["min_free_space"] = args.min_free
+    volumes = VolumeManager.from_settings(settings)
+    results = {}
+
+    def on_finished(job):
+        ok = job.state == "완료"
+        results[job.job_id] = ok
+        writer.emit(
+            "done" if ok else "failed",
+            job=job.job_id,
+            url=job.url,
+            returncode=job.returncode,
+            error=job.error,
+            failure=job.failure,
+            attempts=job.attempts,
+            output=job.output_path,
+            postprocess=job.postprocess_results,
+        )
+
+    def run_job(job):
+        # 프로필 지정 작업은 캐시된 포맷 목록(없으면 한 번 확인)으로 포맷 ID 결정
+        # 확인하는 동안 취소/일시 정지되었으면 실패로 처리하지 않고 execute_job이 정리
+        resolved = resolve_job_format(job, engine, prefetcher, profiles, log_callback=writer.log)
+        if not resolved and job.abort_reason not in INTERRUPT_REASONS:
+            job.state = "실패"
+            journal.set_state(job, "failed", job.error)
+            metrics.record(job, engine.name)
+            on_finished(job)
+            return
+        execute_job(
+            job, engine, log_callback=writer.log, progress_callback=writer.progress,
+            journal=journal, bandwidth=bandwidth, tuner=tuner,
+            pipeline=pipeline, on_finished=on_finished, archive=archive, retry=retry,
+            metrics=metrics, volumes=volumes,
+        )
+
+    def on_error(job):
+        writer.log(f"❌ 예외 발생 [#{job.job_id}]: {job.error}")
+        journal.set_state(job, "failed", job.error)
+        metrics.record(job, engine.name)
+        on_finished(job)
+
+    expand_failed = 0
+
+    def iter_jobs():
+        """작업을 만드는 대로 반환 (재생목록/채널은 항목을 찾는 대로)"""
+        nonlocal expand_failed
+        job_id = 0
+        for row in resume_rows:
+            job_id += 1
+            yield job_from_journal(row, job_id), ""
+        for url in urls:
+            try:
+                for entry_url, title in expand_playlist(engine, url):
+                    job_id += 1
+                    yield DownloadJob(job_id, entry_url, format_str, args.output), title
+            except ProbeError as e:
+                expand_failed += 1
+                writer.emit("expand_failed", url=url, error=str(e))
+
+    download_queue = DownloadQueue(run_job, max_workers=args.jobs, on_error=on_error)
+    # 실패 원인별 재시도, 속도 제한이 걸리면 동시 다운로드 수를 줄였다가 다시 늘림
+    retry = RetryController(download_queue)
+    total = 0
+    skipped = 0
+    try:
+        for job, title in iter_jobs():
+            total += 1
+            resumed = job.journal_id is not None
+
+            # 이미 받은 영상은 yt-dlp를 실행하지 않고 건너뜀
+            archived = archive.find(job.url, job.format_str) if archive else None
+            if archived:
+                skipped += 1
+                if resumed:
+                    journal.set_state(job, "done")
+                writer.emit("skipped", job=job.job_id, url=job.url, output=archived["path"])
+                continue
+
+            journal.add(job)
+            writer.emit(
+                "queued", job=job.job_id, url=job.url, title=title, format=job.format_str,
+                output=job.download_path, resumed=resumed,
+            )
+            # 프로필 해석과 공간 예약(예상 크기)에 쓸 포맷 목록을 미리 확인
+            prefetcher.prefetch(job.url)
+            download_queue.submit(job)
+
+        download_queue.wait()
+        pipeline.wait()
+    except KeyboardInterrupt:
+        # 실행 중인 yt-dlp/ffmpeg 프로세스를 정리 (받은 부분은 --resume으로 이어받기)
+        writer.emit("interrupted", total=total)
+        download_queue.stop_all()
+        return 130
+    finally:
+        pipeline.shutdown()
+        prefetcher.shutdown()
+        engine.close()
+        metrics.close()
+
+    failed = sum(1 for ok in results.values() if not ok)
+    writer.emit(
+        "summary", total=total, succeeded=total - failed - skipped, failed=failed + expand_failed,
+        skipped=skipped,
+    )
+    return 1 if failed or expand_failed else 0
+
+def command_probe(args):
+    urls = read_urls(args.sources)
+    writer = JsonEventWriter()
+    engine = make_engine(args.engine, log_callback=writer.log)
+    profiles = load_format_profiles(load_settings(), log_callback=writer.log)
+    if args.profile == ["all"]:
+        selected = list(profiles.values())
+    else:
+        unknown = [name for name in args.profile or [] if name not in profiles]
+        if unknown:
+            print(f"알 수 없는 포맷 프로필: {', '.join(unknown)}", file=sys.stderr)
+            return 2
+        selected = [profiles[name] for name in args.profile or []]
+
+    # URL을 묶어 최대 --processes개의 추출기로 동시에 확인하고 끝나는 순서대로 출력
+    failed = 0
+    results = batch_probe(
+        engine, urls, processes=args.processes, chunk_size=args.chunk_size,
+        format_cache=None if args.no_cache else FormatCache(),
+    )
+    for url, result in results:
+        if not isinstance(result, ProbeResult):
+            failed += 1
+            writer.emit("probe_failed", url=url, error=str(result))
+            continue
+        formats = result.formats
+        writer.emit("formats", url=url, title=result.title or None, formats=[asdict(fmt) for fmt in formats])
+        for name, match in resolve_profiles(selected, formats).items():
+            writer.emit(
+                "selection", url=url, profile=name,
+                format=match.format_str if match else None,
+                size=match.size if match else None,
+            )
+    engine.close()
+    return 1 if failed else 0
+
+def command_archive(args):
+    writer = JsonEventWriter()
+    archive = DownloadArchive()
+
+    if args.action == "scan":
+        for directory in args.directories:
+            added = archive.scan(directory, compute_hash=not args.no_hash, log_callback=writer.log)
+            writer.emit("scanned", directory=directory, added=added)
+    elif args.action == "prune":
+        writer.emit("pruned", removed=archive.prune(log_callback=writer.log))
+
+    writer.emit("archive", path=archive.path, entries=archive.count())
+    archive.close()
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="YouTube VR 영상 다운로더 (명령줄/일괄 처리)",
+    )
+    parser.add_argument(
+        "--engine", choices=["auto"] + list(ENGINES), default="auto",
+        help="다운로드 엔진 (기본: yt_dlp 모듈이 있으면 내장 엔진)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    download = subparsers.add_parser("download", help="URL 목록 다운로드")
+    download.add_argument("sources", nargs="*", help="영상/재생목록/채널 URL 또는 URL 목록 파일 ('-'는 표준 입력)")
+    download.add_argument("-f", "--format", default="bv+ba", help="yt-dlp 포맷 문자열 (기본: bv+ba)")
+    download.add_argument("-o", "--output", default=os.path.expanduser("~/Downloads"), help="저장 경로")
+    download.add_argument(
+        "-p", "--profile", help="포맷 프로필 이름 (-f 대신 조건에 맞는 포맷을 자동 선택)",
+    )
+    download.add_argument("-j", "--jobs", type=int, default=2, help="동시 다운로드 수")
+    download.add_argument("--progress-interval", type=float, default=1.0, help="작업별 진행률 출력 간격(초)")
+    download.add_argument(
+        "--limit-rate", type=float, metavar="MBPS",
+        help="전체 대역폭 제한 (Mbps, 0 = 무제한, 기본: settings.json)",
+    )
+    download.add_argument("--segmented", action="store_true", help="분할 다운로드 (연결 수 자동 조절)")
+    download.add_argument("--max-connections", type=int, help="분할 다운로드 최대 연결 수")
+    download.add_argument("--force", action="store_true", help="다운로드 기록에 있는 영상도 다시 받기")
+    download.add_argument("--metrics-jsonl", metavar="PATH", help="작업별 측정값 JSON Lines 파일 ('' = 끔, 기본: settings.json)")
+    download.add_argument("--metrics-prom", metavar="PATH", help="Prometheus 텍스트 형식 측정값 파일")
+    download.add_argument("--metrics-port", type=int, metavar="PORT", help="Prometheus /metrics HTTP 포트 (0 = 끔)")
+    download.add_argument(
+        "--volume", action="append", metavar="DIR",
+        help="저장 경로 외에 나눠 저장할 폴더 (여러 번 지정 가능, 여유 공간이 많은 곳에 배정)",
+    )
+    download.add_argument("--scratch", metavar="DIR", help="다운로드 중 파일을 둘 임시 폴더 ('' = 끔, 끝나면 저장 폴더로 옮김)")
+    download.add_argument("--min-free", metavar="SIZE", help="디스크마다 남겨 둘 여유 공간 (예: 2GiB, 기본: settings.json)")
+    download.add_argument("--resume", action="store_true", help="저장 경로의 작업 기록에서 완료되지 않은 작업 이어받기")
+    download.set_defaults(func=command_download)
+
+    probe = subparsers.add_parser("probe", help="포맷 목록을 JSON으로 출력")
+    probe.add_argument("sources", nargs="*", default=["-"], help="URL 또는 URL 목록 파일 ('-'는 표준 입력)")
+    probe.add_argument("--no-cache", action="store_true", help="포맷 캐시를 사용하지 않음")
+    probe.add_argument("-P", "--processes", type=int, default=4, help="동시에 실행할 추출기(yt-dlp 프로세스) 수")
+    probe.add_argument("--chunk-size", type=int, default=25, help="추출기 한 번에 넘길 최대 URL 수")
+    probe.add_argument(
+        "-p", "--profile", action="append",
+        help="포맷 프로필로 고른 포맷도 출력 (여러 번 지정 가능, 'all'은 전체)",
+    )
+    probe.set_defaults(func=command_probe)
+
+    archive = subparsers.add_parser("archive", help="다운로드 기록(이미 받은 영상 목록) 관리")
+    archive.add_argument(
+        "action", choices=["scan", "prune", "stats"],
+        help="scan: 폴더를 훑어 기록 추가/갱신, prune: 사라진 파일 기록 삭제, stats: 기록 수 출력",
+    )
+    archive.add_argument("directories", nargs="*", default=[], help="scan할 폴더")
+    archive.add_argument("--no-hash", action="store_true", help="scan할 때 SHA-256을 계산하지 않음")
+    archive.set_defaults(func=command_archive)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,4183 @@
+import subprocess
+import threading
+import os
+import re
+import sys
+import shutil
+import heapq
+import itertools
+import glob
+import random
+import signal
+import shlex
+import logging
+import logging.handlers
+import json
+import time
+import importlib.util
+import sqlite3
+import hashlib
+import errno
+import struct
+import concurrent.futures
+import contextlib
+import multiprocessing
+import queue
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, asdict, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 설정/캐시 파일 저장 위치
+APP_DIR = os.path.join(os.path.expanduser("~"), ".vr_downloader")
+SETTINGS_PATH = os.path.join(APP_DIR, "settings.json")
+STATE_PATH = os.path.join(APP_DIR, "state.json")
+
+# yt-dlp 대신 실행할 명령 (예: "python benchmarks/fake_ytdlp.py", 벤치마크/오프라인 테스트용)
+YTDLP_COMMAND_ENV = "VR_DOWNLOADER_YTDLP"
+
+# settings.json에서 덮어쓸 수 있는 기본 설정
+DEFAULT_SETTINGS = {
+    "update_check_interval_hours": 24,
+    # 전체 다운로드 대역폭 제한 (Mbps, 0 = 무제한)
+    "bandwidth_limit_mbps": 0,
+    # 시간대별 제한, 예: [{"start": "09:00", "end": "18:00", "limit_mbps": 50}]
+    "bandwidth_schedule": [],
+    # 재생목록/채널 영상의 포맷 목록을 미리 확인하는 동시 작업 수
+    "prefetch_workers": 4,
+    # 상주 프로세스 풀 엔진: 프로세스 수 범위, 재시작 기준(작업 수, 메모리 증가량 MB), 유휴 종료(초)
+    "pool_min_workers": 1,
+    "pool_max_workers": 4,
+    "pool_max_jobs_per_worker": 50,
+    "pool_max_memory_growth_mb": 300,
+    "pool_idle_timeout": 120,
+    # 분할 다운로드 (조각을 여러 연결로 동시에 받음, 연결 수는 자동 조절)
+    "segmented_download": False,
+    "max_connections": 16,
+    # 후처리(병합, VR 메타데이터, 검사, 무결성 기록) 프로세스 수와 단계
+    # verify가 있으면 받거나 병합하는 동안 해시를 구하고 결과를 파일 옆 .vrcheck.json에 남김
+    "postprocess_workers": 2,
+    "postprocess_steps": ["merge", "vr_metadata", "probe", "verify", "hash", "cleanup"],
+    # 이미 받은 영상은 다운로드 기록(archive.sqlite3)으로 확인하여 건너뜀
+    "download_archive": True,
+    # 자동 포맷 선택 프로필 (기본 프로필에 추가, 같은 이름이면 덮어씀)
+    # 예: [{"name": "H.264 VR 4GiB 이하", "video_codecs": ["H.264"], "vr": true, "max_size": "4GiB"}]
+    "format_profiles": [],
+    # 작업별 측정값(단계별 시간, 받은 바이트, 속도 분포) 내보내기
+    # JSON Lines 파일(빈 값 = 끔), Prometheus 텍스트 파일(node_exporter textfile용), /metrics HTTP 포트(0 = 끔)
+    "metrics_jsonl": os.path.join(APP_DIR, "metrics.jsonl"),
+    "metrics_prometheus_file": "",
+    "metrics_port": 0,
+    "metrics_host": "127.0.0.1",
+    # 저장 공간: 선택한 저장 경로 외에 나눠 저장할 폴더(다른 디스크), 다운로드 중 파일을 둘 빠른 임시 폴더
+    # (빈 값 = 저장 폴더에 바로 받음), 디스크마다 항상 남겨 둘 여유 공간
+    "output_volumes": [],
+    "scratch_dir": "",
+    "min_free_space": "2GiB",
+}
+
+def load_json_file(path, default):
+    """JSON 파일 읽기 (없거나 깨졌으면 default)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def save_json_file(path, data):
+    """JSON 파일을 임시 파일에 쓴 뒤 교체 (중간에 종료돼도 깨지지 않도록)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def load_settings():
+    """기본 설정에 settings.json 값을 덮어써서 반환"""
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(load_json_file(SETTINGS_PATH, {}))
+    return settings
+
+def install_with_winget(package_name, display_name, log_callback=None):
+    """winget을 사용하여 패키지 설치"""
+    try:
+        if log_callback:
+            log_callback(f"{display_name} 설치 중...")
+        result = subprocess.run(
+            ["winget", "install", "--id", package_name, "--accept-source-agreements", "--accept-package-agreements"],
+            capture_output=True,
+            text=True,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+        if result.returncode == 0:
+            if log_callback:
+                log_callback(f"✅ {display_name} 설치 완료!")
+            return True
+        else:
+            if log_callback:
+                log_callback(f"❌ {display_name} 설치 실패: {result.stderr}")
+            return False
+    except Exception as e:
+        if log_callback:
+            log_callback(f"❌ {display_name} 설치 중 오류: {str(e)}")
+        return False
+
+def update_ytdlp(log_callback=None, state=None):
+    """yt-dlp 업데이트 (state가 주어지면 확인한 버전을 기록)"""
+    try:
+        if log_callback:
+            log_callback("yt-dlp 업데이트 확인 중...")
+        result = subprocess.run(
+            [*ytdlp_command(), "-U"],
+            capture_output=True,
+            text=True,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+        if "Updated" in result.stdout or "up to date" in result.stdout:
+            if log_callback:
+                log_callback("✅ yt-dlp가 최신 버전입니다.")
+        version = re.search(r'(\d{4}\.\d{2}\.\d{2}(?:\.\d+)?)', result.stdout)
+        if state is not None and version:
+            state["ytdlp_version"] = version.group(1)
+        return True
+    except Exception as e:
+        if log_callback:
+            log_callback(f"⚠️ yt-dlp 업데이트 확인 실패: {str(e)}")
+        return False
+
+def load_dependency_state():
+    """마지막 의존성 확인 결과 (yt-dlp 경로, 버전, 업데이트 확인 시각)"""
+    return load_json_file(STATE_PATH, {})
+
+def save_dependency_state(state):
+    try:
+        save_json_file(STATE_PATH, state)
+    except OSError:
+        pass
+
+def ytdlp_command():
+    """yt-dlp 실행 명령 (VR_DOWNLOADER_YTDLP 환경 변수로 바꿀 수 있음)"""
+    override = os.environ.get(YTDLP_COMMAND_ENV)
+    if not override:
+        return ["yt-dlp"]
+    if sys.platform == 'win32':
+        return [part.strip('"') for part in shlex.split(override, posix=False)]
+    return shlex.split(override)
+
+def find_ytdlp(state):
+    """yt-dlp 실행 파일 경로 (캐시된 경로가 유효하면 PATH 검색 생략)"""
+    if os.environ.get(YTDLP_COMMAND_ENV):
+        return ytdlp_command()[0]
+    path = state.get("ytdlp_path")
+    if path and os.path.exists(path):
+        return path
+    path = shutil.which("yt-dlp")
+    state["ytdlp_path"] = path
+    return path
+
+def update_check_due(state, interval_hours):
+    """마지막 업데이트 확인 후 interval_hours가 지났는지 확인"""
+    return time.time() - state.get("last_update_check", 0) >= interval_hours * 3600
+
+def check_dependencies(log_callback=None, settings=None):
+    """필수 의존성 체크 및 자동 설치 (업데이트 확인은 설정된 주기마다 한 번)"""
+    settings = settings or load_settings()
+    state = load_dependency_state()
+
+    if log_callback:
+        log_callback("=" * 60)
+        log_callback("의존성 확인 중...")
+        log_callback("=" * 60)
+
+    newly_installed = False
+
+    # yt-dlp 체크
+    if not find_ytdlp(state):
+        if log_callback:
+            log_callback("⚠️ yt-dlp가 설치되어 있지 않습니다.")
+        if not install_with_winget("yt-dlp.yt-dlp", "yt-dlp", log_callback):
+            return False, False
+        newly_installed = True
+        state.pop("ytdlp_path", None)
+    else:
+        if log_callback:
+            log_callback("✅ yt-dlp 설치 확인")
+        # yt-dlp 업데이트 확인 (주기가 지났을 때만)
+        if update_check_due(state, settings["update_check_interval_hours"]):
+            update_ytdlp(log_callback, state)
+            state["last_update_check"] = time.time()
+        elif log_callback:
+            checked = time.strftime("%Y-%m-%d %H:%M", time.localtime(state["last_update_check"]))
+            log_callback(f"⏭️ 업데이트 확인 생략 (마지막 확인: {checked})")
+
+    save_dependency_state(state)
+
+    if log_callback:
+        log_callback("=" * 60)
+        log_callback("모든 의존성 확인 완료!")
+        log_callback("=" * 60)
+    return True, newly_installed
+
+SIZE_UNITS = {
+    "B": 1,
+    "KiB": 1024,
+    "MiB": 1024 ** 2,
+    "GiB": 1024 ** 3,
+    "TiB": 1024 ** 4,
+    "KB": 1000,
+    "MB": 1000 ** 2,
+    "GB": 1000 ** 3,
+}
+
+def parse_size(text):
+    """'12.3MiB' 같은 크기 문자열을 바이트 수로 변환 (실패 시 0)"""
+    match = re.search(r'([0-9.]+)\s*([KMGT]?i?B)', text or "")
+    if not match or match.group(2) not in SIZE_UNITS:
+        return 0
+    try:
+        return float(match.group(1)) * SIZE_UNITS[match.group(2)]
+    except ValueError:
+        return 0
+
+def format_size(num_bytes):
+    """바이트 수를 사람이 읽기 쉬운 문자열로 변환"""
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TiB"
+
+def parse_progress_line(line):
+    """yt-dlp 진행률 라인에서 퍼센트/속도/ETA 추출 (진행률 라인이 아니면 None)"""
+    if "[download]" not in line or "%" not in line:
+        return None
+    match = re.search(r'(\d+\.?\d*)%', line)
+    if not match:
+        return None
+
+    speed_match = re.search(r'at\s+([0-9.]+\s*[KMG]iB/s)', line)
+    eta_match = re.search(r'ETA\s+(\d+:\d+)', line)
+
+    return {
+        'percent': float(match.group(1)) / 100,
+        'speed': speed_match.group(1) if speed_match else "계산 중",
+        'speed_bytes': parse_size(speed_match.group(1)) if speed_match else 0,
+        'eta': eta_match.group(1) if eta_match else "계산 중",
+        'downloaded_bytes': None,
+        'total_bytes': None,
+    }
+
+class JobInterrupted(Exception):
+    """job.abort_reason이 설정되어 다운로드를 중단함"""
+
+THROTTLE_MARKERS = ("HTTP Error 429", "Too Many Requests", "HTTP Error 403", "as required by the site")
+RETRY_MARKERS = ("Retrying", "Got error", "HTTP Error", "timed out", "Connection reset")
+
+def kill_process_tree(pid):
+    """프로세스와 그 자식 프로세스들을 모두 종료"""
+    if sys.platform == 'win32':
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(pid)],
+            capture_output=True,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+        return
+    try:
+        # 자기 그룹의 리더일 때만 그룹 전체를 종료 (아니면 이 프로세스 그룹까지 죽이게 됨)
+        if os.getpgid(pid) == pid:
+            os.killpg(pid, signal.SIGTERM)
+        else:
+            os.kill(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def note_download_warning(job, message):
+    """경고/오류 메시지에서 조각 재시도와 속도 제한(스로틀링) 감지"""
+    job.messages.append(message)
+    if any(marker in message for marker in THROTTLE_MARKERS):
+        job.error_count += 1
+        job.throttled = True
+    elif any(marker in message for marker in RETRY_MARKERS):
+        job.error_count += 1
+
+def rate_limit_changed(started, current):
+    """외부 yt-dlp를 시작할 때의 배분량과 현재 배분량이 달라졌는지 (5% 이내 차이는 무시)"""
+    if not started or not current:
+        return bool(started) != bool(current)
+    return abs(current - started) > started * 0.05
+
+def run_ytdlp_download(job, log_callback=None, progress_callback=None):
+    """yt-dlp로 작업 하나를 다운로드하고 종료 코드를 반환
+
+    외부 실행 파일은 시작할 때의 --limit-rate로 고정되므로, 다른 작업이 시작/종료되어
+    배분량(job.rate_limit)이 바뀌면 프로세스를 다시 실행하여 받은 부분부터 이어받는다.
+    """
+    def log(message):
+        if log_callback:
+            log_callback(f"[#{job.job_id}] {message}")
+
+    while True:
+        returncode, rebalanced = run_ytdlp_process(job, log, progress_callback)
+        if not rebalanced:
+            return returncode
+        rate = f"{format_size(job.rate_limit)}/s" if job.rate_limit else "무제한"
+        log(f"📶 대역폭 배분 변경: {rate}로 이어받기")
+
+def run_ytdlp_process(job, log, progress_callback=None):
+    """yt-dlp를 한 번 실행 (종료 코드, 배분량이 바뀌어 중단했는지)"""
+    extractor_args = "youtube:player-client=android_vr"
+    if job.connections:
+        # dashy: https 포맷을 범위 조각으로 나눠 -N으로 동시에 받을 수 있게 함
+        extractor_args += ";formats=dashy"
+
+    cmd = [
+        *ytdlp_command(),
+        "--extractor-args", extractor_args,
+        "-f", job.format_str,
+        "-o", os.path.join(job.working_path, job.output_template),
+        "--progress",
+        "--newline",
+        "--continue",
+        "--no-playlist",
+    ]
+    rate_limit = job.rate_limit
+    if rate_limit:
+        cmd += ["--limit-rate", str(int(rate_limit))]
+    if job.connections:
+        cmd += ["--concurrent-fragments", str(job.connections)]
+    cmd.append(job.url)
+
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        bufsize=1,
+        # 취소할 때 yt-dlp가 띄운 ffmpeg까지 함께 종료할 수 있도록 별도 프로세스 그룹으로 실행
+        start_new_session=sys.platform != 'win32',
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+    )
+    job.process = process
+    rebalanced = False
+
+    for line in process.stdout:
+        if job.abort_reason:
+            # 받은 조각은 .part로 남겨 두고 프로세스 종료
+            kill_process_tree(process.pid)
+            break
+
+        line = line.strip()
+        if not line:
+            continue
+
+        if "WARNING" in line or "ERROR" in line or "Retrying" in line:
+            note_download_warning(job, line)
+
+        # 다운로드 진행률 라인은 로그에 추가하지 않고 진행률만 갱신
+        if "[download]" in line and "%" in line:
+            progress = parse_progress_line(line)
+            if progress:
+                job.progress = progress['percent']
+                job.speed = progress['speed_bytes']
+                job.eta = progress['eta']
+                if progress_callback:
+                    progress_callback(job, progress)
+                if rate_limit_changed(rate_limit, job.rate_limit):
+                    kill_process_tree(process.pid)
+                    rebalanced = True
+                    break
+            continue
+
+        # 이미 받은 파일 (이어받기/병합 재시도)
+        already = re.search(r'\[download\] (.+) has already been downloaded', line)
+        if already:
+            job.record_file(already.group(1))
+            log(f"💾 이미 받은 파일: {already.group(1)}")
+            continue
+
+        # Destination 라인은 로그에 추가
+        if "[download] Destination:" in line:
+            filename = line.split("Destination:")[-1].strip()
+            job.record_file(filename)
+            log(f"💾 파일명: {filename}")
+            continue
+
+        # Sleeping 라인은 간단하게 표시 (사이트가 요구한 대기는 속도 제한 신호)
+        if "Sleeping" in line:
+            note_download_warning(job, line)
+            log("⏳ 잠시 대기 중...")
+            continue
+
+        # Extracting, Downloading 등 주요 이벤트만 로그에 추가
+        if any(keyword in line for keyword in ["[youtube]", "[info]", "Merging", "Deleting"]):
+            # 너무 상세한 정보는 제외
+            if "Downloading" in line and "API JSON" in line:
+                continue
+            if "Extracting" in line:
+                log("🔍 영상 정보 추출 중...")
+            elif "Merging" in line:
+                merged = re.search(r'Merging formats into "(.+)"', line)
+                if merged:
+                    job.record_file(merged.group(1), final=True)
+                log("🔧 영상과 오디오 병합 중...")
+            elif "[info]" in line and "format(s)" in line:
+                log(line.replace("[info]", "📥"))
+            else:
+                # 기타 중요 메시지
+                if len(line) < 200:  # 너무 긴 메시지 제외
+                    log(line)
+
+    process.wait()
+    job.process = None
+    return process.returncode, rebalanced and not job.abort_reason
+
+YOUTUBE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+def extract_video_id(url):
+    """URL에서 YouTube 영상 ID 추출 (인식할 수 없으면 정규화된 URL 반환)"""
+    url = url.strip()
+    if YOUTUBE_ID_RE.match(url):
+        return url
+
+    parsed = urlparse(url if "://" in url else "https://" + url)
+    host = parsed.netloc.lower()
+    if host.startswith("www.") or host.startswith("m."):
+        host = host.split(".", 1)[1]
+
+    if host == "youtu.be":
+        candidate = parsed.path.strip("/").split("/")[0]
+        if YOUTUBE_ID_RE.match(candidate):
+            return candidate
+    elif host.endswith("youtube.com"):
+        video_ids = parse_qs(parsed.query).get("v")
+        if video_ids and YOUTUBE_ID_RE.match(video_ids[0]):
+            return video_ids[0]
+        parts = parsed.path.strip("/").split("/")
+        if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v") and YOUTUBE_ID_RE.match(parts[1]):
+            return parts[1]
+
+    return url
+
+VIDEO_CODEC_NAMES = {
+    "avc1": "H.264",
+    "hev1": "HEVC",
+    "hvc1": "HEVC",
+    "vp09": "VP9",
+    "vp9": "VP9",
+    "av01": "AV1",
+}
+
+AUDIO_CODEC_NAMES = {
+    "mp4a": "AAC",
+    "opus": "Opus",
+    "ac-3": "AC-3",
+    "ec-3": "E-AC-3",
+}
+
+def codec_display_name(codec, names):
+    """'avc1.640033' 같은 코덱 문자열을 표시용 이름으로 변환"""
+    if not codec or codec == "none":
+        return ""
+    return names.get(codec.split(".")[0].lower(), codec.split(".")[0])
+
+@dataclass
+class VideoFormat:
+    """yt-dlp가 보고한 포맷 하나"""
+    format_id: str
+    ext: str = ""
+    width: int = None
+    height: int = None
+    fps: float = None
+    vcodec: str = ""
+    acodec: str = ""
+    filesize: int = None
+    filesize_approx: int = None
+    tbr: float = None
+    audio_channels: int = None
+    projection: str = ""  # mesh, equirectangular, ...
+    spatial_audio: str = ""  # ambisonics_5_1, ...
+    format_note: str = ""
+
+    @classmethod
+    def from_info(cls, fmt):
+        """yt-dlp JSON의 formats 항목에서 레코드 생성"""
+        projection = ""
+        spatial_audio = ""
+        for token in (fmt.get("format_note") or "").split(","):
+            token = token.strip().lower()
+            if token == "mesh" or token.startswith("equirectangular"):
+                projection = token
+            elif token.startswith("ambisonics"):
+                spatial_audio = token
+
+        return cls(
+            format_id=str(fmt.get("format_id", "")),
+            ext=fmt.get("ext") or "",
+            width=fmt.get("width"),
+            height=fmt.get("height"),
+            fps=fmt.get("fps"),
+            vcodec=fmt.get("vcodec") or "none",
+            acodec=fmt.get("acodec") or "none",
+            filesize=fmt.get("filesize"),
+            filesize_approx=fmt.get("filesize_approx"),
+            tbr=fmt.get("tbr"),
+            audio_channels=fmt.get("audio_channels"),
+            projection=projection,
+            spatial_audio=spatial_audio,
+            format_note=fmt.get("format_note") or "",
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """캐시에 저장된 dict에서 레코드 복원"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+    @property
+    def has_video(self):
+        return self.vcodec not in ("", "none")
+
+    @property
+    def has_audio(self):
+        return self.acodec not in ("", "none")
+
+    @property
+    def is_audio_only(self):
+        return self.has_audio and not self.has_video
+
+    @property
+    def size(self):
+        """파일 크기 (정확한 값이 없으면 추정치)"""
+        return self.filesize or self.filesize_approx
+
+    @property
+    def resolution(self):
+        if self.is_audio_only:
+            return "오디오"
+        if self.width and self.height:
+            return f"{self.width}x{self.height}"
+        return ""
+
+    def attributes(self):
+        """표시용 특수 속성 목록"""
+        attrs = []
+        if self.fps and self.fps >= 50:
+            attrs.append(f"{self.fps:g}fps")
+        if self.projection:
+            attrs.append("VR")
+        if self.spatial_audio:
+            attrs.append("입체음향")
+        return attrs
+
+    def table_row(self):
+        """포맷 테이블 한 행 (ID, 확장자, 해상도, 크기, 비디오, 오디오, 속성)"""
+        size = ""
+        if self.filesize:
+            size = format_size(self.filesize)
+        elif self.filesize_approx:
+            size = "~" + format_size(self.filesize_approx)
+
+        return [
+            self.format_id,
+            self.ext,
+            self.resolution,
+            size,
+            codec_display_name(self.vcodec, VIDEO_CODEC_NAMES),
+            codec_display_name(self.acodec, AUDIO_CODEC_NAMES),
+            " ".join(self.attributes()),
+        ]
+
+@dataclass
+class ProbeResult:
+    """영상 하나의 포맷 확인 결과"""
+    url: str
+    video_id: str = ""
+    title: str = ""
+    duration: float = None
+    formats: list = field(default_factory=list)
+
+    @classmethod
+    def from_info(cls, url, info):
+        formats = [
+            VideoFormat.from_info(fmt) for fmt in info.get("formats") or []
+            if fmt.get("ext") != "mhtml"  # 스토리보드 제외
+        ]
+        return cls(
+            url=url,
+            video_id=info.get("id") or "",
+            title=info.get("title") or "",
+            duration=info.get("duration"),
+            formats=formats,
+        )
+
+class ProbeError(Exception):
+    """포맷 확인 실패"""
+
+def iter_ytdlp_json(url, extra_args=()):
+    """yt-dlp --dump-json 출력을 한 줄씩 읽어 dict로 반환 (url은 URL 목록이어도 됨)"""
+    cmd = [
+        *ytdlp_command(),
+        "--extractor-args", "youtube:player-client=android_vr",
+        "--dump-json",
+        *extra_args,
+        *([url] if isinstance(url, str) else url)
+    ]
+
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+    )
+
+    # stderr는 별도 스레드에서 읽어 파이프가 가득 차지 않도록 함
+    stderr_lines = []
+    stderr_thread = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+    stderr_thread.start()
+
+    try:
+        for line in process.stdout:
+            line = line.strip()
+            if line.startswith("{"):
+                yield json.loads(line)
+    except GeneratorExit:
+        # 다 읽기 전에 그만두면 남은 추출을 중단
+        process.kill()
+        process.wait()
+        raise
+
+    process.wait()
+    stderr_thread.join()
+    if process.returncode != 0:
+        raise ProbeError("".join(stderr_lines).strip() or f"yt-dlp 종료 코드 {process.returncode}")
+
+def iter_probe_json(url, extra_args=()):
+    """yt-dlp --dump-json 출력을 영상 하나씩 ProbeResult로 반환"""
+    for info in iter_ytdlp_json(url, extra_args):
+        yield ProbeResult.from_info(url, info)
+
+def probe_formats(url):
+    """영상 하나의 포맷 목록을 확인"""
+    for result in iter_probe_json(url, extra_args=("--no-playlist",)):
+        return result
+    raise ProbeError("영상 정보를 받지 못했습니다.")
+
+# yt-dlp 오류 줄: "ERROR: [youtube] <영상 ID>: <메시지>"
+PROBE_ERROR_RE = re.compile(r'^ERROR: \[[^\]]+\] ([^:\s]+): (.+)$', re.MULTILINE)
+
+def probe_formats_many(urls):
+    """URL 여러 개를 yt-dlp 한 번으로 확인하여 (url, ProbeResult 또는 ProbeError)를 나오는 대로 반환
+
+    --ignore-errors로 실패한 영상이 있어도 나머지를 계속 추출하며,
+    결과가 나오지 않은 URL은 그 영상의 오류 줄(없으면 전체 오류)로 실패 처리한다.
+    """
+    pending = OrderedDict()
+    for url in urls:
+        pending.setdefault(extract_video_id(url), []).append(url)
+
+    error = None
+    try:
+        for info in iter_ytdlp_json(urls, extra_args=("--no-playlist", "--ignore-errors")):
+            key = info.get("id")
+            if key not in pending:
+                key = extract_video_id(info.get("original_url") or info.get("webpage_url") or "")
+            for url in pending.pop(key, []):
+                yield url, ProbeResult.from_info(url, info)
+    except ProbeError as e:
+        error = e
+
+    messages = dict(PROBE_ERROR_RE.findall(str(error))) if error else {}
+    for key, waiting in pending.items():
+        message = messages.get(key) or (str(error) if error else "영상 정보를 받지 못했습니다.")
+        for url in waiting:
+            yield url, ProbeError(message)
+
+def batch_probe(engine, urls, processes=4, chunk_size=25, format_cache=None):
+    """여러 URL의 포맷 목록을 최대 processes개의 추출기 실행으로 나눠 동시에 확인
+
+    URL을 chunk_size개 이하로 묶어 묶음마다 추출기를 한 번만 실행하므로 (외부 yt-dlp는 프로세스 하나,
+    내장 엔진은 YoutubeDL 하나, 상주 풀은 워커 하나) 시작 비용을 URL마다 내지 않는다.
+    (url, ProbeResult 또는 ProbeError)를 끝나는 순서대로 반환하며, format_cache에 있는 영상은 바로 반환하고
+    새로 확인한 포맷 목록은 캐시에 넣고 끝날 때 한 번만 파일에 쓰며, 이번에 확인한 영상은
+    캐시 크기 제한으로 지우지 않는다. 다 읽기 전에 그만두면 남은 확인은 취소된다.
+    """
+    todo = []
+    for url in urls:
+        formats = format_cache.get(url) if format_cache else None
+        if formats is not None:
+            yield url, ProbeResult(url=url, video_id=extract_video_id(url), formats=formats)
+        else:
+            todo.append(url)
+    if not todo:
+        return
+
+    processes = max(1, processes)
+    size = max(1, min(chunk_size, -(-len(todo) // processes)))
+    chunks = [todo[index:index + size] for index in range(0, len(todo), size)]
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def run(chunk):
+        done = set()
+        try:
+            for url, result in engine.probe_many(chunk):
+                if stop.is_set():
+                    return
+                done.add(url)
+                results.put((url, result))
+        except Exception as e:
+            for url in chunk:
+                if url not in done:
+                    results.put((url, ProbeError(str(e))))
+        finally:
+            results.put(None)  # 묶음 하나 끝
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=processes, thread_name_prefix="batch-probe")
+    cached = []
+    try:
+        for chunk in chunks:
+            executor.submit(run, chunk)
+        remaining = len(chunks)
+        while remaining:
+            item = results.get()
+            if item is None:
+                remaining -= 1
+                continue
+            url, result = item
+            if format_cache and isinstance(result, ProbeResult):
+                format_cache.put(url, result.formats, save=False)
+                cached.append(url)
+            yield url, result
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        if cached:
+            format_cache.save(keep=cached)
+
+# 해상도 필터 (이름, 조건)
+RESOLUTION_FILTERS = {
+    "전체": lambda fmt: True,
+    "FHD 초과": lambda fmt: not (fmt.width <= 1920 and fmt.height <= 1080),
+    "4K 이상": lambda fmt: max(fmt.width, fmt.height) >= 3840,
+    "5K 이상": lambda fmt: max(fmt.width, fmt.height) >= 5120,
+    "8K 이상": lambda fmt: max(fmt.width, fmt.height) >= 7680,
+}
+
+def format_matches(fmt, resolution_filter="FHD 초과", text="", vr_only=False, spatial_only=False):
+    """포맷이 테이블 필터 조건에 맞는지 확인"""
+    if fmt.has_video and fmt.width and fmt.height:
+        if not RESOLUTION_FILTERS[resolution_filter](fmt):
+            return False
+    if vr_only and fmt.has_video and not fmt.projection:
+        return False
+    if spatial_only and fmt.has_audio and not fmt.spatial_audio:
+        return False
+    if text:
+        haystack = " ".join(fmt.table_row() + [fmt.vcodec, fmt.acodec]).lower()
+        if text.lower() not in haystack:
+            return False
+    return True
+
+# 정렬 기준 (테이블 열 순서와 동일)
+FORMAT_SORT_KEYS = [
+    lambda fmt: (len(fmt.format_id), fmt.format_id),
+    lambda fmt: fmt.ext,
+    lambda fmt: (fmt.width or 0) * (fmt.height or 0),
+    lambda fmt: fmt.size or 0,
+    lambda fmt: fmt.vcodec,
+    lambda fmt: fmt.acodec,
+    lambda fmt: (bool(fmt.projection), bool(fmt.spatial_audio), fmt.fps or 0),
+]
+
+class FormatCache:
+    """영상 ID별 포맷 목록을 디스크에 저장하는 캐시 (TTL + LRU 크기 제한)"""
+
+    def __init__(self, path=None, ttl=6 * 3600, max_entries=500):
+        self.path = path or os.path.join(APP_DIR, "format_cache.json")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        now = time.time()
+        for key, entry in data.items():
+            if now - entry.get("time", 0) < self.ttl:
+                self._entries[key] = entry
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, url):
+        """캐시된 포맷 목록 반환 (없거나 만료되면 None)"""
+        key = extract_video_id(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry["time"] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            try:
+                return [VideoFormat.from_dict(fmt) for fmt in entry["formats"]]
+            except (TypeError, AttributeError):
+                # 이전 형식의 항목은 무시
+                del self._entries[key]
+                return None
+
+    def put(self, url, formats, save=True):
+        """포맷 목록 저장 (가장 오래 사용하지 않은 항목부터 제거)
+
+        save=False면 메모리에만 넣고, 여러 개를 넣은 뒤 save()로 한 번에 파일에 쓴다.
+        """
+        key = extract_video_id(url)
+        with self._lock:
+            self._entries[key] = {"time": time.time(), "formats": [asdict(fmt) for fmt in formats]}
+            self._entries.move_to_end(key)
+            if save:
+                self._save_locked({key})
+
+    def save(self, keep=()):
+        """크기 제한을 적용하고 파일에 씀 (keep의 URL은 제한을 넘어도 지우지 않음)"""
+        with self._lock:
+            self._save_locked({extract_video_id(url) for url in keep})
+
+    def _save_locked(self, keep):
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries:
+                break
+            if key not in keep:
+                del self._entries[key]
+        try:
+            self._save()
+        except OSError:
+            pass
+
+def describe_format_selection(format_str, formats):
+    """선택한 포맷 ID들을 캐시된 포맷 목록과 대조하여 설명 문자열 목록 반환"""
+    rows = {fmt.format_id: fmt.table_row() for fmt in formats}
+    descriptions = []
+    for format_id in re.split(r'[+/,]', format_str):
+        format_id = format_id.strip()
+        if not format_id or not re.match(r'^[0-9A-Za-z_-]+$', format_id) or format_id in ("bv", "ba", "b", "best"):
+            continue
+        row = rows.get(format_id)
+        if row:
+            descriptions.append(f"{format_id}: {row[2]} {row[3]} {row[4]}{row[5]}".rstrip())
+        else:
+            descriptions.append(f"{format_id}: ⚠️ 캐시된 포맷 목록에 없음")
+    return descriptions
+
+# 포맷 문자열 대신 쓰는 프로필 지정 (예: "profile:최고 화질 VR"), 작업 실행 직전에 포맷 ID로 변환
+PROFILE_PREFIX = "profile:"
+
+@dataclass
+class FormatProfile:
+    """자동 포맷 선택 규칙
+
+    조건(코덱, 해상도, VR 투영, 입체음향, 전체 크기)을 만족하는 비디오/오디오 조합 중
+    prefer 기준으로 가장 좋은 것을 고른다. 해상도는 긴 변의 픽셀 수로 비교한다.
+    """
+    name: str
+    video_codecs: list = field(default_factory=list)  # 선호 순서, 예: ["AV1", "VP9"]
+    audio_codecs: list = field(default_factory=list)
+    min_resolution: int = 0
+    max_resolution: int = 0  # 0 = 제한 없음
+    max_fps: float = 0
+    vr: bool = False  # VR 투영(mesh/equirectangular) 필수
+    spatial_audio: bool = False  # 입체음향(ambisonics) 필수
+    max_size: str = ""  # 비디오+오디오 전체 크기, 예: "4GiB"
+    prefer: str = "quality"  # "quality" (최고 화질) 또는 "smallest" (최소 용량)
+
+    @classmethod
+    def from_dict(cls, data):
+        """settings.json 항목에서 프로필 생성 (잘못된 항목이면 ValueError)"""
+        names = {f.name for f in fields(cls)}
+        unknown = set(data) - names
+        if unknown:
+            raise ValueError(f"알 수 없는 프로필 항목: {', '.join(sorted(unknown))}")
+        if not data.get("name"):
+            raise ValueError("프로필 이름이 없습니다.")
+        profile = cls(**data)
+        if profile.prefer not in ("quality", "smallest"):
+            raise ValueError(f"prefer는 quality 또는 smallest여야 합니다: {profile.prefer}")
+        if profile.max_size and not parse_size(profile.max_size):
+            raise ValueError(f"크기를 해석할 수 없습니다: {profile.max_size}")
+        return profile
+
+    @property
+    def size_limit(self):
+        return parse_size(self.max_size) if self.max_size else 0
+
+    def codec_rank(self, codec, preferred, names):
+        """선호 코덱 목록에서의 순위 (목록이 비었으면 0, 맞지 않으면 None)"""
+        if not preferred:
+            return 0
+        display_name = codec_display_name(codec, names).lower()
+        raw_name = codec.split(".")[0].lower()
+        for rank, name in enumerate(preferred):
+            if name.lower() in (display_name, raw_name):
+                return rank
+        return None
+
+    def video_rank(self, fmt):
+        """비디오 조건을 만족하면 코덱 순위, 아니면 None"""
+        longest = max(fmt.width or 0, fmt.height or 0)
+        if self.min_resolution and longest < self.min_resolution:
+            return None
+        if self.max_resolution and longest > self.max_resolution:
+            return None
+        if self.max_fps and (fmt.fps or 0) > self.max_fps:
+            return None
+        if self.vr and not fmt.projection:
+            return None
+        return self.codec_rank(fmt.vcodec, self.video_codecs, VIDEO_CODEC_NAMES)
+
+    def audio_rank(self, fmt):
+        """오디오 조건을 만족하면 코덱 순위, 아니면 None"""
+        if self.spatial_audio and not fmt.spatial_audio:
+            return None
+        return self.codec_rank(fmt.acodec, self.audio_codecs, AUDIO_CODEC_NAMES)
+
+BUILTIN_FORMAT_PROFILES = [
+    FormatProfile("최고 화질 VR", vr=True),
+    FormatProfile("최고 화질 VR (H.264)", video_codecs=["H.264"], vr=True),
+    FormatProfile("AV1 5K 이상 + 입체음향 (최소 용량)", video_codecs=["AV1"], min_resolution=5120,
+                  spatial_audio=True, prefer="smallest"),
+    FormatProfile("호환성 우선 (4K 이하 H.264 + AAC)", video_codecs=["H.264"], audio_codecs=["AAC"],
+                  max_resolution=3840),
+]
+
+def load_format_profiles(settings, log_callback=None):
+    """기본 프로필과 settings.json의 프로필을 이름순 dict로 반환 (잘못된 항목은 건너뜀)"""
+    profiles = {profile.name: profile for profile in BUILTIN_FORMAT_PROFILES}
+    for data in settings.get("format_profiles") or []:
+        try:
+            profile = FormatProfile.from_dict(data)
+        except (TypeError, ValueError) as e:
+            if log_callback:
+                log_callback(f"⚠️ 포맷 프로필 무시: {str(e)}")
+            continue
+        profiles[profile.name] = profile
+    return profiles
+
+@dataclass
+class ProfileMatch:
+    """프로필로 고른 포맷 조합"""
+    profile: FormatProfile
+    video: VideoFormat = None
+    audio: VideoFormat = None  # 비디오에 오디오가 포함되어 있으면 None
+    size: int = None
+
+    @property
+    def format_str(self):
+        return combine_format_ids(
+            self.video.format_id if self.video else None,
+            self.audio.format_id if self.audio else None,
+        )
+
+    def describe(self):
+        parts = [self.format_str]
+        if self.video:
+            parts.append(f"{self.video.resolution} {codec_display_name(self.video.vcodec, VIDEO_CODEC_NAMES)}")
+        if self.audio:
+            parts.append(codec_display_name(self.audio.acodec, AUDIO_CODEC_NAMES))
+        if self.size:
+            parts.append(format_size(self.size))
+        return " | ".join(parts)
+
+def resolve_profiles(profiles, formats):
+    """포맷 목록 한 번으로 여러 프로필의 최적 조합을 계산 ({이름: ProfileMatch 또는 None})
+
+    각 포맷의 점수를 한 번씩만 계산해 두고, 프로필마다 조건을 통과한 비디오/오디오 후보를
+    조합하여 크기 제한 안에서 가장 높은 점수를 고른다.
+    """
+    def video_score(fmt):
+        return ((fmt.width or 0) * (fmt.height or 0), fmt.fps or 0, fmt.tbr or 0)
+
+    def audio_score(fmt):
+        return (bool(fmt.spatial_audio), fmt.audio_channels or 0, fmt.tbr or 0)
+
+    scored_video = [(fmt, video_score(fmt)) for fmt in formats if fmt.has_video]
+    scored_audio = [(fmt, audio_score(fmt)) for fmt in formats if fmt.is_audio_only]
+
+    matches = {}
+    for profile in profiles:
+        videos = []
+        for fmt, score in scored_video:
+            rank = profile.video_rank(fmt)
+            if rank is not None:
+                videos.append((fmt, -rank, score))
+        audios = []
+        for fmt, score in scored_audio:
+            rank = profile.audio_rank(fmt)
+            if rank is not None:
+                audios.append((fmt, -rank, score))
+
+        limit = profile.size_limit
+        best_key = None
+        best = None
+        for video, video_rank, video_key in videos:
+            # 오디오가 포함된 포맷은 그 자체로 후보, 아니면 오디오 포맷과 조합
+            if video.has_audio:
+                rank = profile.audio_rank(video)
+                pairs = [(None, -rank, audio_score(video))] if rank is not None else []
+            else:
+                pairs = audios
+            for audio, audio_rank, audio_key in pairs:
+                sizes = [fmt.size for fmt in (video, audio) if fmt]
+                size = sum(sizes) if all(sizes) else None
+                if limit and (size is None or size > limit):
+                    continue
+                quality = (video_rank, video_key, audio_rank, audio_key)
+                if profile.prefer == "smallest":
+                    key = (-(size if size is not None else float("inf")), quality)
+                else:
+                    key = (quality, -(size or 0))
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best = ProfileMatch(profile, video, audio, size)
+        matches[profile.name] = best
+    return matches
+
+SIZE_ESTIMATE_MARGIN = 1.1  # 일반 선택식 추정에 더하는 여유 (filesize_approx는 비트레이트로 계산한 근사치)
+
+def estimate_format_size(format_str, formats):
+    """포맷 지정의 예상 크기 (포맷 목록이 없거나 크기를 모르면 None)
+
+    '315+338'처럼 포맷 ID로 지정하면 그 포맷들의 크기를 더한다.
+    'bv+ba', 'b' 같은 일반 선택식은 yt-dlp가 고를 수 있는 가장 큰 비디오(와 오디오)의 크기에
+    SIZE_ESTIMATE_MARGIN만큼 여유를 두어 추정한다 (낮은 화질을 고르는 선택식이면 넉넉하게 잡힘).
+    """
+    if not formats:
+        return None
+    if is_exact_format(format_str):
+        by_id = {fmt.format_id: fmt for fmt in formats}
+        sizes = [by_id[format_id].size if format_id in by_id else None for format_id in format_str.split("+")]
+        if not sizes or None in sizes:
+            return None
+        return sum(sizes)
+
+    video_sizes = [fmt.size for fmt in formats if fmt.has_video and fmt.size]
+    audio_sizes = [fmt.size for fmt in formats if fmt.is_audio_only and fmt.size]
+    first = format_str.split("/")[0].strip()
+    if "+" in first:
+        if not video_sizes:
+            return None
+        size = max(video_sizes) + max(audio_sizes, default=0)
+    elif first.startswith(("ba", "bestaudio", "wa", "worstaudio")):
+        size = max(audio_sizes, default=None)
+    else:
+        muxed = [fmt.size for fmt in formats if fmt.has_video and fmt.has_audio and fmt.size]
+        size = max(muxed or video_sizes, default=None)
+    return int(size * SIZE_ESTIMATE_MARGIN) if size else None
+
+def resolve_job_format(job, engine, format_cache, profiles, log_callback=None):
+    """job.format_str가 프로필 지정이면 포맷 ID로 바꿈 (실패하면 False)
+
+    캐시된 포맷 목록이 있으면 그대로 쓰고, 없을 때만 한 번 확인하여 캐시에 저장한다.
+    프로필이 아닌 지정(포맷 ID, bv+ba 등)은 캐시에 포맷 목록이 있을 때만 예상 크기(job.estimated_size)를
+    채우므로, 공간 예약이 의미 있으려면 MetadataPrefetcher로 미리 확인해 두어야 한다.
+    """
+    if not job.format_str.startswith(PROFILE_PREFIX):
+        if job.estimated_size is None and format_cache:
+            job.estimated_size = estimate_format_size(job.format_str, format_cache.get(job.url))
+        return True
+
+    def log(message):
+        if log_callback:
+            log_callback(message)
+
+    name = job.format_str[len(PROFILE_PREFIX):]
+    profile = profiles.get(name)
+    if profile is None:
+        job.error = f"알 수 없는 포맷 프로필: {name}"
+        log(f"❌ {job.error} [#{job.job_id}]")
+        return False
+
+    formats = format_cache.get(job.url) if format_cache else None
+    if formats is None:
+        try:
+            formats = engine.probe(job.url).formats
+        except Exception as e:
+            # ProbeError 외에 yt-dlp 실행 실패(OSError), 잘못된 JSON 등도 작업 실패로 처리
+            job.error = str(e) or type(e).__name__
+            log(f"❌ 포맷 확인 실패 [#{job.job_id}]: {job.error}")
+            return False
+        if format_cache:
+            format_cache.put(job.url, formats)
+
+    match = resolve_profiles([profile], formats)[name]
+    if match is None:
+        job.error = f"프로필 '{name}' 조건에 맞는 포맷이 없습니다."
+        log(f"❌ {job.error} [#{job.job_id}]")
+        return False
+
+    job.format_str = match.format_str
+    job.estimated_size = match.size
+    log(f"🎯 프로필 '{name}' [#{job.job_id}]: {match.describe()}")
+    return True
+
+YTDLP_EXTRACTOR_ARGS = {"youtube": {"player_client": ["android_vr"]}}
+
+class SubprocessEngine:
+    """yt-dlp 실행 파일을 작업마다 실행하는 엔진"""
+    name = "subprocess"
+    display_name = "외부 yt-dlp"
+
+    def probe(self, url):
+        return probe_formats(url)
+
+    def probe_many(self, urls):
+        return probe_formats_many(urls)
+
+    def list_entries(self, url):
+        return iter_ytdlp_json(url, extra_args=("--flat-playlist",))
+
+    def download(self, job, log_callback=None, progress_callback=None):
+        return run_ytdlp_download(job, log_callback, progress_callback)
+
+    def close(self):
+        pass
+
+class YoutubeDLLogger:
+    """yt_dlp 로그를 log_callback으로 전달
+
+    check_abort가 주어지면 메시지마다 호출하여, 진행률 훅이 불리지 않는 정보 추출이나
+    조각 재시도 대기 중에도 중단 요청(JobInterrupted)을 바로 반영한다.
+    """
+
+    def __init__(self, log_callback=None, prefix="", on_warning=None, check_abort=None):
+        self.log_callback = log_callback
+        self.prefix = prefix
+        self.on_warning = on_warning
+        self.check_abort = check_abort
+
+    def debug(self, message):
+        if self.check_abort:
+            self.check_abort()
+        # 진행률/디버그 메시지는 progress_hooks로 처리
+        if message.startswith("[debug]") or message.startswith("[download]"):
+            return
+        self.info(message)
+
+    def info(self, message):
+        if self.check_abort:
+            self.check_abort()
+        if self.log_callback and len(message) < 200:
+            self.log_callback(self.prefix + message)
+
+    def warning(self, message):
+        if self.check_abort:
+            self.check_abort()
+        if self.on_warning:
+            self.on_warning(message)
+        if self.log_callback:
+            self.log_callback(f"{self.prefix}⚠️ {message}")
+
+    def error(self, message):
+        if self.on_warning:
+            self.on_warning(message)
+        if self.log_callback:
+            self.log_callback(f"{self.prefix}❌ {message}")
+
+class YoutubeDLEngine:
+    """yt_dlp 모듈을 프로세스 안에서 직접 사용하는 엔진
+
+    인터프리터 시작과 추출기 import 비용을 한 번만 지불하고,
+    진행률은 progress_hooks로 구조화된 값을 그대로 받는다.
+    """
+    name = "in-process"
+    display_name = "내장 yt_dlp"
+
+    def __init__(self):
+        import yt_dlp  # 무거운 import는 엔진을 만들 때만
+        self.yt_dlp = yt_dlp
+
+    def _options(self, **extra):
+        options = {
+            "quiet": True,
+            "no_warnings": False,
+            "noprogress": True,
+            "extractor_args": YTDLP_EXTRACTOR_ARGS,
+        }
+        if extra.get("concurrent_fragment_downloads"):
+            options["extractor_args"] = {
+                "youtube": dict(YTDLP_EXTRACTOR_ARGS["youtube"], formats=["dashy"]),
+            }
+        options.update(extra)
+        return options
+
+    def probe(self, url):
+        with self.yt_dlp.YoutubeDL(self._options(noplaylist=True)) as ydl:
+            try:
+                info = ydl.extract_info(url, download=False)
+            except self.yt_dlp.utils.DownloadError as e:
+                raise ProbeError(str(e)) from e
+            return ProbeResult.from_info(url, ydl.sanitize_info(info))
+
+    def probe_many(self, urls):
+        """YoutubeDL 하나로 여러 URL을 차례로 확인"""
+        with self.yt_dlp.YoutubeDL(self._options(noplaylist=True)) as ydl:
+            for url in urls:
+                try:
+                    info = ydl.extract_info(url, download=False)
+                except self.yt_dlp.utils.DownloadError as e:
+                    yield url, ProbeError(str(e))
+                    continue
+                yield url, ProbeResult.from_info(url, ydl.sanitize_info(info))
+
+    def list_entries(self, url):
+        """재생목록/채널 항목을 페이지 단위로 받아 오는 대로 반환 (영상 정보는 추출하지 않음)"""
+        options = self._options(extract_flat="in_playlist", lazy_playlist=True)
+        errors = (self.yt_dlp.utils.DownloadError, self.yt_dlp.utils.ExtractorError)
+        with self.yt_dlp.YoutubeDL(options) as ydl:
+            try:
+                info = ydl.extract_info(url, download=False, process=False)
+                if info.get("entries") is None:
+                    yield info
+                    return
+                for entry in info["entries"]:
+                    if entry:
+                        yield entry
+            except errors as e:
+                raise ProbeError(str(e)) from e
+
+    def download(self, job, log_callback=None, progress_callback=None):
+        prefix = f"[#{job.job_id}] "
+
+        def log(message):
+            if log_callback:
+                log_callback(prefix + message)
+
+        last_bytes = {}
+
+        def check_abort():
+            if job.abort_reason:
+                raise JobInterrupted(job.abort_reason)
+
+        def progress_hook(d):
+            check_abort()
+            if d.get("filename") and d["filename"] not in job.files:
+                job.record_file(d["filename"])
+            if d["status"] == "downloading":
+                downloaded = d.get("downloaded_bytes") or 0
+
+                # 받은 만큼 대역폭 예산에서 차감 (초과하면 여기서 대기)
+                delta = downloaded - last_bytes.get(d.get("filename"), 0)
+                last_bytes[d.get("filename")] = downloaded
+                if job.throttle and delta > 0:
+                    job.throttle(delta)
+
+                total = d.get("total_bytes") or d.get("total_bytes_estimate")
+                speed = d.get("speed") or 0
+                eta = d.get("eta")
+
+                job.progress = downloaded / total if total else 0.0
+                job.speed = speed
+                job.eta = f"{int(eta) // 60}:{int(eta) % 60:02d}" if eta is not None else "계산 중"
+                if progress_callback:
+                    progress_callback(job, {
+                        'percent': job.progress,
+                        'speed': format_size(speed) + "/s" if speed else "계산 중",
+                        'speed_bytes': speed,
+                        'eta': job.eta,
+                        'downloaded_bytes': downloaded,
+                        'total_bytes': total,
+                    })
+            elif d["status"] == "finished":
+                log(f"💾 파일명: {d.get('filename')}")
+
+        def postprocessor_hook(d):
+            # 병합 등 후처리 단계 사이에서도 중단 요청 확인 (ffmpeg 실행 중에는 끝날 때까지 기다림)
+            check_abort()
+            if d["status"] == "started" and d.get("postprocessor") == "Merger":
+                log("🔧 영상과 오디오 병합 중...")
+
+        options = self._options(
+            format=job.format_str,
+            outtmpl=os.path.join(job.working_path, job.output_template),
+            continuedl=True,
+            noplaylist=True,
+            concurrent_fragment_downloads=job.connections or 1,
+            logger=YoutubeDLLogger(
+                log_callback, prefix, on_warning=lambda message: note_download_warning(job, message),
+                check_abort=check_abort,
+            ),
+            progress_hooks=[progress_hook],
+            postprocessor_hooks=[postprocessor_hook],
+            post_hooks=[lambda path: job.record_file(path, final=True)],
+        )
+
+        if job.abort_reason:
+            return -1
+        log("🔍 영상 정보 추출 중...")
+        with self.yt_dlp.YoutubeDL(options) as ydl:
+            try:
+                return ydl.download([job.url])
+            except JobInterrupted:
+                return -1
+            except self.yt_dlp.utils.DownloadError:
+                # 오류 내용은 logger로 이미 전달됨
+                return -1 if job.abort_reason else 1
+
+    def close(self):
+        pass
+
+def process_memory():
+    """현재 프로세스의 메모리 사용량 (bytes, 알 수 없으면 None)"""
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+def worker_download(engine, conn, spec):
+    """풀 워커에서 다운로드 하나를 실행하고 진행 상황을 파이프로 전달
+
+    진행률을 보낼 때마다 부모의 응답을 기다리며, 응답에는 중단 요청이 담긴다.
+    부모가 대역폭 예산만큼 응답을 늦추므로 전체 대역폭 제한도 그대로 적용된다.
+    """
+    job = DownloadJob(spec["job_id"], spec["url"], spec["format_str"], spec["download_path"])
+    job.output_template = spec["output_template"]
+    job.connections = spec["connections"]
+
+    received = [0]
+    if spec["throttle"]:
+        job.throttle = lambda nbytes: received.__setitem__(0, received[0] + nbytes)
+
+    record_file = job.record_file
+
+    def record_and_send(path, final=False):
+        record_file(path, final)
+        conn.send(("file", path, final))
+
+    job.record_file = record_and_send
+
+    def on_progress(job, progress):
+        state = {
+            "progress": job.progress, "speed": job.speed, "eta": job.eta,
+            "error_count": job.error_count, "throttled": job.throttled,
+        }
+        conn.send(("progress", state, progress, received[0]))
+        received[0] = 0
+        job.abort_reason = conn.recv()[1]
+
+    returncode = engine.download(
+        job, log_callback=lambda message: conn.send(("log", message)), progress_callback=on_progress
+    )
+    return {
+        "returncode": returncode, "error_count": job.error_count, "throttled": job.throttled,
+        "messages": list(job.messages),
+    }
+
+def extractor_worker_main(conn):
+    """풀 워커 프로세스 (yt_dlp와 추출기를 미리 import해 두고 요청을 차례로 처리)"""
+    if hasattr(os, "setsid"):
+        os.setsid()  # 취소할 때 워커가 띄운 ffmpeg까지 함께 종료할 수 있도록
+    engine = YoutubeDLEngine()
+    list(engine.yt_dlp.extractor.gen_extractor_classes())
+    conn.send(("ready", process_memory()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        op = message[0]
+        if op == "stop":
+            break
+        try:
+            if op == "probe":
+                value = engine.probe(message[1])
+            elif op == "list":
+                for entry in engine.list_entries(message[1]):
+                    conn.send(("entry", entry))
+                value = None
+            elif op == "download":
+                value = worker_download(engine, conn, message[1])
+            else:
+                continue
+        except Exception as e:
+            conn.send(("error", str(e), process_memory()))
+        else:
+            conn.send(("done", value, process_memory()))
+
+class ExtractorWorker:
+    """미리 띄워 둔 yt_dlp 워커 프로세스 하나"""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=extractor_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.last_used = time.monotonic()
+        self.baseline_memory = self.memory = self.recv()[1]
+
+    def send(self, message):
+        self.conn.send(message)
+
+    def recv(self):
+        """다음 메시지 (워커가 종료됐으면 EOFError)"""
+        message = self.conn.recv()
+        if message[0] in ("done", "error"):
+            self.jobs += 1
+            self.memory = message[2]
+            self.last_used = time.monotonic()
+        return message
+
+    @property
+    def memory_growth(self):
+        if self.memory is None or self.baseline_memory is None:
+            return 0
+        return self.memory - self.baseline_memory
+
+    def stop(self):
+        try:
+            self.conn.send(("stop",))
+        except OSError:
+            pass
+        self.process.join(2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+class ExtractorPool:
+    """yt_dlp 워커 프로세스 풀
+
+    요청마다 인터프리터를 새로 띄우고 추출기를 다시 import하는 비용을 없앤다.
+    min_workers개는 미리 띄워 두고, 요청이 몰리면 max_workers까지 늘린 뒤
+    idle_timeout 동안 쓰이지 않은 여분은 종료한다. 작업을 max_jobs번 처리했거나
+    메모리가 max_memory_growth 이상 늘어난 워커는 새 프로세스로 교체한다.
+    """
+
+    def __init__(self, min_workers=1, max_workers=4, max_jobs=50, max_memory_growth=300 * 1024 ** 2,
+                 idle_timeout=120):
+        self.min_workers = min_workers
+        self.max_workers = max(max_workers, min_workers, 1)
+        self.max_jobs = max_jobs
+        self.max_memory_growth = max_memory_growth
+        self.idle_timeout = idle_timeout
+        # Tk/작업 스레드가 있는 프로세스를 fork하지 않도록 모든 플랫폼에서 spawn 사용
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = []
+        self._count = 0  # 시작 중인 워커 포함
+        self._closed = False
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            settings["pool_min_workers"], settings["pool_max_workers"], settings["pool_max_jobs_per_worker"],
+            settings["pool_max_memory_growth_mb"] * 1024 ** 2, settings["pool_idle_timeout"],
+        )
+
+    def start(self):
+        """min_workers개를 백그라운드에서 미리 띄움"""
+        def warm():
+            for _ in range(self.min_workers):
+                with self._lock:
+                    if self._closed or self._count >= self.min_workers:
+                        return
+                    self._count += 1
+                self._add_idle(self._spawn())
+
+        threading.Thread(target=warm, daemon=True).start()
+
+    def _spawn(self):
+        try:
+            return ExtractorWorker(self._context)
+        except Exception:
+            with self._lock:
+                self._count -= 1
+                self._available.notify_all()
+            raise
+
+    def _add_idle(self, worker):
+        with self._lock:
+            if self._closed:
+                self._count -= 1
+                retire = True
+            else:
+                self._idle.append(worker)
+                self._available.notify()
+                retire = False
+        if retire:
+            worker.stop()
+
+    def _reap_idle_locked(self):
+        """오래 쉬고 있는 여분 워커를 목록에서 빼서 반환"""
+        now = time.monotonic()
+        expired = [
+            worker for worker in self._idle
+            if now - worker.last_used > self.idle_timeout
+        ][:max(0, self._count - self.min_workers)]
+        for worker in expired:
+            self._idle.remove(worker)
+            self._count -= 1
+        return expired
+
+    def acquire(self):
+        """쉬고 있는 워커를 꺼내거나, 여유가 있으면 새로 띄움 (모두 사용 중이면 대기)"""
+        with self._lock:
+            expired = self._reap_idle_locked()
+            while True:
+                if self._closed:
+                    raise RuntimeError("워커 풀이 종료되었습니다.")
+                if self._idle:
+                    worker = self._idle.pop()
+                    spawn = False
+                    break
+                if self._count < self.max_workers:
+                    self._count += 1
+                    spawn = True
+                    break
+                self._available.wait()
+        for old in expired:
+            old.stop()
+        return self._spawn() if spawn else worker
+
+    def release(self, worker, healthy=True):
+        """사용이 끝난 워커 반환 (비정상이거나 교체 기준을 넘었으면 종료)"""
+        worn_out = (
+            self.max_jobs and worker.jobs >= self.max_jobs
+            or self.max_memory_growth and worker.memory_growth > self.max_memory_growth
+        )
+        if healthy and not worn_out and worker.process.is_alive():
+            self._add_idle(worker)
+            return
+
+        with self._lock:
+            self._count -= 1
+            self._available.notify()
+        worker.stop()
+        # 죽거나 교체한 워커 대신 min_workers개를 다시 채워 둠
+        self.start()
+
+    @contextlib.contextmanager
+    def worker(self):
+        """with pool.worker() as worker: 요청 하나를 끝까지 주고받는 동안 워커 점유
+
+        블록이 예외나 중간 종료로 끝나면 워커에 남은 응답이 있을 수 있으므로 교체한다.
+        """
+        worker = self.acquire()
+        healthy = False
+        try:
+            yield worker
+            healthy = True
+        finally:
+            self.release(worker, healthy)
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._available.notify_all()
+        for worker in idle:
+            worker.stop()
+
+class PooledEngine:
+    """미리 띄워 둔 yt_dlp 워커 프로세스 풀로 처리하는 엔진
+
+    작업마다 프로세스를 새로 시작하지 않으면서도 GIL과 메모리는 작업 프로세스별로 분리된다.
+    """
+    name = "pooled"
+    display_name = "상주 프로세스 풀"
+
+    def __init__(self, pool=None):
+        if not importlib.util.find_spec("yt_dlp"):
+            raise ImportError("yt_dlp 모듈이 필요합니다.")
+        self.pool = pool or ExtractorPool.from_settings(load_settings())
+        self.pool.start()
+
+    @staticmethod
+    def worker_lost(error):
+        """워커 프로세스가 죽어 주고받기가 끊긴 경우의 ProbeError"""
+        return ProbeError(f"추출 워커 프로세스가 종료되었습니다 ({type(error).__name__}: {error})")
+
+    def probe(self, url):
+        # 쉬는 동안 죽은 워커를 받았을 수 있으므로 새로 띄운 워커로 한 번 더 시도
+        for attempt in range(2):
+            try:
+                with self.pool.worker() as worker:
+                    worker.send(("probe", url))
+                    message = worker.recv()
+                break
+            except (EOFError, OSError) as e:
+                if attempt:
+                    raise self.worker_lost(e) from e
+        if message[0] == "error":
+            raise ProbeError(message[1])
+        return message[1]
+
+    def probe_many(self, urls):
+        """워커 하나를 잡고 여러 URL을 차례로 확인 (워커가 죽으면 남은 URL은 실패로 반환)"""
+        urls = list(urls)
+        done = 0
+        try:
+            with self.pool.worker() as worker:
+                for url in urls:
+                    worker.send(("probe", url))
+                    message = worker.recv()
+                    done += 1
+                    yield url, ProbeError(message[1]) if message[0] == "error" else message[1]
+        except (EOFError, OSError) as e:
+            error = self.worker_lost(e)
+            for url in urls[done:]:
+                yield url, error
+
+    def list_entries(self, url):
+        try:
+            with self.pool.worker() as worker:
+                worker.send(("list", url))
+                while True:
+                    message = worker.recv()
+                    if message[0] == "entry":
+                        yield message[1]
+                    elif message[0] == "error":
+                        raise ProbeError(message[1])
+                    else:
+                        return
+        except (EOFError, OSError) as e:
+            raise self.worker_lost(e) from e
+
+    def download(self, job, log_callback=None, progress_callback=None):
+        spec = {
+            "job_id": job.job_id,
+            "url": job.url,
+            "format_str": job.format_str,
+            "download_path": job.working_path,
+            "output_template": job.output_template,
+            "connections": job.connections,
+            "throttle": job.throttle is not None,
+        }
+        with self.pool.worker() as worker:
+            # 취소/일시 정지하면 워커 프로세스째 종료하고 풀에서 새로 띄움
+            job.process = worker.process
+            try:
+                return self._exchange(worker, job, spec, log_callback, progress_callback)
+            except (EOFError, OSError):
+                return -1 if job.abort_reason else 1
+            finally:
+                job.process = None
+
+    def _exchange(self, worker, job, spec, log_callback, progress_callback):
+        """워커에 다운로드를 요청하고 끝날 때까지 메시지 처리 (종료 코드 반환)"""
+        worker.send(("download", spec))
+        while True:
+            message = worker.recv()
+            kind = message[0]
+            if kind == "log":
+                if log_callback:
+                    log_callback(message[1])
+            elif kind == "file":
+                job.record_file(message[1], final=message[2])
+            elif kind == "progress":
+                state, progress, received = message[1:]
+                for key, value in state.items():
+                    setattr(job, key, value)
+                # 대역폭 예산을 넘었으면 응답을 늦춰 워커의 다운로드를 멈춤
+                if job.throttle and received:
+                    job.throttle(received)
+                if progress_callback:
+                    progress_callback(job, progress)
+                worker.send(("ack", job.abort_reason))
+            elif kind == "done":
+                result = message[1]
+                job.error_count = result["error_count"]
+                job.throttled = result["throttled"]
+                job.messages.extend(result["messages"])
+                return result["returncode"]
+            elif kind == "error":
+                job.messages.append(message[1])
+                if log_callback:
+                    log_callback(f"[#{job.job_id}] ❌ {message[1]}")
+                return 1
+
+    def close(self):
+        self.pool.shutdown()
+
+ENGINES = {
+    "in-process": YoutubeDLEngine,
+    "subprocess": SubprocessEngine,
+    "pooled": PooledEngine,
+}
+
+def preferred_engine_name():
+    """yt_dlp 모듈을 import하지 않고 사용할 엔진 이름 결정"""
+    return "in-process" if importlib.util.find_spec("yt_dlp") else "subprocess"
+
+def make_engine(name="auto", log_callback=None):
+    """다운로드 엔진 생성 (auto: yt_dlp 모듈이 있으면 내장 엔진, 없으면 외부 실행 파일)"""
+    if name == "auto":
+        try:
+            return YoutubeDLEngine()
+        except ImportError:
+            if log_callback:
+                log_callback("ℹ️ yt_dlp 모듈이 없어 외부 yt-dlp 실행 파일을 사용합니다.")
+            return SubprocessEngine()
+    return ENGINES[name]()
+
+# 우선순위 (숫자가 작을수록 먼저 실행), 표시 이름과 대역폭 배분 가중치
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW = 0, 1, 2
+PRIORITY_NAMES = {PRIORITY_HIGH: "높음", PRIORITY_NORMAL: "보통", PRIORITY_LOW: "낮음"}
+PRIORITY_WEIGHTS = {PRIORITY_HIGH: 4.0, PRIORITY_NORMAL: 1.0, PRIORITY_LOW: 0.25}
+
+# 사용자/스케줄러가 중단시킨 경우 (retune은 엔진 안에서 바로 이어받음)
+INTERRUPT_REASONS = ("cancel", "pause", "preempt")
+
+# 속도 분포 구간 상한 (bytes/s)
+SPEED_BUCKETS = tuple(int(mib * 1024 * 1024) for mib in (0.5, 1, 2, 5, 10, 25, 50, 100, 250))
+
+class JobMetrics:
+    """작업 하나의 단계별 소요 시간, 받은 바이트, 속도 분포
+
+    단계: queued(대기열) → extract(정보 추출, 첫 진행률까지) → download → retry_wait → postprocess
+    (후처리 대기 포함, 단계별 시간은 steps). 일시 정지된 시간은 paused로 따로 센다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = time.time()
+        self.phases = {}
+        self.steps = {}
+        self.phase = "queued"
+        self._phase_start = time.monotonic()
+        self.bytes = 0
+        self.peak_speed = 0.0
+        self.speed_sum = 0.0
+        self.speed_histogram = [0] * (len(SPEED_BUCKETS) + 1)
+
+    def enter(self, phase):
+        """현재 단계를 끝내고 phase 시작 (같은 단계면 무시)"""
+        with self._lock:
+            if phase == self.phase:
+                return
+            self._close_phase()
+            self.phase = phase
+
+    def finish(self):
+        with self._lock:
+            self._close_phase()
+            self.phase = None
+
+    def _close_phase(self):
+        now = time.monotonic()
+        if self.phase:
+            self.phases[self.phase] = self.phases.get(self.phase, 0.0) + now - self._phase_start
+        self._phase_start = now
+
+    def observe(self, job, progress):
+        """진행률 갱신마다 호출 (첫 진행률이 오면 추출이 끝나고 다운로드가 시작된 것으로 봄)"""
+        self.enter("download")
+        with self._lock:
+            if progress.get("downloaded_bytes"):
+                self.bytes = max(self.bytes, progress["downloaded_bytes"])
+            if job.speed:
+                self.peak_speed = max(self.peak_speed, job.speed)
+                self.speed_sum += job.speed
+                index = next((i for i, bound in enumerate(SPEED_BUCKETS) if job.speed <= bound), len(SPEED_BUCKETS))
+                self.speed_histogram[index] += 1
+
+    def measure_files(self, paths):
+        """받은 파일 크기로 바이트 수 보정 (외부 yt-dlp는 진행률에 바이트 수가 없음)"""
+        size = 0
+        for path in paths or []:
+            with contextlib.suppress(OSError):
+                size += os.path.getsize(path)
+        with self._lock:
+            self.bytes = max(self.bytes, size)
+
+    @property
+    def average_speed(self):
+        seconds = self.phases.get("download", 0.0)
+        return self.bytes / seconds if seconds > 0 else 0.0
+
+    def describe(self):
+        """로그용 요약 ('추출 1.2초 · 다운로드 30.5초 (25.1MiB/s) · 후처리 4.0초')"""
+        names = [("extract", "추출"), ("download", "다운로드"), ("retry_wait", "재시도 대기"), ("postprocess", "후처리")]
+        parts = []
+        for phase, name in names:
+            if phase in self.phases:
+                text = f"{name} {self.phases[phase]:.1f}초"
+                if phase == "download" and self.bytes:
+                    text += f" ({format_size(self.average_speed)}/s)"
+                parts.append(text)
+        return " · ".join(parts)
+
+class DownloadJob:
+    """다운로드 대기열의 작업 하나"""
+
+    def __init__(self, job_id, url, format_str, download_path, priority=PRIORITY_NORMAL):
+        self.job_id = job_id
+        self.url = url
+        self.format_str = format_str
+        self.download_path = download_path
+        self.output_template = "%(title)s.%(ext)s"
+        self.priority = priority
+        # 예상 크기 (포맷 목록으로 계산, 모르면 None)와 실제로 받는 폴더/최종 저장 폴더 (VolumeManager가 정함)
+        self.estimated_size = None
+        self.work_dir = None
+        self.volume = None
+        self.seq = None  # 같은 우선순위 안에서의 대기열 순서
+
+        # 진행 상태
+        self.state = "대기 중"
+        self.progress = 0.0
+        self.speed = 0.0  # bytes/s
+        self.eta = ""
+        self.returncode = None
+        self.error = None
+
+        # 다운로드 중 생성된 파일 (재개/정리에 사용)
+        self.files = []
+        self.output_path = None
+        self.on_file = None
+        self.journal_id = None
+
+        # 대역폭 배분 (BandwidthScheduler가 설정)
+        self.rate_limit = None
+        self.throttle = None
+
+        # 분할 다운로드 연결 수 (None = 사용 안 함, FragmentTuner가 조절)
+        self.connections = None
+        self.error_count = 0
+        self.throttled = False
+
+        # 최근 경고/오류 메시지 (실패 원인 분류)와 재시도 상태
+        self.messages = deque(maxlen=20)
+        self.attempts = 0
+        self.failure = None
+
+        # 설정되면 엔진이 다운로드를 중단 (.part 파일은 남김)
+        self.abort_reason = None
+        # 실행 중인 외부 프로세스 (취소 시 트리째 종료)와 스트림별 하위 작업
+        self.process = None
+        self.children = []
+
+        # 따로 받은 비디오/오디오 스트림 (후처리에서 병합)과 후처리 결과
+        self.streams = None
+        self.postprocess_results = {}
+
+        # 받는 동안 파일을 뒤따라 읽는 해시 계산 (None = 사용 안 함)과 끝난 파일의 해시 {경로: 결과}
+        self.followers = None
+        self.digests = {}
+
+        # 단계별 시간, 받은 바이트, 속도 분포 (MetricsExporter가 내보냄)
+        self.metrics = JobMetrics()
+
+    @property
+    def weight(self):
+        return PRIORITY_WEIGHTS[self.priority]
+
+    @property
+    def working_path(self):
+        """엔진이 파일을 받는 폴더 (임시 폴더를 쓰지 않으면 저장 경로)"""
+        return self.work_dir or self.download_path
+
+    def abort(self, reason):
+        """다운로드 중단 요청 (실행 중인 프로세스가 있으면 바로 종료)"""
+        self.abort_reason = reason
+        for child in list(self.children):
+            child.abort(reason)
+        process = self.process
+        if process is not None and process.pid:
+            kill_process_tree(process.pid)
+
+    def record_file(self, path, final=False):
+        """다운로드 대상 파일 기록 (final=True면 최종 결과 파일)"""
+        if not path:
+            return
+        if final:
+            self.output_path = path
+        elif path not in self.files:
+            self.files.append(path)
+            if self.output_path is None:
+                self.output_path = path
+        if not final and self.followers is not None and path not in self.followers:
+            self.followers[path] = FileFollower([path + ".part", path])
+        if self.on_file:
+            self.on_file(path)
+
+class DownloadQueue:
+    """우선순위 대기열 + 정해진 수의 워커 스레드로 다운로드 작업을 병렬 처리
+
+    우선순위가 높은 작업이 들어왔는데 워커가 모두 사용 중이면 가장 낮은 우선순위의
+    실행 중인 작업을 중단(preempt)시켜 자리를 비우고, 중단된 작업은 대기열에 되돌려
+    나중에 받은 부분부터 이어받는다.
+    run_job에서 예외가 나면 작업을 오류로 표시하고 on_error(job)를 호출한 뒤 다음 작업을 계속한다.
+    """
+
+    def __init__(self, run_job, max_workers=2, on_error=None):
+        self.run_job = run_job
+        self.on_error = on_error
+        self.max_workers = max_workers
+        self._heap = []  # (priority, seq, job)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._workers = 0
+        self._unfinished = 0
+        self.active_jobs = {}
+        self.paused_jobs = {}
+
+    def submit(self, job):
+        """작업을 대기열에 추가"""
+        with self._lock:
+            job.seq = next(self._seq)
+            self._unfinished += 1
+            heapq.heappush(self._heap, (job.priority, job.seq, job))
+            victim = self._preemption_victim_locked(job)
+            self._changed.notify_all()
+        if victim:
+            victim.abort("preempt")
+        self._spawn_workers()
+
+    def _preemption_victim_locked(self, job):
+        """워커가 모두 사용 중이면 job보다 우선순위가 낮은 실행 중 작업 중 가장 나중 것"""
+        if len(self.active_jobs) < self.max_workers:
+            return None
+        candidates = [
+            active for active in self.active_jobs.values()
+            if active.priority > job.priority and active.abort_reason is None
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda active: (active.priority, active.seq))
+
+    def _remove_pending_locked(self, job_id):
+        for index, (_, _, job) in enumerate(self._heap):
+            if job.job_id == job_id:
+                self._heap.pop(index)
+                heapq.heapify(self._heap)
+                return job
+        return None
+
+    def cancel(self, job_id):
+        """작업 취소 (반환: (작업, 실행 중이었는지), 없으면 (None, False))
+
+        실행 중인 작업은 프로세스를 종료하고 execute_job이 임시 파일을 정리한다.
+        후처리로 넘어간 작업은 대기열에 없으므로 취소되지 않고 (None, False)를 반환한다.
+        """
+        with self._lock:
+            job = self._remove_pending_locked(job_id)
+            if job:
+                self._unfinished -= 1
+                self._changed.notify_all()
+            else:
+                job = self.paused_jobs.pop(job_id, None)
+            running = self.active_jobs.get(job_id) if job is None else None
+        if running:
+            running.abort("cancel")
+            return running, True
+        if job:
+            job.abort_reason = "cancel"
+            job.state = "취소됨"
+        return job, False
+
+    def pause(self, job_id):
+        """작업 일시 정지 (반환: (작업, 실행 중이었는지), 없으면 (None, False))
+
+        실행 중인 작업은 프로세스를 종료하되 .part 파일은 남겨 이어받을 수 있게 한다.
+        """
+        with self._lock:
+            job = self._remove_pending_locked(job_id)
+            if job:
+                self._unfinished -= 1
+                self.paused_jobs[job_id] = job
+                job.abort_reason = "pause"
+                job.state = "일시 정지"
+                self._changed.notify_all()
+                return job, False
+            running = self.active_jobs.get(job_id)
+        if running:
+            running.abort("pause")
+            return running, True
+        return None, False
+
+    def resume(self, job_id):
+        """일시 정지한 작업을 원래 순서대로 대기열에 되돌림"""
+        with self._lock:
+            job = self.paused_jobs.pop(job_id, None)
+            if job is None:
+                return None
+            job.abort_reason = None
+            job.state = "대기 중"
+            self._unfinished += 1
+            heapq.heappush(self._heap, (job.priority, job.seq, job))
+            victim = self._preemption_victim_locked(job)
+            self._changed.notify_all()
+        if victim:
+            victim.abort("preempt")
+        self._spawn_workers()
+        return job
+
+    def stop_all(self, timeout=10):
+        """실행 중인 작업을 모두 일시 정지하고 프로세스가 정리될 때까지 대기 (종료할 때 사용)"""
+        with self._lock:
+            running = list(self.active_jobs.values())
+            self._heap.clear()
+            self._unfinished = len(running)
+        for job in running:
+            job.abort("pause")
+
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self.active_jobs and time.monotonic() < deadline:
+                self._changed.wait(deadline - time.monotonic())
+
+    def set_max_workers(self, max_workers):
+        """동시 실행 워커 수 변경 (줄일 때는 실행 중인 작업이 끝난 뒤 반영)"""
+        with self._lock:
+            self.max_workers = max(1, int(max_workers))
+        self._spawn_workers()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._heap)
+
+    def wait(self):
+        """대기열의 모든 작업이 끝날 때까지 대기 (일시 정지한 작업은 제외)"""
+        with self._lock:
+            while self._unfinished:
+                self._changed.wait()
+
+    def _spawn_workers(self):
+        with self._lock:
+            while self._workers < self.max_workers:
+                self._workers += 1
+                thread = threading.Thread(target=self._worker_loop, daemon=True)
+                thread.start()
+
+    def _worker_loop(self):
+        while True:
+            with self._lock:
+                while not self._heap:
+                    if self._workers > self.max_workers:
+                        break
+                    self._changed.wait(0.5)
+                if self._workers > self.max_workers:
+                    self._workers -= 1
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                # 양보/재개 전의 중단 사유는 여기서 지움 (실행을 시작한 뒤 온 요청은 지우지 않도록)
+                job.abort_reason = None
+                self.active_jobs[job.job_id] = job
+
+            try:
+                self.run_job(job)
+            except Exception as e:
+                # 예외로 워커가 끝나면 남은 작업이 실행되지 않고 wait()가 끝나지 않음
+                job.state = "오류"
+                job.error = str(e) or type(e).__name__
+                if self.on_error:
+                    with contextlib.suppress(Exception):
+                        self.on_error(job)
+            finally:
+                with self._lock:
+                    self.active_jobs.pop(job.job_id, None)
+                    # 후처리로 넘어간 뒤 늦게 온 중단 요청은 무시 (execute_job이 상태를 바꾼 경우만 되돌림)
+                    if job.abort_reason == "preempt" and job.state == "대기 중":
+                        # 원래 순서 그대로 되돌려 우선순위가 높은 작업 다음에 이어받음
+                        heapq.heappush(self._heap, (job.priority, job.seq, job))
+                    elif job.abort_reason == "pause" and job.state == "일시 정지":
+                        self.paused_jobs[job.job_id] = job
+                        self._unfinished -= 1
+                    else:
+                        self._unfinished -= 1
+                    self._changed.notify_all()
+
+    def total_speed(self):
+        """실행 중인 작업들의 속도 합계 (bytes/s)"""
+        with self._lock:
+            return sum(job.speed for job in self.active_jobs.values())
+
+def is_single_video_url(url):
+    """YouTube 영상 하나를 가리키는 URL인지 확인 (재생목록 파라미터가 있어도 영상 하나로 취급)"""
+    return bool(YOUTUBE_ID_RE.match(extract_video_id(url)))
+
+def expand_playlist(engine, url, max_depth=2):
+    """재생목록/채널 URL을 영상 URL로 풀어 찾는 대로 (url, 제목)을 반환
+
+    --flat-playlist로 목록만 받아 오므로 영상 수백 개짜리 채널도 첫 페이지부터 바로 나온다.
+    채널 홈처럼 탭(동영상, Shorts, 라이브)으로 나뉜 경우 max_depth까지 따라 들어간다.
+    """
+    if is_single_video_url(url):
+        yield url, ""
+        return
+
+    seen = set()
+
+    def walk(url, depth):
+        for entry in engine.list_entries(url):
+            entry_url = entry.get("webpage_url") or entry.get("url")
+            if not entry_url:
+                continue
+            nested = entry.get("_type") == "playlist" or entry.get("ie_key") == "YoutubeTab"
+            if nested and depth < max_depth:
+                yield from walk(entry_url, depth + 1)
+                continue
+            key = extract_video_id(entry_url)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield entry_url, entry.get("title") or ""
+
+    yield from walk(url, 0)
+
+class MetadataPrefetcher:
+    """다운로드 전에 포맷 목록을 정해진 수의 스레드로 미리 확인
+
+    FormatCache와 같은 get/put을 제공하여 resolve_job_format에 캐시 대신 넘길 수 있다.
+    확인 중인 영상을 get하면 끝날 때까지 기다리므로 같은 영상을 두 번 확인하지 않는다.
+    """
+
+    def __init__(self, get_engine, format_cache, max_workers=4):
+        self.get_engine = get_engine
+        self.format_cache = format_cache
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="prefetch"
+        )
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def prefetch(self, url):
+        """포맷 목록 확인 예약 (캐시에 있거나 확인 중이면 무시)"""
+        key = extract_video_id(url)
+        with self._lock:
+            if key in self._pending or self.format_cache.get(url) is not None:
+                return
+            self._pending[key] = self._executor.submit(self._probe, url, key)
+
+    def _probe(self, url, key):
+        try:
+            self.format_cache.put(url, self.get_engine().probe(url).formats)
+        except Exception:
+            pass  # 실행 파일 없음/JSON 오류 등도 무시하고 다운로드 작업에서 다시 확인하여 오류를 보고
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def get(self, url):
+        with self._lock:
+            future = self._pending.get(extract_video_id(url))
+        if future:
+            with contextlib.suppress(Exception):
+                future.result()
+        return self.format_cache.get(url)
+
+    def put(self, url, formats):
+        self.format_cache.put(url, formats)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def split_format_streams(format_str):
+    """'비디오+오디오' 형태면 [비디오, 오디오] 반환 (대체 '/' 등 복잡한 선택식은 None)"""
+    depth = 0
+    plus_positions = []
+    for index, char in enumerate(format_str):
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+        elif depth == 0 and char in "/,()":
+            return None
+        elif depth == 0 and char == "+":
+            plus_positions.append(index)
+
+    if len(plus_positions) != 1:
+        return None
+    video, audio = format_str[:plus_positions[0]].strip(), format_str[plus_positions[0] + 1:].strip()
+    if not video or not audio:
+        return None
+    return [video, audio]
+
+STREAMS_DIR = ".vr_streams"
+STREAM_SUFFIX_RE = re.compile(r'\.f[0-9A-Za-z_-]+$')
+
+def merge_output_ext(video_path, audio_path):
+    """yt-dlp와 같은 규칙으로 병합 컨테이너 결정"""
+    video_ext = os.path.splitext(video_path)[1].lower().lstrip(".")
+    audio_ext = os.path.splitext(audio_path)[1].lower().lstrip(".")
+    if video_ext == "mp4" and audio_ext in ("m4a", "mp4"):
+        return "mp4"
+    if video_ext == "webm" and audio_ext == "webm":
+        return "webm"
+    return "mkv"
+
+def merged_output_path(video_path, audio_path, output_dir):
+    """스트림 파일 이름에서 '.f<포맷ID>'를 떼어 최종 파일 경로 생성"""
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    stem = STREAM_SUFFIX_RE.sub("", stem)
+    return os.path.join(output_dir, f"{stem}.{merge_output_ext(video_path, audio_path)}")
+
+def merging_path(output_path):
+    """병합 중에 ffmpeg가 쓰는 임시 파일 (끝나면 output_path로 이름 바꿈)"""
+    return output_path + ".merging" + os.path.splitext(output_path)[1]
+
+def merge_streams(video_path, audio_path, output_path):
+    """ffmpeg로 비디오/오디오 스트림을 재인코딩 없이 병합 (성공 여부, 오류 메시지)"""
+    tmp_path = merging_path(output_path)
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", video_path,
+        "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-c", "copy",
+        tmp_path
+    ]
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+    except FileNotFoundError:
+        return False, "ffmpeg를 찾을 수 없습니다."
+    if result.returncode != 0:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False, result.stderr.strip() or f"ffmpeg 종료 코드 {result.returncode}"
+    os.replace(tmp_path, output_path)
+    return True, None
+
+def download_streams_parallel(job, engine, streams, log_callback=None, progress_callback=None):
+    """비디오와 오디오 스트림을 동시에 받음 (종료 코드 반환)
+
+    스트림은 받는 폴더(임시 폴더 또는 저장 경로) 아래 .vr_streams 폴더에 받고 job.streams에 기록한다.
+    병합은 후처리 단계(merge)에서 하며, 실패하면 스트림을 그대로 남겨
+    다시 시도할 때 이미 받은 스트림은 건너뛰고 병합만 다시 하게 한다.
+    """
+    def log(message):
+        if log_callback:
+            log_callback(message)
+
+    staging_dir = os.path.join(job.working_path, STREAMS_DIR)
+    sub_jobs = []
+    for format_str in streams:
+        sub_job = DownloadJob(job.job_id, job.url, format_str, staging_dir)
+        sub_job.output_template = "%(title)s.f%(format_id)s.%(ext)s"
+        sub_job.connections = job.connections
+        sub_job.throttle = job.throttle
+        sub_job.rate_limit = job.rate_limit / len(streams) if job.rate_limit else None
+        sub_job.on_file = lambda path, sub_job=sub_job: job.record_file(path)
+        sub_jobs.append(sub_job)
+    job.children = sub_jobs
+
+    totals = {}
+
+    def on_sub_progress(sub_job, progress):
+        # 상위 작업의 중단 요청과 바뀐 대역폭 배분량을 스트림 작업에도 전달
+        sub_job.abort_reason = job.abort_reason
+        sub_job.rate_limit = job.rate_limit / len(sub_jobs) if job.rate_limit else None
+        if progress:
+            totals[sub_job.format_str] = (progress.get("downloaded_bytes"), progress.get("total_bytes"), sub_job.progress)
+
+        sizes = list(totals.values())
+        if sizes and all(total for _, total, _ in sizes):
+            job.progress = sum(done or 0 for done, _, _ in sizes) / sum(total for _, total, _ in sizes)
+        else:
+            job.progress = sum(fraction for _, _, fraction in sizes) / len(sub_jobs)
+        job.speed = sum(sub.speed for sub in sub_jobs)
+        job.eta = max((sub.eta for sub in sub_jobs if sub.eta), default="")
+        job.error_count = sum(sub.error_count for sub in sub_jobs)
+        job.throttled = job.throttled or any(sub.throttled for sub in sub_jobs)
+        if progress_callback:
+            progress_callback(job, progress)
+
+    log(f"⏩ 비디오/오디오 동시 다운로드 [#{job.job_id}]: {' + '.join(streams)}")
+    returncodes = [None] * len(sub_jobs)
+
+    def run(index):
+        try:
+            returncodes[index] = engine.download(sub_jobs[index], log_callback, on_sub_progress)
+        except Exception as e:
+            log(f"❌ 스트림 다운로드 오류 [#{job.job_id}] {sub_jobs[index].format_str}: {str(e)}")
+            returncodes[index] = 1
+
+    threads = [threading.Thread(target=run, args=(index,), daemon=True) for index in range(len(sub_jobs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    job.children = []
+    for sub_job in sub_jobs:
+        job.messages.extend(sub_job.messages)
+
+    if job.abort_reason:
+        return -1
+    failed = [code for code in returncodes if code != 0]
+    if failed:
+        return failed[0]
+
+    video_path, audio_path = (sub.output_path for sub in sub_jobs)
+    if not video_path or not audio_path:
+        log(f"❌ 받은 스트림 파일을 찾을 수 없습니다 [#{job.job_id}]")
+        return 1
+
+    job.streams = [video_path, audio_path]
+    return 0
+
+class PostProcessError(Exception):
+    """후처리 단계 실패 (이후 단계는 실행하지 않음)"""
+
+def run_tool(cmd):
+    """외부 도구 실행 (없으면 None)"""
+    try:
+        return subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+    except FileNotFoundError:
+        return None
+
+def ffprobe_json(path):
+    """ffprobe로 컨테이너/스트림 정보 조회 (ffprobe가 없으면 None)"""
+    result = run_tool([
+        "ffprobe", "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams", path
+    ])
+    if result is None:
+        return None
+    if result.returncode != 0:
+        raise PostProcessError(f"ffprobe 실패: {result.stderr.strip()}")
+    return json.loads(result.stdout or "{}")
+
+def has_spherical_metadata(probe):
+    """ffprobe 결과에 구형(360/VR) 투영 정보가 있는지 확인"""
+    for stream in probe.get("streams", []):
+        for side_data in stream.get("side_data_list", []):
+            if side_data.get("side_data_type") == "Spherical Mapping":
+                return True
+    return False
+
+def step_merge(context):
+    """따로 받은 비디오/오디오 스트림 병합"""
+    if not context["streams"]:
+        return context
+    video_path, audio_path = context["streams"]
+    output_path = merged_output_path(video_path, audio_path, context["output_dir"])
+    # ffmpeg가 쓰는 동안 결과를 뒤따라 읽어 해시 (verify 단계에서 다시 읽지 않도록)
+    follower = FileFollower([merging_path(output_path)]) if "verify" in context["steps"] else None
+    ok, error = merge_streams(video_path, audio_path, output_path)
+    if follower:
+        digest = follower.finish(output_path) if ok else follower.cancel()
+        if digest:
+            context["digests"][output_path] = digest
+    if not ok:
+        raise PostProcessError(f"병합 실패 (받은 스트림은 {os.path.dirname(video_path)}에 보관): {error}")
+    context["output_path"] = output_path
+    context["results"]["merge"] = {"output": output_path}
+    return context
+
+def step_vr_metadata(context):
+    """병합 후 VR(구형 투영) 메타데이터가 빠졌으면 원본 스트림 기준으로 다시 기록
+
+    ffmpeg 스트림 복사는 mesh 투영 등 일부 VR 메타데이터를 보존하지 못한다.
+    spatialmedia(Google Spatial Media) 모듈이 설치되어 있을 때만 주입한다.
+    """
+    if not context["streams"]:
+        return context
+    output_probe = ffprobe_json(context["output_path"])
+    source_probe = ffprobe_json(context["streams"][0])
+    if output_probe is None or source_probe is None:
+        context["results"]["vr_metadata"] = {"skipped": "ffprobe 없음"}
+        return context
+    if not has_spherical_metadata(source_probe) or has_spherical_metadata(output_probe):
+        context["results"]["vr_metadata"] = {"status": "ok"}
+        return context
+
+    try:
+        from spatialmedia import metadata_utils
+    except ImportError:
+        context["warnings"].append("VR 메타데이터가 병합 중 빠졌지만 spatialmedia 모듈이 없어 주입하지 못했습니다.")
+        context["results"]["vr_metadata"] = {"status": "missing"}
+        return context
+
+    output_path = context["output_path"]
+    injected_path = output_path + ".injected" + os.path.splitext(output_path)[1]
+    metadata = metadata_utils.Metadata()
+    metadata.video = metadata_utils.generate_spherical_xml()
+    metadata_utils.inject_metadata(output_path, injected_path, metadata, lambda message: None)
+    if not os.path.exists(injected_path):
+        raise PostProcessError("VR 메타데이터 주입 실패")
+    os.replace(injected_path, output_path)
+    # 파일 내용이 바뀌었으므로 병합 중에 구한 해시는 쓸 수 없음
+    context["digests"].pop(output_path, None)
+    context["results"]["vr_metadata"] = {"status": "injected"}
+    return context
+
+def step_probe(context):
+    """결과 파일의 컨테이너/스트림 검사 (길이, 비디오/오디오 스트림 존재)"""
+    probe = ffprobe_json(context["output_path"])
+    if probe is None:
+        context["results"]["probe"] = {"skipped": "ffprobe 없음"}
+        return context
+
+    codec_types = [stream.get("codec_type") for stream in probe.get("streams", [])]
+    duration = float(probe.get("format", {}).get("duration") or 0)
+    if not codec_types:
+        raise PostProcessError("결과 파일에 스트림이 없습니다.")
+    if context["streams"] and not ("video" in codec_types and "audio" in codec_types):
+        raise PostProcessError(f"병합 결과에 비디오/오디오가 모두 있지 않습니다: {codec_types}")
+    if duration <= 0 and "video" in codec_types:
+        raise PostProcessError("결과 파일의 재생 시간을 확인할 수 없습니다.")
+
+    context["results"]["probe"] = {
+        "duration": duration,
+        "streams": codec_types,
+        "size": int(probe.get("format", {}).get("size") or 0),
+    }
+    return context
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """파일 SHA-256 (큰 파일도 조각 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+VERIFY_SUFFIX = ".vrcheck.json"
+
+class ContentHasher:
+    """블록(4MiB)별 SHA-256과 전체 SHA-256을 함께 계산
+
+    내용 해시(content_hash)는 블록 해시들을 이어 붙여 다시 SHA-256한 값이다 (Dropbox content_hash 방식).
+    블록 단위라 쓰는 쪽이 나중에 고쳐 쓴 블록(컨테이너 헤더 등)만 다시 읽어 바로잡을 수 있다.
+    전체 SHA-256은 파일이 앞에서부터 한 번에 쓰였을 때만 유효하다.
+    """
+
+    def __init__(self, block_size=HASH_BLOCK_SIZE):
+        self.block_size = block_size
+        self.size = 0
+        self.blocks = []
+        self._block = hashlib.sha256()
+        self._block_fill = 0
+        self._full = hashlib.sha256()
+
+    def update(self, data):
+        self._full.update(data)
+        view = memoryview(data)
+        while view:
+            take = min(len(view), self.block_size - self._block_fill)
+            self._block.update(view[:take])
+            self._block_fill += take
+            self.size += take
+            view = view[take:]
+            if self._block_fill == self.block_size:
+                self.blocks.append(self._block.digest())
+                self._block = hashlib.sha256()
+                self._block_fill = 0
+
+    def block_digests(self):
+        """마지막(덜 찬) 블록까지 포함한 블록 해시 목록"""
+        return self.blocks + ([self._block.digest()] if self._block_fill else [])
+
+    @property
+    def sha256(self):
+        return self._full.hexdigest()
+
+def content_hash(block_digests):
+    return hashlib.sha256(b"".join(block_digests)).hexdigest()
+
+def hash_file(path):
+    """파일을 처음부터 읽어 해시 (받으면서 구한 해시가 없을 때)"""
+    hasher = ContentHasher()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(hasher.block_size), b""):
+            hasher.update(chunk)
+    return {
+        "size": hasher.size,
+        "block_size": hasher.block_size,
+        "content_hash": content_hash(hasher.block_digests()),
+        "sha256": hasher.sha256,
+        "method": "full_read",
+    }
+
+def open_shared(path):
+    """읽기용으로 열기 (Windows에서도 쓰는 쪽이 그동안 이름을 바꾸거나 지울 수 있게 FILE_SHARE_DELETE로)"""
+    if sys.platform != 'win32':
+        return open(path, "rb")
+    import _winapi
+    import msvcrt
+    share = 0x1 | 0x2 | 0x4  # FILE_SHARE_READ | FILE_SHARE_WRITE | FILE_SHARE_DELETE
+    handle = _winapi.CreateFile(path, _winapi.GENERIC_READ, share, 0, _winapi.OPEN_EXISTING, 0, 0)
+    return open(msvcrt.open_osfhandle(handle, os.O_RDONLY), "rb")
+
+class FileFollower:
+    """쓰이고 있는 파일을 뒤따라 읽으며 해시 (방금 쓴 데이터라 대부분 페이지 캐시에서 읽힘)
+
+    candidates는 같은 파일의 이름 후보 (yt-dlp는 '이름.part'에 쓰고 끝나면 이름을 바꿈)로,
+    있는 것을 읽는다. 파일은 읽을 때만 잠깐 열고, 그동안에도 쓰는 쪽이 이름을 바꿀 수 있게 연다.
+    """
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, candidates):
+        self.candidates = list(candidates)
+        self.hasher = ContentHasher()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="hash-follow")
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with contextlib.suppress(OSError):
+                self._read_available(self._stop)
+            self._stop.wait(self.POLL_INTERVAL)
+
+    def _read_available(self, stop=None):
+        """아직 해시하지 않은 부분을 읽음 (파일이 없으면 False, stop이 설정되면 중간에 멈춤)"""
+        for candidate in self.candidates:
+            try:
+                f = open_shared(candidate)
+            except FileNotFoundError:
+                continue
+            with f:
+                if os.fstat(f.fileno()).st_size < self.hasher.size:
+                    # 처음부터 다시 받는 경우 (이어받기 실패로 .part를 새로 씀)
+                    self.hasher = ContentHasher()
+                f.seek(self.hasher.size)
+                for chunk in iter(lambda: f.read(self.hasher.block_size), b""):
+                    self.hasher.update(chunk)
+                    if stop and stop.is_set():
+                        break
+            return True
+        return False
+
+    def cancel(self):
+        self._stop.set()
+        self._thread.join()
+        return None
+
+    def finish(self, path=None):
+        """쓰기가 끝난 뒤 남은 부분을 읽고 결과 반환 (파일이 없거나 크기가 맞지 않으면 None)
+
+        path는 최종 파일 이름 (기본: 마지막 후보). 첫 블록과 마지막 블록은 다시 읽어 비교하며,
+        쓰는 쪽이 고쳐 쓴 블록은 다시 해시하고 이때는 전체 SHA-256을 버린다.
+        가운데 블록은 받을 때 읽은 내용을 그대로 믿으므로 전체 재검증이 아닌 표본 검사로
+        기록한다 (method "streamed_spot_check").
+        """
+        self.cancel()
+        path = path or self.candidates[-1]
+        self.candidates.append(path)
+        try:
+            if not self._read_available() or os.path.getsize(path) != self.hasher.size:
+                return None
+            blocks = self.hasher.block_digests()
+            rehashed = []
+            with open(path, "rb") as f:
+                for index in sorted({0, len(blocks) - 1}) if blocks else []:
+                    f.seek(index * self.hasher.block_size)
+                    digest = hashlib.sha256(f.read(self.hasher.block_size)).digest()
+                    if digest != blocks[index]:
+                        blocks[index] = digest
+                        rehashed.append(index)
+        except OSError:
+            return None
+        return {
+            "size": self.hasher.size,
+            "block_size": self.hasher.block_size,
+            "content_hash": content_hash(blocks),
+            "sha256": None if rehashed else self.hasher.sha256,
+            "method": "streamed_spot_check",
+            "spot_checked_blocks": sorted({0, len(blocks) - 1}) if blocks else [],
+            "rehashed_blocks": rehashed,
+        }
+
+MP4_EXTENSIONS = (".mp4", ".m4a", ".m4v", ".mov")
+MATROSKA_EXTENSIONS = (".webm", ".mkv", ".mka")
+EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+MATROSKA_SEGMENT_ID = b"\x18\x53\x80\x67"
+
+def read_ebml_vint(f, keep_marker=False):
+    """EBML 가변 길이 정수 (원소 ID는 keep_marker=True로 표시 비트까지 그대로, 크기를 모르면 None)"""
+    first = f.read(1)
+    if not first or not first[0]:
+        raise PostProcessError("EBML 값을 읽을 수 없습니다.")
+    length = 9 - first[0].bit_length()
+    rest = f.read(length - 1)
+    if len(rest) != length - 1:
+        raise PostProcessError("EBML 값이 파일 끝에서 잘렸습니다.")
+    if keep_marker:
+        return first + rest
+    value = first[0] & ((1 << (8 - length)) - 1)
+    for byte in rest:
+        value = (value << 8) | byte
+    return None if value == (1 << (7 * length)) - 1 else value
+
+def check_container(path):
+    """파일 앞/끝의 구조만 읽어 잘린 파일 검사 (MP4 상자, Matroska/WebM 세그먼트 크기)
+
+    전체를 읽지 않으므로 큰 파일도 바로 끝나며, 잘렸거나 형식이 맞지 않으면 PostProcessError.
+    """
+    size = os.path.getsize(path)
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as f:
+        head = f.read(8)
+        if head[4:8] == b"ftyp":
+            types = set()
+            count = 0
+            offset = 0
+            while offset < size:
+                f.seek(offset)
+                header = f.read(8)
+                if len(header) < 8:
+                    raise PostProcessError(f"MP4 상자 헤더가 잘렸습니다 (위치 {offset})")
+                box_size, box_type = struct.unpack(">I4s", header)
+                if box_size == 1:
+                    box_size = struct.unpack(">Q", f.read(8))[0]
+                elif box_size == 0:
+                    box_size = size - offset
+                if box_size < 8 or offset + box_size > size:
+                    raise PostProcessError(
+                        f"MP4 '{box_type.decode('latin-1')}' 상자가 파일 끝을 넘습니다 "
+                        f"({offset + box_size} > {size}, 잘린 파일)"
+                    )
+                types.add(box_type)
+                count += 1
+                offset += box_size
+            if b"moov" not in types or not types & {b"mdat", b"moof"}:
+                raise PostProcessError(f"MP4에 moov/mdat 상자가 없습니다: {sorted(t.decode('latin-1') for t in types)}")
+            return {"format": "mp4", "boxes": count, "fragmented": b"moof" in types}
+
+        if head[:4] == EBML_MAGIC:
+            f.seek(4)
+            f.seek(read_ebml_vint(f), os.SEEK_CUR)
+            if read_ebml_vint(f, keep_marker=True) != MATROSKA_SEGMENT_ID:
+                raise PostProcessError("Matroska 세그먼트가 없습니다.")
+            segment_size = read_ebml_vint(f)
+            end = f.tell() + segment_size if segment_size is not None else None
+            if end is not None and end > size:
+                raise PostProcessError(f"Matroska 세그먼트가 파일 끝을 넘습니다 ({end} > {size}, 잘린 파일)")
+            return {"format": "matroska", "segment_size": segment_size}
+
+    if ext in MP4_EXTENSIONS + MATROSKA_EXTENSIONS:
+        raise PostProcessError(f"{ext} 파일의 헤더가 올바르지 않습니다.")
+    return {"format": None}
+
+def recorded_sha256(path, size):
+    """파일 옆 .vrcheck.json에 기록된 SHA-256 (파일이 그 뒤로 바뀌었거나 기록이 없으면 None)"""
+    record = load_json_file(path + VERIFY_SUFFIX, {})
+    try:
+        if record.get("size") == size and record.get("checked", 0) >= os.path.getmtime(path):
+            return record.get("sha256")
+    except OSError:
+        pass
+    return None
+
+def step_verify(context):
+    """결과 파일 무결성 기록: 받거나 병합하면서 구한 해시(없으면 한 번 읽어서 계산)와 구조 검사
+
+    결과는 파일 옆 '<파일>.vrcheck.json'에 저장하며, 구조 검사가 실패해도 기록한 뒤 실패로 처리한다.
+    """
+    path = context["output_path"]
+    digest = context["digests"].get(path)
+    if not digest or digest["size"] != os.path.getsize(path):
+        digest = hash_file(path)
+
+    record = dict(digest, file=os.path.basename(path), checked=time.time(), probe=context["results"].get("probe"))
+    try:
+        record["container"] = check_container(path)
+    except PostProcessError as e:
+        record["error"] = str(e)
+        raise
+    finally:
+        save_json_file(path + VERIFY_SUFFIX, record)
+
+    context["results"]["verify"] = {
+        "size": digest["size"],
+        "content_hash": digest["content_hash"],
+        "sha256": digest["sha256"],
+        "method": digest["method"],
+        "container": record["container"]["format"],
+    }
+    return context
+
+def step_hash(context):
+    """결과 파일 크기와 SHA-256 기록 (다운로드 기록에 저장)
+
+    verify 단계의 결과가 있으면 그대로 쓴다. 병합처럼 헤더를 나중에 고쳐 써서 받으면서 구한
+    전체 SHA-256이 없으면 큰 파일을 다시 읽지 않고 내용 해시만 남긴다.
+    """
+    path = context["output_path"]
+    verified = context["results"].get("verify")
+    if verified:
+        context["results"]["hash"] = {
+            "size": verified["size"], "sha256": verified["sha256"], "content_hash": verified["content_hash"],
+        }
+    else:
+        context["results"]["hash"] = {"size": os.path.getsize(path), "sha256": file_sha256(path)}
+    return context
+
+def step_cleanup(context):
+    """병합이 끝난 스트림 파일 삭제"""
+    for path in context["streams"] or []:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return context
+
+def move_file_atomic(source, destination):
+    """파일을 destination으로 옮김 (다른 디스크면 같은 폴더의 임시 파일로 복사한 뒤 이름 바꾸기)
+
+    중간에 실패하거나 종료돼도 destination에는 완성된 파일만 나타난다.
+    """
+    try:
+        os.replace(source, destination)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    tmp_path = destination + ".moving"
+    try:
+        with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, 4 * 1024 * 1024)
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copystat(source, tmp_path)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    os.remove(source)
+
+def step_move(context):
+    """임시 폴더에서 완성된 결과 파일을 저장 폴더로 옮김 (final_dir이 있을 때만 execute_job이 추가)"""
+    source = context["output_path"]
+    if not context["final_dir"] or not source:
+        return context
+    os.makedirs(context["final_dir"], exist_ok=True)
+    destination = os.path.join(context["final_dir"], os.path.basename(source))
+    move_file_atomic(source, destination)
+    if os.path.exists(source + VERIFY_SUFFIX):
+        move_file_atomic(source + VERIFY_SUFFIX, destination + VERIFY_SUFFIX)
+    context["output_path"] = destination
+    context["results"]["move"] = {"output": destination}
+    return context
+
+# 후처리 단계 (settings.json의 postprocess_steps에서 이름으로 선택)
+POSTPROCESS_STEPS = {
+    "merge": step_merge,
+    "vr_metadata": step_vr_metadata,
+    "probe": step_probe,
+    "verify": step_verify,
+    "hash": step_hash,
+    "cleanup": step_cleanup,
+    "move": step_move,
+}
+
+def run_postprocess(context):
+    """후처리 단계들을 차례로 실행 (후처리 프로세스에서 호출되므로 모듈 최상위 함수)"""
+    for name in context["steps"]:
+        start = time.monotonic()
+        try:
+            context = POSTPROCESS_STEPS[name](context)
+        except Exception as e:
+            context["error"] = f"{name}: {str(e)}"
+            break
+        finally:
+            context["timings"][name] = time.monotonic() - start
+    return context
+
+class PostProcessPipeline:
+    """다운로드와 분리된 후처리 단계 (별도 프로세스 풀)
+
+    다운로드 워커는 받은 파일을 넘기고 바로 다음 작업을 시작하며,
+    CPU를 쓰는 병합/검사는 이 풀에서 동시에 진행된다.
+    """
+
+    def __init__(self, max_workers=2, steps=None):
+        self.max_workers = max_workers
+        self.steps = list(steps or DEFAULT_SETTINGS["postprocess_steps"])
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._idle = threading.Condition(self._lock)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings["postprocess_workers"], settings["postprocess_steps"])
+
+    def submit(self, context, on_done):
+        """후처리 요청, 끝나면 워커 스레드에서 on_done(context) 호출"""
+        with self._lock:
+            if self._executor is None:
+                # fork는 다른 스레드가 yt-dlp를 띄우는 중인 파이프까지 물려받아 Popen이 끝나지 않게 할 수 있음
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            future = self._executor.submit(run_postprocess, context)
+            self._pending.add(future)
+
+        def done(future):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = dict(context, error=f"후처리 프로세스 오류: {str(e)}")
+            try:
+                on_done(result)
+            finally:
+                with self._lock:
+                    self._pending.discard(future)
+                    self._idle.notify_all()
+
+        future.add_done_callback(done)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def wait(self):
+        """진행 중인 후처리가 모두 끝날 때까지 대기"""
+        with self._lock:
+            while self._pending:
+                self._idle.wait()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# 실패 원인 분류 (위에서부터 먼저 맞는 것)
+FAILURE_PATTERNS = [
+    ("disk_space", ("No space left on device", "Errno 28", "There is not enough space on the disk")),
+    ("format_missing", ("Requested format is not available", "requested format not available")),
+    ("unavailable", (
+        "Video unavailable", "Private video", "This video is private", "has been removed", "HTTP Error 404",
+        "members-only", "This video is not available", "account associated with this video has been terminated",
+        "This live event will begin", "Premieres in",
+    )),
+    ("throttled", THROTTLE_MARKERS + ("rate-limit", "rate limit", "Sign in to confirm you")),
+    ("transient", (
+        "timed out", "Connection reset", "Connection refused", "Connection aborted", "Remote end closed",
+        "Temporary failure in name resolution", "Network is unreachable", "IncompleteRead", "HTTP Error 5",
+        "Unable to download", "urlopen error", "Got error",
+    )),
+]
+
+FAILURE_NAMES = {
+    "throttled": "속도 제한",
+    "transient": "일시적 네트워크 오류",
+    "unavailable": "볼 수 없는 영상",
+    "format_missing": "포맷 없음",
+    "disk_space": "저장 공간 부족",
+    "unknown": "알 수 없는 오류",
+}
+
+def classify_failure(messages):
+    """yt-dlp 경고/오류 메시지로 실패 원인 분류"""
+    text = "\n".join(messages)
+    for failure, markers in FAILURE_PATTERNS:
+        if any(marker.lower() in text.lower() for marker in markers):
+            return failure
+    return "unknown"
+
+class RetryController:
+    """실패 원인별 재시도와 전체 동시 다운로드 수 조절
+
+    일시적 오류와 속도 제한은 지터를 준 지수 백오프로 다시 시도하고, 볼 수 없는 영상이나
+    없는 포맷은 바로 실패 처리한다. 속도 제한이 감지되면 동시 다운로드 수를 절반으로 줄이고,
+    RECOVERY_INTERVAL 동안 다시 감지되지 않으면 성공할 때마다 하나씩 원래 값까지 늘린다.
+    """
+
+    # 원인: (최대 재시도 횟수, 첫 대기 시간(초))
+    POLICIES = {
+        "throttled": (5, 30.0),
+        "transient": (3, 5.0),
+    }
+    MAX_DELAY = 600.0
+    RECOVERY_INTERVAL = 60.0
+    MIN_CHANGE_INTERVAL = 10.0  # 동시에 실패한 작업들이 한꺼번에 여러 번 줄이지 않도록
+
+    def __init__(self, download_queue, target_workers=None):
+        self.queue = download_queue
+        self.target = target_workers or download_queue.max_workers
+        self._lock = threading.Lock()
+        self._last_throttle = None
+        self._last_change = 0.0
+
+    def set_target(self, max_workers):
+        """사용자가 정한 동시 다운로드 수 (속도 제한 중이면 줄인 값을 유지)"""
+        with self._lock:
+            self.target = max_workers
+            if self._last_throttle is None or self.queue.max_workers > max_workers:
+                self.queue.set_max_workers(max_workers)
+
+    @property
+    def reduced(self):
+        return self.queue.max_workers < self.target
+
+    def retry_delay(self, job, failure):
+        """다시 시도하기 전 대기 시간 (재시도하지 않으면 None)"""
+        max_retries, base = self.POLICIES.get(failure, (0, 0.0))
+        if job.attempts >= max_retries:
+            return None
+        delay = min(self.MAX_DELAY, base * 2 ** job.attempts)
+        return random.uniform(delay / 2, delay)
+
+    def on_throttled(self, log_callback=None):
+        now = time.monotonic()
+        with self._lock:
+            self._last_throttle = now
+            current = self.queue.max_workers
+            if current <= 1 or now - self._last_change < self.MIN_CHANGE_INTERVAL:
+                return
+            self._last_change = now
+            self.queue.set_max_workers(max(1, current // 2))
+        if log_callback:
+            log_callback(f"🐢 속도 제한 감지 - 동시 다운로드 수 {current} → {self.queue.max_workers}")
+
+    def on_success(self, log_callback=None):
+        now = time.monotonic()
+        with self._lock:
+            if not self.reduced or self._last_throttle is None:
+                return
+            if now - self._last_throttle < self.RECOVERY_INTERVAL or now - self._last_change < self.RECOVERY_INTERVAL:
+                return
+            self._last_change = now
+            self.queue.set_max_workers(self.queue.max_workers + 1)
+        if log_callback:
+            log_callback(f"🐇 속도 제한 해제 - 동시 다운로드 수 {self.queue.max_workers}/{self.target}")
+
+def wait_unless_aborted(job, delay):
+    """delay초 대기 (중간에 중단 요청이 오면 바로 반환, 중단되었으면 True)"""
+    deadline = time.monotonic() + delay
+    while not job.abort_reason:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(0.5, remaining))
+    return True
+
+def remove_partial_files(job):
+    """취소한 작업의 임시 파일 삭제 (.part/.ytdl/조각 파일, 병합 전 스트림)"""
+    for path in job.files:
+        candidates = [path + ".part", path + ".ytdl"] + glob.glob(glob.escape(path) + ".part-Frag*")
+        # 스트림 폴더의 파일은 병합 전 중간 결과이므로 함께 삭제
+        if os.path.basename(os.path.dirname(path)) == STREAMS_DIR:
+            candidates.append(path)
+        for candidate in candidates:
+            try:
+                os.remove(candidate)
+            except OSError:
+                pass
+
+def postprocess_context(job, steps):
+    """후처리 프로세스로 넘길 작업 정보 (pickle 가능한 dict)"""
+    # 임시 폴더에서 받았으면 다른 단계가 끝난 뒤 저장 폴더로 옮김
+    final_dir = job.volume if job.volume and job.volume != job.working_path else None
+    if final_dir and "move" not in steps:
+        steps = list(steps) + ["move"]
+    return {
+        "job_id": job.job_id,
+        "output_path": job.output_path,
+        "output_dir": job.working_path,
+        "final_dir": final_dir,
+        "streams": job.streams,
+        "digests": dict(job.digests),
+        "steps": steps,
+        "results": {},
+        "warnings": [],
+        "timings": {},
+        "error": None,
+    }
+
+# 작업 최종 상태 → 측정값의 status 라벨
+METRIC_STATUSES = {"완료": "done", "취소됨": "cancelled"}
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.exporter.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class MetricsExporter:
+    """끝난 작업의 측정값을 JSON Lines와 Prometheus 텍스트 형식으로 내보냄
+
+    작업마다 한 줄씩 jsonl_path에 추가하고 (max_bytes를 넘으면 .1로 돌려 씀),
+    누적 집계는 prometheus_path에 통째로 다시 쓰거나 port의 /metrics로 제공한다.
+    """
+
+    PREFIX = "vr_downloader"
+
+    def __init__(self, jsonl_path=None, prometheus_path=None, port=0, host="127.0.0.1",
+                 max_bytes=50 * 1024 * 1024, log_callback=None):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.max_bytes = max_bytes
+        self.log_callback = log_callback
+        self._lock = threading.Lock()
+        self.jobs = {}  # status: 작업 수
+        self.failures = {}  # 실패 원인: 작업 수
+        self.bytes_total = 0
+        self.phase_seconds = {}  # 단계: [합계, 작업 수]
+        self.step_seconds = {}
+        self.speed_histogram = [0] * (len(SPEED_BUCKETS) + 1)
+        self.speed_sum = 0.0
+        self.server = None
+        if port:
+            self.server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+            self.server.daemon_threads = True
+            self.server.exporter = self
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def from_settings(cls, settings, log_callback=None):
+        try:
+            return cls(
+                jsonl_path=settings["metrics_jsonl"] or None,
+                prometheus_path=settings["metrics_prometheus_file"] or None,
+                port=settings["metrics_port"],
+                host=settings["metrics_host"],
+                log_callback=log_callback,
+            )
+        except OSError as e:
+            if log_callback:
+                log_callback(f"⚠️ 측정값 HTTP 포트를 열 수 없습니다: {str(e)}")
+            return cls(settings["metrics_jsonl"] or None, settings["metrics_prometheus_file"] or None,
+                       log_callback=log_callback)
+
+    def record(self, job, engine_name=None):
+        """끝난(완료/실패/취소) 작업 하나를 기록"""
+        metrics = job.metrics
+        metrics.finish()
+        status = METRIC_STATUSES.get(job.state, "failed")
+        entry = {
+            "time": round(time.time(), 3),
+            "job": job.job_id,
+            "url": job.url,
+            "video_id": extract_video_id(job.url),
+            "format": job.format_str,
+            "engine": engine_name,
+            "status": status,
+            "failure": job.failure if status == "failed" else None,
+            "error": job.error,
+            "attempts": job.attempts,
+            "connections": job.connections,
+            "output": job.output_path,
+            "bytes": metrics.bytes,
+            "average_speed": round(metrics.average_speed, 1),
+            "peak_speed": round(metrics.peak_speed, 1),
+            "phases": {name: round(seconds, 3) for name, seconds in metrics.phases.items()},
+            "steps": {name: round(seconds, 3) for name, seconds in metrics.steps.items()},
+            "total_seconds": round(time.time() - metrics.created, 3),
+            "speed_histogram": {
+                "buckets": list(SPEED_BUCKETS),
+                "counts": list(metrics.speed_histogram),
+            },
+        }
+
+        with self._lock:
+            self.jobs[status] = self.jobs.get(status, 0) + 1
+            if entry["failure"] or status == "failed":
+                reason = entry["failure"] or "unknown"
+                self.failures[reason] = self.failures.get(reason, 0) + 1
+            self.bytes_total += metrics.bytes
+            for table, values in ((self.phase_seconds, metrics.phases), (self.step_seconds, metrics.steps)):
+                for name, seconds in values.items():
+                    total = table.setdefault(name, [0.0, 0])
+                    total[0] += seconds
+                    total[1] += 1
+            for index, count in enumerate(metrics.speed_histogram):
+                self.speed_histogram[index] += count
+            self.speed_sum += metrics.speed_sum
+
+            try:
+                if self.jsonl_path:
+                    self._append_jsonl(entry)
+                if self.prometheus_path:
+                    self._write_prometheus()
+            except OSError as e:
+                if self.log_callback:
+                    self.log_callback(f"⚠️ 측정값 저장 실패: {str(e)}")
+        return entry
+
+    def _append_jsonl(self, entry):
+        os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+        if os.path.exists(self.jsonl_path) and os.path.getsize(self.jsonl_path) >= self.max_bytes:
+            os.replace(self.jsonl_path, self.jsonl_path + ".1")
+        with open(self.jsonl_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _write_prometheus(self):
+        # 수집기가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        os.makedirs(os.path.dirname(os.path.abspath(self.prometheus_path)), exist_ok=True)
+        tmp_path = self.prometheus_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self._render())
+        os.replace(tmp_path, self.prometheus_path)
+
+    def render_prometheus(self):
+        with self._lock:
+            return self._render()
+
+    def _render(self):
+        prefix = self.PREFIX
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f"{prefix}_{name}{suffix}{{{label_text}}} {value}" if label_text
+                             else f"{prefix}_{name}{suffix} {value}")
+
+        metric("jobs_total", "counter", "끝난 작업 수",
+               [("", {"status": status}, count) for status, count in sorted(self.jobs.items())])
+        metric("failures_total", "counter", "실패 원인별 작업 수",
+               [("", {"reason": reason}, count) for reason, count in sorted(self.failures.items())])
+        metric("downloaded_bytes_total", "counter", "받은 바이트 수", [("", {}, self.bytes_total)])
+        for name, table, label, help_text in (
+            ("phase_seconds", self.phase_seconds, "phase", "단계별 소요 시간 (queued/extract/download/retry_wait/postprocess)"),
+            ("postprocess_step_seconds", self.step_seconds, "step", "후처리 단계별 소요 시간"),
+        ):
+            samples = []
+            for key, (total, count) in sorted(table.items()):
+                samples.append(("_sum", {label: key}, round(total, 3)))
+                samples.append(("_count", {label: key}, count))
+            metric(name, "summary", help_text, samples)
+
+        samples = []
+        cumulative = 0
+        for bound, count in zip(list(SPEED_BUCKETS) + ["+Inf"], self.speed_histogram):
+            cumulative += count
+            samples.append(("_bucket", {"le": bound}, cumulative))
+        samples.append(("_sum", {}, round(self.speed_sum, 1)))
+        samples.append(("_count", {}, cumulative))
+        metric("speed_bytes_per_second", "histogram", "진행률 갱신마다 기록한 다운로드 속도", samples)
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+def finish_cancelled_job(job, engine_name, log_callback=None, journal=None, metrics=None, volumes=None,
+                         on_finished=None):
+    """취소된 작업 마무리: 임시 파일 삭제, 상태/작업 기록 갱신, 지표 기록, on_finished 호출
+
+    실행 중에 취소되면 execute_job이, 대기 중이거나 일시 정지된 작업을 취소하면 호출한 쪽이 부른다.
+    """
+    remove_partial_files(job)
+    job.state = "취소됨"
+    job.error = "사용자 취소"
+    job.speed = 0
+    if log_callback:
+        log_callback(f"🛑 다운로드 취소 [#{job.job_id}] (임시 파일 삭제)")
+    if volumes:
+        volumes.release(job)
+    job.metrics.finish()
+    if metrics:
+        metrics.record(job, engine_name)
+    if journal:
+        journal.set_state(job, "cancelled", job.error)
+    if on_finished:
+        on_finished(job)
+
+def execute_job(job, engine, log_callback=None, progress_callback=None, journal=None, bandwidth=None, tuner=None,
+                pipeline=None, on_finished=None, archive=None, retry=None, metrics=None, volumes=None):
+    """작업 하나를 엔진으로 실행하고 job.state를 갱신 (다운로드 성공 여부 반환)
+
+    journal이 주어지면 상태와 파일 위치를 기록하여 중단 후 재개할 수 있게 한다.
+    bandwidth가 주어지면 전체 대역폭 예산을 다른 작업들과 나눠 쓴다.
+    tuner가 주어지면 분할 다운로드 연결 수를 측정값에 따라 조절한다.
+    pipeline이 주어지면 후처리를 그 풀에 넘기고 바로 반환하며, 아니면 여기서 실행한다.
+    작업이 후처리까지 모두 끝나면 on_finished(job)가 호출된다.
+    archive가 주어지면 완료된 파일을 다운로드 기록에 남긴다.
+    retry(RetryController)가 주어지면 실패 원인에 따라 다시 시도하고 동시 다운로드 수를 조절한다.
+    단계별 시간은 job.metrics에 쌓이며, metrics(MetricsExporter)가 주어지면 끝난 작업을 기록한다.
+    volumes(VolumeManager)가 주어지면 받기 전에 저장 폴더를 정하고 예상 크기만큼 공간을 예약한다.
+    """
+    def log(message):
+        if log_callback:
+            log_callback(message)
+
+    if journal:
+        job.on_file = lambda path: journal.update(job)
+        journal.set_state(job, "running")
+
+    if bandwidth:
+        bandwidth.register(job)
+
+    job.state = "다운로드 중"
+    job.metrics.enter("extract")
+    log(f"⬇️ 다운로드 시작 [#{job.job_id}]: {job.url}")
+    if progress_callback:
+        progress_callback(job, None)
+
+    if tuner:
+        job.connections = tuner.start(job)
+        log(f"🔀 분할 다운로드 [#{job.job_id}]: 연결 {job.connections}개")
+
+    def on_progress(job, progress):
+        if progress:
+            job.metrics.observe(job, progress)
+        if bandwidth:
+            # 시간대 제한이 바뀌었으면 job.rate_limit을 갱신 (외부 yt-dlp는 새 배분량으로 다시 시작)
+            bandwidth.refresh()
+        if tuner:
+            tuner.observe(job)
+        if progress_callback:
+            progress_callback(job, progress)
+
+    streams = split_format_streams(job.format_str)
+    if job.abort_reason == "retune":
+        # 지난 실행에서 남은 내부 재시작 사유만 지움 (취소/일시 정지/양보 요청은 아래에서 처리)
+        job.abort_reason = None
+    steps = pipeline.steps if pipeline else DEFAULT_SETTINGS["postprocess_steps"]
+    if "verify" in steps and "+" not in job.format_str:
+        # 받는 파일이 그대로 결과 파일일 때만 뒤따라 읽으며 해시 (후처리에서 큰 파일을 다시 읽지 않도록)
+        # 비디오+오디오는 병합 결과가 새 파일이므로 merge 단계에서 병합하면서 해시한다
+        job.followers = {}
+
+    try:
+        # 포맷 확인 중에 취소/일시 정지/양보 요청이 왔으면 받지 않고 바로 정리
+        if job.abort_reason in INTERRUPT_REASONS:
+            reserved = False
+        # 공간이 모자라면 받기 시작하기 전에 실패 (다 받은 뒤 디스크가 차서 버리는 일이 없도록)
+        else:
+            reserved = volumes.reserve(job, log_callback) if volumes else True
+        while reserved:
+            if streams:
+                job.returncode = download_streams_parallel(job, engine, streams, log_callback, on_progress)
+            else:
+                job.returncode = engine.download(job, log_callback=log_callback, progress_callback=on_progress)
+
+            # 연결 수를 바꾸기 위해 중단한 경우 받은 부분부터 이어받기
+            if job.abort_reason == "retune":
+                job.abort_reason = None
+                log(f"🔀 연결 수 조정 [#{job.job_id}]: {job.connections}개로 이어받기")
+                continue
+
+            if retry and job.throttled:
+                retry.on_throttled(log_callback)
+            if job.returncode == 0 or job.abort_reason in INTERRUPT_REASONS:
+                break
+
+            job.failure = classify_failure(job.messages)
+            delay = retry.retry_delay(job, job.failure) if retry else None
+            if delay is None:
+                break
+
+            # 받은 부분은 남겨 두고 잠시 뒤 이어받기
+            job.attempts += 1
+            job.state = "재시도 대기"
+            log(f"🔁 {FAILURE_NAMES[job.failure]} [#{job.job_id}] - {delay:.0f}초 후 다시 시도 ({job.attempts}회)")
+            if progress_callback:
+                progress_callback(job, None)
+            job.metrics.enter("retry_wait")
+            if wait_unless_aborted(job, delay):
+                break
+            job.metrics.enter("extract")
+            job.state = "다운로드 중"
+            job.messages.clear()
+            job.throttled = False
+
+        if job.abort_reason in INTERRUPT_REASONS:
+            pass
+        elif not reserved:
+            job.state = "실패"
+        elif job.returncode != 0:
+            job.state = "실패"
+            job.failure = job.failure or classify_failure(job.messages)
+            job.error = f"{FAILURE_NAMES[job.failure]} (종료 코드 {job.returncode})"
+        elif retry:
+            retry.on_success(log_callback)
+
+    except Exception as e:
+        job.state = "오류"
+        job.error = str(e)
+        log(f"❌ 예외 발생 [#{job.job_id}]: {str(e)}")
+    finally:
+        job.speed = 0
+        job.metrics.measure_files(job.streams or job.files)
+        if tuner:
+            tuner.finish(job)
+        if bandwidth:
+            bandwidth.unregister(job)
+        followers, job.followers = job.followers or {}, None
+        for path, follower in followers.items():
+            done = job.state == "다운로드 중" and job.returncode == 0 and not job.abort_reason
+            digest = follower.finish(path) if done else follower.cancel()
+            if digest:
+                job.digests[path] = digest
+
+    def report():
+        if volumes:
+            volumes.release(job)
+        job.metrics.finish()
+        if metrics:
+            metrics.record(job, engine.name)
+
+    def finish():
+        report()
+        if job.state == "완료":
+            job.progress = 1.0
+            log(f"\n✅ 다운로드 완료! [#{job.job_id}]")
+            log(f"📊 [#{job.job_id}] {job.metrics.describe()}")
+        elif job.returncode not in (None, 0):
+            log(f"\n❌ 다운로드 실패 [#{job.job_id}] (코드: {job.returncode})")
+        elif job.failure == "disk_space":
+            log(f"\n❌ 다운로드하지 않음 [#{job.job_id}]: {job.error}")
+        else:
+            log(f"\n❌ 후처리 실패 [#{job.job_id}]: {job.error}")
+        if journal:
+            journal.set_state(job, "done" if job.state == "완료" else "failed", job.error)
+        if on_finished:
+            on_finished(job)
+
+    if job.abort_reason == "cancel":
+        finish_cancelled_job(job, engine.name, log_callback, journal, metrics, volumes, on_finished)
+        return False
+
+    if job.abort_reason in ("pause", "preempt"):
+        # .part 파일은 남겨 두고 다시 실행할 때 이어받음 (공간은 다시 실행할 때 다시 예약)
+        if volumes:
+            volumes.release(job)
+        job.metrics.enter("paused" if job.abort_reason == "pause" else "queued")
+        if job.abort_reason == "pause":
+            job.state = "일시 정지"
+            log(f"⏸️ 일시 정지 [#{job.job_id}]")
+        else:
+            job.state = "대기 중"
+            log(f"⏬ 우선순위가 높은 작업에 자리를 양보 [#{job.job_id}] (나중에 이어받기)")
+        if journal:
+            journal.set_state(job, "paused" if job.abort_reason == "pause" else "queued")
+        if progress_callback:
+            progress_callback(job, None)
+        return False
+
+    if job.state != "다운로드 중":
+        finish()
+        return False
+
+    def on_postprocessed(context):
+        job.postprocess_results = context["results"]
+        job.metrics.steps = context["timings"]
+        for warning in context["warnings"]:
+            log(f"⚠️ [#{job.job_id}] {warning}")
+        verified = context["results"].get("verify")
+        if verified:
+            how = "받으면서 계산, 앞/끝 블록만 재확인" if verified["method"] == "streamed_spot_check" else "파일을 다시 읽어 계산"
+            log(f"🔒 무결성 기록 [#{job.job_id}]: {verified['content_hash'][:16]}… ({how})")
+        if context["error"]:
+            job.state = "실패"
+            job.error = context["error"]
+        else:
+            job.state = "완료"
+            if context["output_path"]:
+                job.record_file(context["output_path"], final=True)
+            if archive and job.output_path:
+                try:
+                    archive.add_job(job)
+                except (OSError, sqlite3.Error) as e:
+                    log(f"⚠️ 다운로드 기록 저장 실패 [#{job.job_id}]: {str(e)}")
+        finish()
+
+    job.state = "후처리 중"
+    job.metrics.enter("postprocess")
+    if progress_callback:
+        progress_callback(job, None)
+    if journal:
+        journal.set_state(job, "postprocessing")
+
+    context = postprocess_context(job, steps)
+    if pipeline:
+        log(f"🔧 후처리 대기열로 전달 [#{job.job_id}]")
+        pipeline.submit(context, on_postprocessed)
+    else:
+        on_postprocessed(run_postprocess(context))
+    return True
+
+class JobJournal:
+    """다운로드 폴더에 저장되는 작업 기록 (SQLite)
+
+    작업마다 URL, 포맷, 저장 경로, 상태, 임시(.part) 파일 위치를 남겨
+    프로그램이 종료되거나 비정상 종료돼도 다음 실행에서 이어받을 수 있게 한다.
+    """
+
+    FILENAME = ".vr_downloader_jobs.sqlite3"
+    UNFINISHED_STATES = ("queued", "running", "paused", "postprocessing")
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, self.FILENAME)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    format TEXT NOT NULL,
+                    output_dir TEXT NOT NULL,
+                    output_path TEXT,
+                    part_files TEXT NOT NULL DEFAULT '[]',
+                    state TEXT NOT NULL,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)")
+
+    def add(self, job):
+        """새 작업을 queued 상태로 기록 (이미 기록된 작업이면 queued로 되돌림)"""
+        if job.journal_id is not None:
+            self.set_state(job, "queued")
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (url, format, output_dir, state, created, updated) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job.url, job.format_str, job.download_path, now, now),
+            )
+            job.journal_id = cursor.lastrowid
+
+    def update(self, job):
+        """출력 파일/임시 파일 위치 갱신"""
+        if job.journal_id is None:
+            return
+        part_files = [path + ".part" for path in job.files]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET output_path = ?, part_files = ?, updated = ? WHERE id = ?",
+                (job.output_path, json.dumps(part_files, ensure_ascii=False), time.time(), job.journal_id),
+            )
+
+    def set_state(self, job, state, error=None):
+        if job.journal_id is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated = ? WHERE id = ?",
+                (state, error, time.time(), job.journal_id),
+            )
+
+    def unfinished(self):
+        """완료되지 않은 작업 목록 (queued/running/paused/postprocessing 상태로 남은 것)"""
+        placeholders = ", ".join("?" for _ in self.UNFINISHED_STATES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE state IN ({placeholders}) ORDER BY id",
+                self.UNFINISHED_STATES,
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def discard(self, journal_ids):
+        """재개하지 않기로 한 작업 표시"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE jobs SET state = 'discarded', updated = ? WHERE id = ?",
+                [(time.time(), journal_id) for journal_id in journal_ids],
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+def open_journal(directory):
+    """다운로드 폴더별 작업 기록 (폴더마다 하나만 열어서 공유)"""
+    key = os.path.normcase(os.path.abspath(directory))
+    with _journals_lock:
+        if key not in _journals:
+            _journals[key] = JobJournal(directory)
+        return _journals[key]
+
+def job_from_journal(row, job_id):
+    """작업 기록 행에서 재개할 DownloadJob 생성"""
+    job = DownloadJob(job_id, row["url"], row["format"], row["output_dir"])
+    job.journal_id = row["id"]
+    job.output_path = row["output_path"]
+    return job
+
+def is_exact_format(format_str):
+    """'315+338'처럼 포맷 ID만으로 된 지정인지 확인 (bv+ba, 프로필 등 일반 지정이면 False)"""
+    format_ids = format_str.split("+")
+    return all(
+        re.match(r'^[0-9A-Za-z_-]+$', format_id) and format_id not in ("bv", "ba", "b")
+        and not format_id.startswith(("best", "worst"))
+        for format_id in format_ids
+    )
+
+MEDIA_EXTENSIONS = (".mp4", ".webm", ".mkv", ".m4a", ".mov")
+# yt-dlp 기본 파일명 "제목 [영상ID].확장자"에서 ID 추출
+FILENAME_ID_RE = re.compile(r'\[([A-Za-z0-9_-]{11})\]\.[0-9A-Za-z]+$')
+
+class DownloadArchive:
+    """받은 영상 기록 (SQLite, 영상 ID + 포맷 ID 인덱스)
+
+    다운로드 대기열에 넣기 전에 조회하여 이미 받은 영상은 yt-dlp를 실행하지 않고 건너뛴다.
+    기록된 파일이 지워졌거나 크기가 달라졌으면 기록을 지우고 다시 받는다.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(APP_DIR, "archive.sqlite3")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT NOT NULL,
+                    format_id TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    size INTEGER,
+                    sha256 TEXT,
+                    added REAL NOT NULL,
+                    PRIMARY KEY (video_id, format_id)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS videos_path ON videos (path)")
+
+    def add(self, video_id, format_id, path, size=None, sha256=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, format_id, path, size, sha256, added) VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, format_id, os.path.abspath(path), size, sha256, time.time()),
+            )
+
+    def add_job(self, job):
+        """완료된 작업 기록 (크기/해시는 후처리 결과 사용)"""
+        hashed = job.postprocess_results.get("hash") or {}
+        size = hashed.get("size")
+        if size is None and os.path.exists(job.output_path):
+            size = os.path.getsize(job.output_path)
+        self.add(extract_video_id(job.url), job.format_str, job.output_path, size, hashed.get("sha256"))
+
+    def find(self, url, format_str=""):
+        """이미 받은 파일 기록 반환 (없거나 파일이 사라졌으면 None)
+
+        포맷 ID를 지정한 경우 같은 포맷 ID로 받은 것만, 일반 지정(bv+ba, 프로필 등)이면
+        같은 영상이 어떤 포맷으로든 있으면 해당한다.
+        """
+        video_id = extract_video_id(url)
+        with self._lock:
+            if format_str and is_exact_format(format_str):
+                rows = self._conn.execute(
+                    "SELECT * FROM videos WHERE video_id = ? AND format_id = ?", (video_id, format_str)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM videos WHERE video_id = ?", (video_id,)).fetchall()
+
+        for row in rows:
+            if self.is_present(row):
+                return row
+            self.remove(row["video_id"], row["format_id"])
+        return None
+
+    @staticmethod
+    def is_present(row):
+        try:
+            size = os.path.getsize(row["path"])
+        except OSError:
+            return False
+        return row["size"] is None or size == row["size"]
+
+    def remove(self, video_id, format_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM videos WHERE video_id = ? AND format_id = ?", (video_id, format_id))
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+    def prune(self, log_callback=None):
+        """파일이 사라졌거나 크기가 달라진 기록 삭제 (삭제한 수 반환)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT video_id, format_id, path, size FROM videos").fetchall()
+        stale = [(row["video_id"], row["format_id"]) for row in rows if not self.is_present(row)]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM videos WHERE video_id = ? AND format_id = ?", stale)
+        if log_callback and stale:
+            log_callback(f"🗑️ 사라진 파일 기록 {len(stale)}개 삭제")
+        return len(stale)
+
+    def scan(self, directory, compute_hash=True, log_callback=None):
+        """기존 폴더를 훑어 기록에 추가 (추가한 수 반환)
+
+        작업 기록(.vr_downloader_jobs.sqlite3)의 완료된 작업과,
+        yt-dlp 기본 파일명(제목 [영상ID].확장자)으로 받은 파일을 인식한다.
+        """
+        def log(message):
+            if log_callback:
+                log_callback(message)
+
+        found = {}
+        journal_path = os.path.join(directory, JobJournal.FILENAME)
+        if os.path.exists(journal_path):
+            conn = sqlite3.connect(journal_path)
+            try:
+                for url, format_str, output_path in conn.execute(
+                    "SELECT url, format, output_path FROM jobs WHERE state = 'done' AND output_path IS NOT NULL"
+                ):
+                    found[os.path.abspath(output_path)] = (extract_video_id(url), format_str)
+            finally:
+                conn.close()
+
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [name for name in dirs if name != STREAMS_DIR]
+            for name in files:
+                match = FILENAME_ID_RE.search(name)
+                path = os.path.abspath(os.path.join(root, name))
+                if match and name.lower().endswith(MEDIA_EXTENSIONS) and path not in found:
+                    found[path] = (match.group(1), "")
+
+        added = 0
+        for path, (video_id, format_id) in found.items():
+            if not os.path.exists(path):
+                continue
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, sha256 FROM videos WHERE video_id = ? AND format_id = ? AND path = ?",
+                    (video_id, format_id, path),
+                ).fetchone()
+            size = os.path.getsize(path)
+            if row and row["size"] == size and (row["sha256"] or not compute_hash):
+                continue
+            sha256 = (recorded_sha256(path, size) or file_sha256(path)) if compute_hash else None
+            self.add(video_id, format_id, path, size, sha256)
+            added += 1
+            log(f"📚 기록 추가: {video_id} → {path}")
+        return added
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def parse_clock(text):
+    """'HH:MM'을 자정 이후 분으로 변환"""
+    hours, minutes = text.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def mbps_to_bytes(mbps):
+    """Mbps(메가비트/초)를 bytes/s로 변환 (0 이하면 None = 무제한)"""
+    return mbps * 1000 * 1000 / 8 if mbps and mbps > 0 else None
+
+class BandwidthScheduler:
+    """동시에 실행 중인 다운로드들이 나눠 쓰는 전체 대역폭 예산
+
+    작업마다 토큰 버킷을 두고, 채워지는 속도는 전체 제한을 등록된(끝나지 않은) 모든 작업의
+    가중치 비율로 나눈 값이다. 작업이 시작/종료되면 각 작업의 job.rate_limit도 다시 계산하여
+    throttle을 부르지 않는 외부 yt-dlp도 새 배분량으로 다시 시작하게 한다.
+    전체 제한을 set_limit으로 바꾸면 바로, 시간대 제한이 바뀌면 진행률 갱신마다 부르는
+    refresh에서 (REFRESH_INTERVAL마다 확인) 실행 중인 작업들에 다시 배분된다.
+    """
+
+    REFRESH_INTERVAL = 5.0
+
+    def __init__(self, limit=None, schedule=(), burst_seconds=1.0):
+        self.limit = limit  # bytes/s, None = 무제한
+        self.schedule = [
+            (parse_clock(entry["start"]), parse_clock(entry["end"]), mbps_to_bytes(entry.get("limit_mbps")))
+            for entry in schedule
+        ]
+        self.burst_seconds = burst_seconds
+        self._lock = threading.Lock()
+        self._buckets = {}  # job_id -> {"job", "weight", "tokens", "last"}
+        self._applied_limit = limit  # 마지막으로 배분할 때의 전체 제한
+        self._checked = time.monotonic()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(mbps_to_bytes(settings["bandwidth_limit_mbps"]), settings["bandwidth_schedule"])
+
+    def current_limit(self, now=None):
+        """현재 시각에 적용되는 전체 제한 (bytes/s, None = 무제한)"""
+        local = time.localtime(now)
+        minutes = local.tm_hour * 60 + local.tm_min
+        for start, end, limit in self.schedule:
+            in_window = start <= minutes < end if start <= end else (minutes >= start or minutes < end)
+            if in_window:
+                return limit
+        return self.limit
+
+    def register(self, job):
+        now = time.monotonic()
+        with self._lock:
+            self._buckets[job.job_id] = {"job": job, "weight": job.weight, "tokens": 0.0, "last": now}
+            self._rebalance_locked()
+        job.throttle = lambda nbytes: self.throttle(job, nbytes)
+
+    def unregister(self, job):
+        with self._lock:
+            self._buckets.pop(job.job_id, None)
+            self._rebalance_locked()
+        job.throttle = None
+
+    def set_limit(self, limit):
+        """전체 제한 변경 (bytes/s, None = 무제한) 후 실행 중인 작업들에 바로 다시 배분"""
+        with self._lock:
+            self.limit = limit
+            self._rebalance_locked()
+
+    def refresh(self):
+        """시간대 제한이 바뀌었으면 실행 중인 작업들에 다시 배분 (진행률 갱신마다 호출해도 됨)"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked < self.REFRESH_INTERVAL:
+                return
+            self._checked = now
+            if self.current_limit() != self._applied_limit:
+                self._rebalance_locked()
+
+    def _rebalance_locked(self):
+        """등록된 작업마다 job.rate_limit을 현재 배분량으로 갱신"""
+        self._applied_limit = self.current_limit()
+        for job_id, bucket in self._buckets.items():
+            bucket["job"].rate_limit = self._share_locked(job_id)
+
+    def _share_locked(self, job_id):
+        limit = self.current_limit()
+        if not limit:
+            return None
+        total = sum(other["weight"] for other in self._buckets.values())
+        return limit * self._buckets[job_id]["weight"] / total
+
+    def share(self, job):
+        """작업 하나에 현재 배분되는 속도 (bytes/s, None = 무제한)"""
+        with self._lock:
+            if job.job_id not in self._buckets:
+                return None
+            return self._share_locked(job.job_id)
+
+    def throttle(self, job, nbytes):
+        """nbytes를 받은 뒤 호출, 배분량을 넘었으면 그만큼 대기"""
+        with self._lock:
+            bucket = self._buckets.get(job.job_id)
+            if bucket is None:
+                return
+            now = time.monotonic()
+            rate = self._share_locked(job.job_id)
+            if rate is None:
+                bucket["tokens"] = 0.0
+                bucket["last"] = now
+                return
+
+            bucket["tokens"] = min(rate * self.burst_seconds, bucket["tokens"] + (now - bucket["last"]) * rate)
+            bucket["last"] = now
+            bucket["tokens"] -= nbytes
+            wait = -bucket["tokens"] / rate if bucket["tokens"] < 0 else 0
+
+        if wait > 0:
+            time.sleep(min(wait, 5.0))
+
+class VolumeManager:
+    """저장 폴더(디스크)별 여유 공간을 확인하고 작업마다 필요한 공간을 예약
+
+    작업을 받기 전에 예상 크기만큼 공간을 예약하고, 선택한 저장 경로와 output_volumes 중
+    예약분을 뺀 여유 공간이 가장 많은 곳에 배정한다. 같은 디스크의 폴더들은 여유 공간을 함께 센다.
+    scratch_dir이 있으면 받기/병합은 그곳에서 하고 완성된 파일만 후처리 move 단계에서 옮긴다.
+    공간이 모자라면 다른 작업이 끝날 때까지 기다리고, 기다릴 작업이 없으면 받기 전에 실패시킨다.
+    """
+
+    WAIT_INTERVAL = 0.5
+
+    def __init__(self, volumes=(), scratch_dir=None, min_free=0):
+        self.volumes = [os.path.abspath(os.path.expanduser(volume)) for volume in volumes]
+        self.scratch_dir = os.path.abspath(os.path.expanduser(scratch_dir)) if scratch_dir else None
+        self.min_free = min_free
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._reservations = {}  # job_id -> {"job", "needs": {장치: 바이트}, "work_device"}
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings["output_volumes"], settings["scratch_dir"] or None, int(parse_size(settings["min_free_space"])))
+
+    def candidates(self, job):
+        """job을 배정할 수 있는 저장 폴더 (이어받는 작업은 받던 파일이 있는 폴더를 먼저)"""
+        volumes = []
+        for volume in [os.path.abspath(job.download_path)] + self.volumes:
+            if os.path.normcase(volume) not in (os.path.normcase(v) for v in volumes):
+                volumes.append(volume)
+        if job.output_path and not self.scratch_dir:
+            folder = os.path.normcase(os.path.dirname(os.path.abspath(job.output_path)))
+            volumes.sort(key=lambda volume: not folder.startswith(os.path.normcase(volume)))
+        return volumes
+
+    def requirements(self, job, volume):
+        """volume에 배정할 때 디스크별로 필요한 바이트 ({장치: 바이트}, 받는 폴더의 장치)"""
+        size = job.estimated_size or 0
+        # 따로 받은 스트림을 병합하는 동안에는 스트림과 결과 파일이 함께 있음
+        work_size = size * 2 if split_format_streams(job.format_str) else size
+        work_device = os.stat(self.scratch_dir or volume).st_dev
+        needs = {work_device: work_size}
+        final_device = os.stat(volume).st_dev
+        needs[final_device] = max(needs.get(final_device, 0), size)
+        return needs, work_device
+
+    @staticmethod
+    def written(job):
+        """작업이 이미 디스크에 쓴 바이트 (예약분 중 이미 여유 공간에서 빠진 부분)"""
+        size = 0
+        for path in job.files:
+            for candidate in (path, path + ".part"):
+                with contextlib.suppress(OSError):
+                    size += os.path.getsize(candidate)
+        return size
+
+    def _available_locked(self, device, path):
+        """device의 여유 공간에서 남겨 둘 공간과 다른 작업이 아직 쓰지 않은 예약분을 뺀 값"""
+        free = shutil.disk_usage(path).free - self.min_free
+        for reservation in self._reservations.values():
+            reserved = reservation["needs"].get(device, 0)
+            if device == reservation["work_device"]:
+                reserved = max(0, reserved - self.written(reservation["job"]))
+            free -= reserved
+        return free
+
+    def _choose_locked(self, job):
+        """공간이 충분한 저장 폴더 중 여유가 가장 많은 곳 ((폴더, 필요량, 받는 장치) 또는 None, 부족 설명)"""
+        best = None
+        shortage = None
+        for index, volume in enumerate(self.candidates(job)):
+            try:
+                os.makedirs(volume, exist_ok=True)
+                if self.scratch_dir:
+                    os.makedirs(self.scratch_dir, exist_ok=True)
+                needs, work_device = self.requirements(job, volume)
+                paths = {work_device: self.scratch_dir or volume, os.stat(volume).st_dev: volume}
+                spare = min(self._available_locked(device, paths[device]) - needs[device] for device in needs)
+            except OSError as e:
+                shortage = shortage or f"{volume}: {str(e)}"
+                continue
+            if spare < 0:
+                shortage = shortage or f"{volume}: {format_size(-spare)} 부족"
+                continue
+            # 이어받는 작업은 받던 폴더에 공간이 있으면 그대로 사용
+            if index == 0 and job.output_path and not self.scratch_dir:
+                return (volume, needs, work_device), None
+            if best is None or spare > best[0]:
+                best = (spare, (volume, needs, work_device))
+        return (best[1] if best else None), shortage
+
+    def reserve(self, job, log_callback=None):
+        """job에 저장 폴더를 배정하고 공간 예약 (공간이 모자라 실패하거나 중단되면 False)
+
+        실패하면 job.failure/job.error를 채운다. 이미 예약한 작업이면 예약을 새로 계산한다.
+        """
+        def log(message):
+            if log_callback:
+                log_callback(message)
+
+        waiting = False
+        with self._lock:
+            self._reservations.pop(job.job_id, None)
+            while True:
+                choice, shortage = self._choose_locked(job)
+                if choice:
+                    volume, needs, work_device = choice
+                    self._reservations[job.job_id] = {"job": job, "needs": needs, "work_device": work_device}
+                    break
+                if job.abort_reason:
+                    return False
+                if not self._reservations:
+                    # 기다려도 공간을 돌려줄 작업이 없음
+                    job.failure = "disk_space"
+                    job.error = f"저장 공간 부족 ({shortage})"
+                    return False
+                if not waiting:
+                    waiting = True
+                    log(f"💾 저장 공간 대기 [#{job.job_id}]: {shortage} - 진행 중인 작업이 끝나면 다시 확인")
+                self._released.wait(self.WAIT_INTERVAL)
+
+        job.volume = volume
+        job.work_dir = self.scratch_dir or volume
+        if job.estimated_size:
+            where = volume if not self.scratch_dir else f"{self.scratch_dir} → {volume}"
+            log(f"💾 공간 예약 [#{job.job_id}]: {format_size(max(needs.values()))} ({where})")
+        elif len(self.candidates(job)) > 1 or self.scratch_dir:
+            log(f"💾 저장 위치 [#{job.job_id}]: {volume} (예상 크기를 몰라 여유 공간만 확인)")
+        return True
+
+    def release(self, job):
+        """작업이 끝나거나 멈추면 예약 해제 (기다리는 작업이 다시 확인)"""
+        with self._lock:
+            if self._reservations.pop(job.job_id, None) is not None:
+                self._released.notify_all()
+
+class FragmentTuner:
+    """분할 다운로드 연결 수를 작업별로 자동 조절
+
+    일정 구간(WINDOW)마다 평균 속도와 조각 오류를 측정한다.
+    - 오류/스로틀링이 많으면 연결 수를 절반으로 줄이고 그 값을 상한으로 기억한다.
+    - 연결을 늘렸을 때 속도가 충분히(10% 이상) 올랐으면 계속 늘린다.
+    - 더 이상 오르지 않거나 대역폭 배분량에 도달했으면 유지한다.
+    yt-dlp는 연결 수를 다운로드 시작 시에만 정하므로, 변경은 중단 후 .part에서
+    이어받는 방식으로 적용한다. 호스트별로 찾은 값은 다음 작업의 시작값이 된다.
+    """
+
+    WINDOW = 15.0
+    MIN_RESTART_INTERVAL = 45.0
+    MAX_RETUNES = 4
+    ERROR_THRESHOLD = 3
+    STEP = 2
+
+    def __init__(self, start_connections=4, max_connections=16):
+        self.start_connections = start_connections
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._learned = {}  # host -> 연결 수
+        self._jobs = {}
+
+    @staticmethod
+    def _host(job):
+        return urlparse(job.url).netloc.lower()
+
+    def start(self, job):
+        """작업의 시작 연결 수"""
+        with self._lock:
+            connections = self._learned.get(self._host(job), self.start_connections)
+            self._jobs[job.job_id] = {
+                "window_start": time.monotonic(),
+                "bytes": 0.0,
+                "last_time": time.monotonic(),
+                "errors": job.error_count,
+                "throttled": job.throttled,  # job.throttled는 재시도 경로가 지우므로 따로 기억
+                "speeds": {},  # 연결 수 -> 평균 속도
+                "previous": None,
+                "ceiling": self.max_connections,
+                "settled": False,
+                "last_restart": time.monotonic(),
+                "retunes": 0,
+            }
+        return min(connections, self.max_connections)
+
+    def observe(self, job):
+        """진행률 갱신마다 호출, 구간이 끝나면 연결 수 조정 여부 결정"""
+        with self._lock:
+            state = self._jobs.get(job.job_id)
+            if state is None:
+                return
+            now = time.monotonic()
+            state["bytes"] += job.speed * (now - state["last_time"])
+            state["last_time"] = now
+
+            elapsed = now - state["window_start"]
+            if elapsed < self.WINDOW:
+                return
+
+            average = state["bytes"] / elapsed
+            errors = job.error_count - state["errors"]
+            # 이번 구간에 새로 스로틀링이 감지됐을 때만 반응 (계속되면 오류 수로 잡힘)
+            throttled = job.throttled and not state["throttled"]
+            state["window_start"] = now
+            state["bytes"] = 0.0
+            state["errors"] = job.error_count
+            state["throttled"] = job.throttled
+
+            target = self._decide(job, state, average, errors, throttled)
+            if (
+                target != job.connections
+                and job.progress < 0.8  # 거의 끝났으면 재시작하지 않음
+                and state["retunes"] < self.MAX_RETUNES
+                and now - state["last_restart"] >= self.MIN_RESTART_INTERVAL
+                and job.abort_reason is None  # 취소/일시 정지 요청을 덮어쓰지 않음
+            ):
+                state["previous"] = job.connections
+                state["last_restart"] = now
+                state["retunes"] += 1
+                job.connections = target
+                job.abort_reason = "retune"
+
+    def _decide(self, job, state, average, errors, throttled):
+        connections = job.connections
+        state["speeds"][connections] = average
+
+        # 오류가 많거나 스로틀링 → 절반으로 줄이고 상한 기억
+        if throttled or errors >= self.ERROR_THRESHOLD:
+            state["ceiling"] = max(1, connections - 1)
+            state["settled"] = False
+            return max(1, connections // 2)
+
+        if state["settled"]:
+            return connections
+
+        # 대역폭 배분량에 이미 도달했으면 연결을 늘려도 소용없음
+        if job.rate_limit and average >= job.rate_limit * 0.9:
+            state["settled"] = True
+            return connections
+
+        previous = state["previous"]
+        if previous is not None and average < state["speeds"].get(previous, 0) * 1.1:
+            # 늘려도 빨라지지 않음 → 가장 빨랐던 값에서 멈춤
+            state["settled"] = True
+            return max(state["speeds"], key=state["speeds"].get)
+
+        if connections + self.STEP <= state["ceiling"]:
+            return connections + self.STEP
+
+        state["settled"] = True
+        return connections
+
+    def finish(self, job):
+        """작업 종료 시 가장 빨랐던 연결 수를 호스트별로 기억"""
+        with self._lock:
+            state = self._jobs.pop(job.job_id, None)
+            if state and state["speeds"]:
+                best = max(state["speeds"], key=state["speeds"].get)
+                self._learned[self._host(job)] = min(best, state["ceiling"])
+
+def combine_format_ids(video_id, audio_id):
+    """선택한 비디오/오디오 포맷 ID로 yt-dlp 포맷 문자열 생성"""
+    if video_id and audio_id:
+        return f"{video_id}+{audio_id}"
+    return video_id or audio_id or ""
+
+class LogHistory:
+    """최근 로그 N줄만 메모리에 두고 전체 기록은 회전 로그 파일에 저장"""
+
+    def __init__(self, log_dir=None, max_lines=1000, max_bytes=5 * 1024 * 1024, backup_count=5):
+        self.log_dir = log_dir or os.path.join(APP_DIR, "logs")
+        self.path = os.path.join(self.log_dir, "vr_downloader.log")
+        self.recent = deque(maxlen=max_lines)
+        self.backup_count = backup_count
+
+        self._logger = logging.getLogger(f"vr_downloader.history.{id(self)}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                self.path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+        except OSError:
+            # 파일에 쓸 수 없으면 메모리 버퍼만 사용
+            pass
+
+    def append(self, lines):
+        """로그 줄들을 링 버퍼와 파일에 기록"""
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        stamped = []
+        for line in lines:
+            for part in line.split("\n"):
+                self.recent.append(part)
+                stamped.append(f"{timestamp} {part}")
+        if stamped:
+            self._logger.info("\n".join(stamped))
+
+    def _files_newest_first(self):
+        paths = [self.path] + [f"{self.path}.{i}" for i in range(1, self.backup_count + 1)]
+        return [path for path in paths if os.path.exists(path)]
+
+    def iter_lines_reversed(self):
+        """파일 기록을 최신 줄부터 거꾸로 순회"""
+        for path in self._files_newest_first():
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+            yield from reversed(lines)
+
+    def page(self, page_index, page_size=500):
+        """최신 기록부터 page_index번째 페이지 (오래된 줄이 위로 오도록 정렬)"""
+        start = page_index * page_size
+        lines = []
+        for i, line in enumerate(self.iter_lines_reversed()):
+            if i < start:
+                continue
+            if len(lines) >= page_size:
+                break
+            lines.append(line)
+        return list(reversed(lines))
+
+    def search(self, query, limit=500):
+        """기록에서 query가 포함된 최근 줄 검색 (대소문자 무시)"""
+        query = query.lower()
+        matches = []
+        for line in self.iter_lines_reversed():
+            if query in line.lower():
+                matches.append(line)
+                if len(matches) >= limit:
+                    break
+        return list(reversed(matches))
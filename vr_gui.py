@@ -0,0 +1,1047 @@
+import time
+import customtkinter as ctk
+import threading
+import os
+from tkinter import messagebox, ttk
+import sys
+import importlib.util
+from collections import deque
+
+from vr_core import (
+    ENGINES,
+    FORMAT_SORT_KEYS,
+    INTERRUPT_REASONS,
+    PRIORITY_NAMES,
+    PRIORITY_NORMAL,
+    PROFILE_PREFIX,
+    RESOLUTION_FILTERS,
+    BandwidthScheduler,
+    DownloadArchive,
+    DownloadJob,
+    DownloadQueue,
+    FormatCache,
+    FragmentTuner,
+    JobJournal,
+    LogHistory,
+    MetadataPrefetcher,
+    MetricsExporter,
+    PostProcessPipeline,
+    ProbeError,
+    RetryController,
+    VolumeManager,
+    check_dependencies,
+    combine_format_ids,
+    describe_format_selection,
+    execute_job,
+    expand_playlist,
+    find_ytdlp,
+    finish_cancelled_job,
+    format_matches,
+    format_size,
+    is_single_video_url,
+    job_from_journal,
+    load_dependency_state,
+    load_format_profiles,
+    load_settings,
+    make_engine,
+    mbps_to_bytes,
+    open_journal,
+    preferred_engine_name,
+    resolve_job_format,
+    resolve_profiles,
+    save_json_file,
+)
+
+class UIEventPump:
+    """워커 스레드의 UI 갱신 요청을 모아 Tk 스레드에서 일정 주기로 반영
+
+    Tk 위젯은 메인 스레드에서만 다뤄야 하므로 워커는 이벤트만 넣고,
+    after()로 예약된 drain이 프레임마다 한 번씩 처리한다.
+    진행률은 작업별 최신 값만 남기고, 로그는 한 번에 모아서 넣는다.
+    """
+
+    def __init__(self, widget, on_log, on_progress, on_frame=None, fps=30):
+        self.widget = widget
+        self.on_log = on_log
+        self.on_progress = on_progress
+        self.on_frame = on_frame
+        self.interval_ms = max(1, int(1000 / fps))
+        self._lock = threading.Lock()
+        self._log_lines = []
+        self._progress = {}
+        self._calls = []
+
+    def start(self):
+        self.widget.after(self.interval_ms, self._drain)
+
+    def post_log(self, message):
+        with self._lock:
+            self._log_lines.append(message)
+
+    def post_progress(self, key, value):
+        """같은 key의 진행률은 최신 값 하나로 합쳐짐"""
+        with self._lock:
+            self._progress[key] = value
+
+    def call(self, func, *args, **kwargs):
+        """Tk 스레드에서 실행할 함수 예약"""
+        with self._lock:
+            self._calls.append((func, args, kwargs))
+
+    def _drain(self):
+        with self._lock:
+            log_lines, self._log_lines = self._log_lines, []
+            progress, self._progress = self._progress, {}
+            calls, self._calls = self._calls, []
+
+        try:
+            if log_lines:
+                self.on_log(log_lines)
+            for value in progress.values():
+                self.on_progress(value)
+            for func, args, kwargs in calls:
+                func(*args, **kwargs)
+            if progress and self.on_frame:
+                self.on_frame()
+        finally:
+            self.widget.after(self.interval_ms, self._drain)
+
+class FormatTable(ctk.CTkFrame):
+    """포맷 목록 테이블
+
+    ttk.Treeview는 보이는 행만 그리므로 포맷이 많아도 셀마다 위젯을 만들지 않는다.
+    목록이 바뀌면 format_id 기준으로 행을 제자리에서 갱신하고,
+    정렬/필터는 행을 이동(move)하거나 숨김(detach)으로 처리한다.
+    """
+
+    COLUMNS = ["ID", "확장자", "해상도", "크기", "비디오", "오디오", "속성"]
+    WIDTHS = [60, 60, 100, 90, 70, 70, 120]
+
+    def __init__(self, master, command=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.command = command
+        self.formats = {}
+        self.sort_column = 2
+        self.sort_reverse = True
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        # 필터 막대
+        filter_bar = ctk.CTkFrame(self, fg_color="transparent")
+        filter_bar.grid(row=0, column=0, columnspan=2, sticky="ew")
+        filter_bar.grid_columnconfigure(0, weight=1)
+
+        self.filter_entry = ctk.CTkEntry(filter_bar, placeholder_text="필터 (코덱, 확장자, ID...)")
+        self.filter_entry.grid(row=0, column=0, padx=(0, 5), pady=(0, 5), sticky="ew")
+        self.filter_entry.bind("<KeyRelease>", lambda event: self.apply_view())
+
+        self.resolution_menu = ctk.CTkOptionMenu(
+            filter_bar, values=list(RESOLUTION_FILTERS), command=lambda value: self.apply_view(), width=100
+        )
+        self.resolution_menu.set("FHD 초과")
+        self.resolution_menu.grid(row=0, column=1, padx=5, pady=(0, 5))
+
+        self.vr_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(filter_bar, text="VR", variable=self.vr_var, command=self.apply_view, width=50).grid(
+            row=0, column=2, padx=5, pady=(0, 5)
+        )
+
+        self.spatial_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(filter_bar, text="입체음향", variable=self.spatial_var, command=self.apply_view, width=80).grid(
+            row=0, column=3, padx=(5, 0), pady=(0, 5)
+        )
+
+        # 다크 테마에 맞춘 Treeview 스타일
+        style = ttk.Style(self)
+        style.theme_use("default")
+        style.configure(
+            "Format.Treeview", background="#2b2b2b", foreground="white",
+            fieldbackground="#2b2b2b", rowheight=24, borderwidth=0
+        )
+        style.map("Format.Treeview", background=[("selected", "#1f538d")])
+        style.configure("Format.Treeview.Heading", background="#1f538d", foreground="white", relief="flat")
+        style.map("Format.Treeview.Heading", background=[("active", "#14375e")])
+
+        self.tree = ttk.Treeview(
+            self, columns=list(range(len(self.COLUMNS))), show="headings",
+            selectmode="browse", style="Format.Treeview", height=8
+        )
+        for index, (title, width) in enumerate(zip(self.COLUMNS, self.WIDTHS)):
+            self.tree.heading(index, text=title, command=lambda index=index: self.sort_by(index))
+            self.tree.column(index, width=width, anchor="center")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+        scrollbar = ctk.CTkScrollbar(self, command=self.tree.yview)
+        scrollbar.grid(row=1, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+    def set_formats(self, formats):
+        """포맷 목록 반영 (기존 행은 값만 갱신, 없어진 행만 삭제)"""
+        new_formats = {fmt.format_id: fmt for fmt in formats}
+
+        for format_id in list(self.formats):
+            if format_id not in new_formats:
+                self.tree.delete(format_id)
+
+        for format_id, fmt in new_formats.items():
+            if format_id in self.formats:
+                self.tree.item(format_id, values=fmt.table_row())
+            else:
+                self.tree.insert("", "end", iid=format_id, values=fmt.table_row())
+
+        self.formats = new_formats
+        self.apply_view()
+
+    def sort_by(self, column):
+        """열 머리글 클릭 시 정렬 (같은 열을 다시 누르면 역순)"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = column in (2, 3, 6)
+        self.apply_view()
+
+    def apply_view(self):
+        """필터와 정렬을 적용 (행 위젯은 다시 만들지 않음)"""
+        text = self.filter_entry.get().strip()
+        visible = [
+            fmt for fmt in self.formats.values()
+            if format_matches(fmt, self.resolution_menu.get(), text, self.vr_var.get(), self.spatial_var.get())
+        ]
+        visible.sort(key=FORMAT_SORT_KEYS[self.sort_column], reverse=self.sort_reverse)
+
+        visible_ids = {fmt.format_id for fmt in visible}
+        for format_id in self.formats:
+            if format_id not in visible_ids:
+                self.tree.detach(format_id)
+        for index, fmt in enumerate(visible):
+            self.tree.move(fmt.format_id, "", index)
+
+        for index, title in enumerate(self.COLUMNS):
+            marker = (" ▼" if self.sort_reverse else " ▲") if index == self.sort_column else ""
+            self.tree.heading(index, text=title + marker)
+
+    def visible_count(self):
+        return len(self.tree.get_children())
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and self.command:
+            self.command(self.formats[selection[0]])
+
+class VRDownloaderApp(ctk.CTk):
+    MANUAL_PROFILE = "직접 선택"
+    FINISHED_ROWS_KEPT = 30  # 끝난 작업 행은 최근 것만 남기고 위젯을 제거
+    FINISHED_STATES = ("완료", "실패", "오류", "취소됨")
+
+    def __init__(self):
+        super().__init__()
+
+        # 윈도우 설정
+        self.title("YouTube VR 영상 다운로더")
+        self.geometry("700x800")
+
+        # 다운로드 경로 기본값
+        self.download_path = os.path.expanduser("~/Downloads")
+
+        # 선택된 포맷 저장
+        self.selected_video = None
+        self.selected_audio = None
+        self.current_formats = []
+
+        # 의존성 체크 완료 플래그
+        self.dependencies_ready = False
+
+        # 다운로드 대기열
+        self.download_queue = DownloadQueue(self.run_download_job, max_workers=2, on_error=self.on_job_error)
+        # 실패 원인별 재시도, 속도 제한이 걸리면 동시 다운로드 수를 줄였다가 다시 늘림
+        self.retry = RetryController(self.download_queue)
+        self.format_cache = FormatCache()
+        self.settings = load_settings()
+        self.bandwidth = BandwidthScheduler.from_settings(self.settings)
+        self.tuner = FragmentTuner(max_connections=self.settings["max_connections"])
+        # 병합/검사는 별도 프로세스에서 진행 (다운로드 워커는 바로 다음 작업으로)
+        self.pipeline = PostProcessPipeline.from_settings(self.settings)
+        self.segmented = self.settings["segmented_download"]
+        self.format_profiles = load_format_profiles(self.settings)
+        self.archive = None
+        # 프로필 지정 작업의 포맷 목록을 다운로드 전에 미리 확인
+        self.prefetcher = MetadataPrefetcher(
+            self.get_engine, self.format_cache, max_workers=self.settings["prefetch_workers"]
+        )
+
+        # 엔진은 처음 필요할 때 생성 (yt_dlp import가 시작을 늦추지 않도록)
+        self.engine_name = preferred_engine_name()
+        self.engine = None
+        self.engine_lock = threading.Lock()
+        self.job_rows = {}
+        self.finished_rows = deque()  # 끝난 순서대로 작업 ID
+        self.next_row = 0
+        self.next_job_id = 1
+
+        # 로그 기록 (화면에는 최근 줄만 유지)
+        self.log_history = LogHistory()
+
+        # 워커 스레드 → UI 갱신 이벤트 큐
+        self.ui_pump = UIEventPump(
+            self, on_log=self.append_log_lines, on_progress=self.update_job_row,
+            on_frame=self.update_aggregate_status
+        )
+        # 작업별 단계 시간/처리량 기록 (~/.vr_downloader/metrics.jsonl)
+        self.metrics = MetricsExporter.from_settings(self.settings, log_callback=self.log_message)
+        # 작업마다 예상 크기만큼 공간을 예약하고 settings.json의 output_volumes/scratch_dir에 나눠 저장
+        self.volumes = VolumeManager.from_settings(self.settings)
+
+        # UI 구성
+        self.setup_ui()
+        self.ui_pump.start()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # 백그라운드에서 의존성 체크
+        self.start_dependency_check()
+
+    def setup_ui(self):
+        # 메인 프레임
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(3, weight=1)  # 테이블 영역
+        self.grid_rowconfigure(4, weight=1)  # 작업 목록 영역
+        self.grid_rowconfigure(5, weight=1)  # 로그 영역
+
+        # URL 입력 섹션
+        url_frame = ctk.CTkFrame(self)
+        url_frame.grid(row=0, column=0, padx=15, pady=(15, 5), sticky="ew")
+        url_frame.grid_columnconfigure(1, weight=1)
+
+        ctk.CTkLabel(url_frame, text="YouTube URL:", font=("", 14, "bold")).grid(
+            row=0, column=0, padx=10, pady=8, sticky="w"
+        )
+
+        self.url_entry = ctk.CTkEntry(url_frame, placeholder_text="YouTube VR 영상/재생목록/채널 URL (여러 개는 공백으로 구분)")
+        self.url_entry.grid(row=0, column=1, padx=10, pady=8, sticky="ew")
+
+        self.paste_btn = ctk.CTkButton(
+            url_frame, text="붙여넣기", command=self.paste_and_list, width=100, state="disabled"
+        )
+        self.paste_btn.grid(row=0, column=2, padx=(10, 5), pady=8)
+
+        self.list_formats_btn = ctk.CTkButton(
+            url_frame, text="포맷 목록 확인", command=self.list_formats, width=120, state="disabled"
+        )
+        self.list_formats_btn.grid(row=0, column=3, padx=(5, 10), pady=8)
+
+        # 다운로드 경로 섹션
+        path_frame = ctk.CTkFrame(self)
+        path_frame.grid(row=1, column=0, padx=15, pady=5, sticky="ew")
+        path_frame.grid_columnconfigure(1, weight=1)
+
+        ctk.CTkLabel(path_frame, text="저장 경로:", font=("", 14, "bold")).grid(
+            row=0, column=0, padx=10, pady=8, sticky="w"
+        )
+
+        self.path_entry = ctk.CTkEntry(path_frame)
+        self.path_entry.insert(0, self.download_path)
+        self.path_entry.grid(row=0, column=1, padx=10, pady=8, sticky="ew")
+
+        self.browse_btn = ctk.CTkButton(
+            path_frame, text="찾아보기", command=self.browse_path, width=100, state="disabled"
+        )
+        self.browse_btn.grid(row=0, column=2, padx=10, pady=8)
+
+        # 포맷 선택 섹션
+        format_frame = ctk.CTkFrame(self)
+        format_frame.grid(row=2, column=0, padx=15, pady=5, sticky="ew")
+        format_frame.grid_columnconfigure(1, weight=1)
+
+        ctk.CTkLabel(format_frame, text="포맷 선택:", font=("", 14, "bold")).grid(
+            row=0, column=0, padx=10, pady=8, sticky="w"
+        )
+
+        self.format_entry = ctk.CTkEntry(format_frame, placeholder_text="예: bv+ba 또는 137+140")
+        self.format_entry.insert(0, "bv+ba")
+        self.format_entry.grid(row=0, column=1, padx=10, pady=8, sticky="ew")
+
+        # 자동 포맷 선택 프로필 (선택하면 다운로드 직전에 조건에 맞는 포맷 ID로 변환)
+        self.profile_menu = ctk.CTkOptionMenu(
+            format_frame, values=[self.MANUAL_PROFILE] + list(self.format_profiles),
+            command=self.on_profile_change, width=200
+        )
+        self.profile_menu.set(self.MANUAL_PROFILE)
+        self.profile_menu.grid(row=1, column=0, columnspan=2, padx=10, pady=(0, 8), sticky="w")
+
+        # 우선순위 (높음은 실행 중인 낮은 우선순위 작업을 중단시키고 먼저 받음)
+        self.priority_menu = ctk.CTkOptionMenu(
+            format_frame, values=list(PRIORITY_NAMES.values()), width=90
+        )
+        self.priority_menu.set(PRIORITY_NAMES[PRIORITY_NORMAL])
+        self.priority_menu.grid(row=1, column=2, columnspan=2, padx=10, pady=(0, 8), sticky="e")
+
+        self.download_btn = ctk.CTkButton(
+            format_frame, text="다운로드", command=self.download_video,
+            width=120, fg_color="green", hover_color="darkgreen", state="disabled"
+        )
+        self.download_btn.grid(row=0, column=3, padx=10, pady=8)
+
+        self.segmented_var = ctk.BooleanVar(value=self.segmented)
+        ctk.CTkCheckBox(
+            format_frame, text="분할 다운로드", variable=self.segmented_var,
+            command=self.on_segmented_change, width=110
+        ).grid(row=0, column=2, padx=(10, 0), pady=8)
+
+        # 포맷 테이블 섹션 (처음엔 숨김)
+        self.table_frame = ctk.CTkFrame(self)
+        self.table_frame.grid(row=3, column=0, padx=15, pady=5, sticky="nsew")
+        self.table_frame.grid_columnconfigure(0, weight=1)
+        self.table_frame.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(self.table_frame, text="사용 가능한 포맷 (클릭하여 선택):", font=("", 14, "bold")).grid(
+            row=0, column=0, padx=10, pady=(10, 5), sticky="w"
+        )
+
+        self.format_table = FormatTable(self.table_frame, command=self.on_format_click, fg_color="transparent")
+        self.format_table.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="nsew")
+
+        # 처음엔 테이블 숨김
+        self.table_frame.grid_remove()
+
+        # 진행 상황 표시 (작업별 진행률 + 전체 속도)
+        progress_frame = ctk.CTkFrame(self)
+        progress_frame.grid(row=4, column=0, padx=15, pady=5, sticky="nsew")
+        progress_frame.grid_columnconfigure(0, weight=1)
+        progress_frame.grid_rowconfigure(1, weight=1)
+
+        self.status_label = ctk.CTkLabel(
+            progress_frame, text="대기 중...", font=("", 12)
+        )
+        self.status_label.grid(row=0, column=0, padx=10, pady=5, sticky="w")
+
+        ctk.CTkLabel(progress_frame, text="동시 다운로드:", font=("", 12)).grid(
+            row=0, column=1, padx=(10, 5), pady=5, sticky="e"
+        )
+
+        self.workers_menu = ctk.CTkOptionMenu(
+            progress_frame, values=[str(n) for n in range(1, 9)],
+            command=self.on_workers_change, width=70
+        )
+        self.workers_menu.set(str(self.download_queue.max_workers))
+        self.workers_menu.grid(row=0, column=2, padx=(5, 10), pady=5)
+
+        self.engine_menu = ctk.CTkOptionMenu(
+            progress_frame, values=[engine.display_name for engine in ENGINES.values()],
+            command=self.on_engine_change, width=120
+        )
+        self.engine_menu.set(ENGINES[self.engine_name].display_name)
+        self.engine_menu.grid(row=0, column=3, padx=5, pady=5)
+
+        self.bandwidth_entry = ctk.CTkEntry(progress_frame, placeholder_text="대역폭 Mbps", width=100)
+        if self.settings["bandwidth_limit_mbps"]:
+            self.bandwidth_entry.insert(0, str(self.settings["bandwidth_limit_mbps"]))
+        self.bandwidth_entry.bind("<Return>", self.on_bandwidth_change)
+        self.bandwidth_entry.bind("<FocusOut>", self.on_bandwidth_change)
+        self.bandwidth_entry.grid(row=0, column=4, padx=(5, 10), pady=5)
+
+        self.jobs_frame = ctk.CTkScrollableFrame(progress_frame, height=120)
+        self.jobs_frame.grid(row=1, column=0, columnspan=5, padx=10, pady=(0, 10), sticky="nsew")
+        self.jobs_frame.grid_columnconfigure(0, weight=1)
+
+        # 로그 출력 섹션
+        log_frame = ctk.CTkFrame(self)
+        log_frame.grid(row=5, column=0, padx=15, pady=(5, 15), sticky="nsew")
+        log_frame.grid_columnconfigure(0, weight=1)
+        log_frame.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(log_frame, text="출력 로그:", font=("", 14, "bold")).grid(
+            row=0, column=0, padx=10, pady=(10, 5), sticky="w"
+        )
+
+        ctk.CTkButton(log_frame, text="기록 보기", command=self.open_log_history, width=100).grid(
+            row=0, column=1, padx=10, pady=(10, 5), sticky="e"
+        )
+
+        # CustomTkinter의 textbox 사용 (monospace 폰트 적용)
+        self.log_text = ctk.CTkTextbox(log_frame, wrap="word", height=200, font=("Consolas", 11))
+        self.log_text.grid(row=1, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="nsew")
+
+    def start_dependency_check(self):
+        """의존성 체크 시작 (yt-dlp가 이미 있으면 UI를 바로 사용 가능하게 하고 업데이트는 백그라운드에서)"""
+        self.log_message("🔧 프로그램 시작 - 필수 도구 확인 중...")
+        self.log_message(f"⚙️ 다운로드 엔진: {ENGINES[self.engine_name].display_name}")
+
+        ready_now = self.engine_name == "in-process" or find_ytdlp(load_dependency_state()) is not None
+        if ready_now:
+            self.finish_dependency_check(True, False)
+        else:
+            self.status_label.configure(text="의존성 확인 중...")
+
+        def run_check():
+            try:
+                success, newly_installed = check_dependencies(log_callback=self.log_message)
+                if not ready_now or newly_installed:
+                    self.ui_pump.call(self.finish_dependency_check, success, newly_installed)
+
+                # 첫 작업이 빠르도록 엔진 미리 준비
+                self.get_engine()
+            except Exception as e:
+                if ready_now:
+                    self.log_message(f"⚠️ 의존성 확인 중 오류: {str(e)}")
+                else:
+                    self.ui_pump.call(self.fail_dependency_check, e)
+
+        thread = threading.Thread(target=run_check, daemon=True)
+        thread.start()
+
+    def finish_dependency_check(self, success, newly_installed):
+        """의존성 체크 결과를 UI에 반영 (Tk 스레드)"""
+        if success:
+            self.dependencies_ready = True
+            self.status_label.configure(text="준비 완료!")
+
+            if newly_installed:
+                # yt-dlp를 새로 설치한 경우 재시작 필요 메시지
+                self.log_message("\n" + "=" * 60)
+                self.log_message("⚠️ yt-dlp 설치가 완료되었습니다!")
+                self.log_message("⚠️ 프로그램을 종료하고 다시 실행해주세요!")
+                self.log_message("=" * 60 + "\n")
+
+                messagebox.showwarning(
+                    "재시작 필요",
+                    "yt-dlp 설치가 완료되었습니다.\n\n"
+                    "프로그램을 종료하고 다시 실행해주세요.\n\n"
+                    "확인 버튼을 누르면 프로그램이 종료됩니다."
+                )
+                self.quit()
+            else:
+                self.log_message("\n✅ 프로그램 사용 준비 완료!\n")
+
+                # UI 버튼 활성화
+                self.paste_btn.configure(state="normal")
+                self.list_formats_btn.configure(state="normal")
+                self.browse_btn.configure(state="normal")
+                self.download_btn.configure(state="normal")
+
+                # 잠시 후 상태 표시 리셋
+                self.after(1000, self.update_aggregate_status)
+
+                # 지난 실행에서 끝나지 않은 작업 확인
+                self.after(500, self.offer_resume)
+        else:
+            self.status_label.configure(text="의존성 체크 실패")
+            self.log_message("\n❌ 필수 도구 설치에 실패했습니다.")
+            messagebox.showerror("오류", "yt-dlp 설치에 실패했습니다.\n수동으로 설치해주세요.")
+
+    def fail_dependency_check(self, error):
+        """의존성 체크 중 예외 표시 (Tk 스레드)"""
+        self.status_label.configure(text="오류 발생")
+        self.log_message(f"\n❌ 오류: {str(error)}")
+        messagebox.showerror("오류", f"의존성 확인 중 오류가 발생했습니다:\n{str(error)}")
+
+    def browse_path(self):
+        from tkinter import filedialog  # 처음 사용할 때만 로드
+        path = filedialog.askdirectory(initialdir=self.download_path)
+        if path:
+            self.download_path = path
+            self.path_entry.delete(0, "end")
+            self.path_entry.insert(0, path)
+
+    def paste_and_list(self):
+        """클립보드에서 URL 붙여넣기 후 포맷 목록 확인"""
+        try:
+            clipboard_text = self.clipboard_get()
+            if clipboard_text:
+                self.url_entry.delete(0, "end")
+                self.url_entry.insert(0, clipboard_text.strip())
+                self.log_message(f"📋 URL 붙여넣기 완료")
+                # 포맷 목록 자동 확인
+                self.list_formats()
+            else:
+                self.log_message("❌ 클립보드가 비어있습니다.")
+        except Exception as e:
+            self.log_message(f"❌ 붙여넣기 실패: {str(e)}")
+
+    def log_message(self, message):
+        """로그 한 줄 추가 (어느 스레드에서나 호출 가능)"""
+        self.ui_pump.post_log(message)
+
+    def append_log_lines(self, lines):
+        """모아진 로그를 한 번에 삽입하고 오래된 줄은 화면에서 제거 (Tk 스레드)"""
+        self.log_history.append(lines)
+        self.log_text.insert("end", "\n".join(lines) + "\n")
+
+        # 위젯에는 최근 max_lines 줄만 유지 (이전 기록은 로그 파일에 있음)
+        line_count = int(self.log_text.index("end-1c").split(".")[0])
+        excess = line_count - self.log_history.recent.maxlen
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+        self.log_text.see("end")
+
+    def open_log_history(self):
+        """로그 파일 기록 검색/페이지 탐색 창"""
+        window = ctk.CTkToplevel(self)
+        window.title("로그 기록")
+        window.geometry("700x500")
+        window.grid_columnconfigure(0, weight=1)
+        window.grid_rowconfigure(1, weight=1)
+
+        search_entry = ctk.CTkEntry(window, placeholder_text="검색어")
+        search_entry.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
+
+        text = ctk.CTkTextbox(window, wrap="word", font=("Consolas", 11))
+        text.grid(row=1, column=0, columnspan=4, padx=10, pady=(0, 10), sticky="nsew")
+
+        state = {"page": 0}
+
+        def show(lines, title):
+            text.delete("1.0", "end")
+            text.insert("end", "\n".join(lines) if lines else "(기록 없음)")
+            text.see("end")
+            window.title(f"로그 기록 - {title}")
+
+        def show_page(delta=0):
+            state["page"] = max(0, state["page"] + delta)
+            show(self.log_history.page(state["page"]), f"{state['page'] + 1} 페이지 (최신 = 1)")
+
+        def search():
+            query = search_entry.get().strip()
+            if query:
+                show(self.log_history.search(query), f"'{query}' 검색 결과")
+            else:
+                show_page()
+
+        search_entry.bind("<Return>", lambda event: search())
+        ctk.CTkButton(window, text="검색", command=search, width=70).grid(row=0, column=1, padx=5, pady=10)
+        ctk.CTkButton(window, text="◀ 이전", command=lambda: show_page(1), width=70).grid(row=0, column=2, padx=5, pady=10)
+        ctk.CTkButton(window, text="다음 ▶", command=lambda: show_page(-1), width=70).grid(row=0, column=3, padx=(5, 10), pady=10)
+
+        show_page()
+
+    def update_format_table(self, formats):
+        """테이블 데이터 업데이트 (Tk 스레드)"""
+        self.format_table.set_formats(formats)
+        self.current_formats = formats
+
+        # 테이블 프레임 보이기
+        self.table_frame.grid()
+
+    def on_format_click(self, fmt):
+        """테이블 행 선택 이벤트"""
+        # 오디오인지 비디오인지 구분
+        if fmt.is_audio_only:
+            self.selected_audio = fmt.format_id
+            self.log_message(f"✅ 오디오 선택됨: {fmt.format_id}")
+        else:
+            self.selected_video = fmt.format_id
+            self.log_message(f"✅ 비디오 선택됨: {fmt.format_id}")
+
+        # 포맷 입력 필드 업데이트
+        self.format_entry.delete(0, "end")
+        self.format_entry.insert(0, combine_format_ids(self.selected_video, self.selected_audio))
+        self.profile_menu.set(self.MANUAL_PROFILE)
+
+    def on_profile_change(self, name):
+        """포맷 프로필 선택 (확인한 포맷 목록이 있으면 고른 조합을 미리 표시)"""
+        if name == self.MANUAL_PROFILE:
+            self.format_entry.delete(0, "end")
+            self.format_entry.insert(0, combine_format_ids(self.selected_video, self.selected_audio) or "bv+ba")
+            return
+
+        self.format_entry.delete(0, "end")
+        self.format_entry.insert(0, PROFILE_PREFIX + name)
+        self.log_message(f"🎯 포맷 프로필: {name}")
+
+        if self.current_formats:
+            match = resolve_profiles([self.format_profiles[name]], self.current_formats)[name]
+            if match:
+                self.log_message(f"   🎞️ 현재 영상 기준: {match.describe()}")
+            else:
+                self.log_message("   ⚠️ 현재 영상에는 조건에 맞는 포맷이 없습니다.")
+
+    def list_formats(self):
+        urls = self.url_entry.get().split()
+        url = urls[0] if urls else ""
+        if not url:
+            self.log_message("❌ URL을 입력하세요.")
+            return
+
+        cached = self.format_cache.get(url)
+        if cached:
+            self.update_format_table(cached)
+            self.log_message(f"⚡ 캐시된 포맷 목록 사용: {len(cached)}개의 포맷")
+            return
+
+        self.log_message(f"📋 포맷 목록 확인 중...\n")
+        self.status_label.configure(text="포맷 목록 확인 중...")
+        self.list_formats_btn.configure(state="disabled")
+
+        def run_list_formats():
+            try:
+                result = self.get_engine().probe(url)
+                self.format_cache.put(url, result.formats)
+
+                if result.formats:
+                    self.ui_pump.call(self.update_format_table, result.formats)
+                    self.log_message(f"🎬 {result.title}")
+                    self.log_message(f"✅ {len(result.formats)}개의 포맷을 찾았습니다. 테이블에서 클릭하여 선택하세요.")
+                else:
+                    self.log_message("❌ 사용 가능한 포맷이 없습니다.")
+
+            except ProbeError as e:
+                self.log_message(f"❌ 오류 발생:\n{str(e)}")
+            except Exception as e:
+                self.log_message(f"❌ 예외 발생: {str(e)}")
+            finally:
+                self.ui_pump.call(self.update_aggregate_status)
+                self.ui_pump.call(self.list_formats_btn.configure, state="normal")
+
+        thread = threading.Thread(target=run_list_formats, daemon=True)
+        thread.start()
+
+    def download_video(self):
+        """입력된 URL들을 다운로드 대기열에 추가"""
+        urls = self.url_entry.get().split()
+        format_str = self.format_entry.get().strip()
+        download_path = self.path_entry.get().strip()
+
+        if not urls:
+            self.log_message("❌ URL을 입력하세요.")
+            return
+
+        if not format_str:
+            format_str = "bv+ba"
+
+        priority = next(
+            level for level, name in PRIORITY_NAMES.items() if name == self.priority_menu.get()
+        )
+        for url in urls:
+            if is_single_video_url(url):
+                self.enqueue_url(url, format_str, download_path, priority)
+            else:
+                thread = threading.Thread(
+                    target=self.expand_and_enqueue, args=(url, format_str, download_path, priority), daemon=True
+                )
+                thread.start()
+
+        self.log_message(f"📁 저장 경로: {download_path}")
+        self.log_message(f"🎬 포맷: {format_str}\n")
+        self.update_aggregate_status()
+
+    def enqueue_url(self, url, format_str, download_path, priority=PRIORITY_NORMAL, title=""):
+        """영상 하나를 대기열에 추가 (Tk 스레드)"""
+        job = DownloadJob(self.next_job_id, url, format_str, download_path, priority)
+        self.next_job_id += 1
+
+        self.log_message(f"➕ 대기열 추가 [#{job.job_id}]: {title or url}")
+
+        # 이미 확인한 포맷 목록이 있으면 선택한 포맷 정보를 바로 표시
+        cached = self.format_cache.get(url)
+        if cached:
+            for description in describe_format_selection(format_str, cached):
+                self.log_message(f"   🎞️ {description}")
+        self.submit_job(job)
+        self.update_aggregate_status()
+
+    def expand_and_enqueue(self, url, format_str, download_path, priority=PRIORITY_NORMAL):
+        """재생목록/채널 항목을 찾는 대로 대기열에 추가 (백그라운드 스레드)"""
+        self.log_message(f"📃 재생목록 확인 중: {url}")
+        count = 0
+        try:
+            for entry_url, title in expand_playlist(self.get_engine(), url):
+                count += 1
+                self.ui_pump.call(self.enqueue_url, entry_url, format_str, download_path, priority, title)
+        except ProbeError as e:
+            self.log_message(f"❌ 재생목록 확인 실패:\n{str(e)}")
+        except Exception as e:
+            self.log_message(f"❌ 예외 발생: {str(e)}")
+        else:
+            self.log_message(f"📃 재생목록에서 영상 {count}개를 찾았습니다: {url}")
+
+    def get_journal(self, directory):
+        """다운로드 폴더의 작업 기록 (열 수 없으면 None)"""
+        try:
+            return open_journal(directory)
+        except Exception as e:
+            self.log_message(f"⚠️ 작업 기록을 열 수 없습니다: {str(e)}")
+            return None
+
+    def get_archive(self):
+        """다운로드 기록 (사용하지 않거나 열 수 없으면 None)"""
+        if self.archive is None and self.settings["download_archive"]:
+            try:
+                self.archive = DownloadArchive()
+            except Exception as e:
+                self.settings["download_archive"] = False
+                self.log_message(f"⚠️ 다운로드 기록을 열 수 없습니다: {str(e)}")
+        return self.archive
+
+    def submit_job(self, job):
+        """작업 기록에 남기고 대기열에 추가 (이미 받은 영상은 건너뜀)"""
+        journal = self.get_journal(job.download_path)
+
+        archive = self.get_archive()
+        archived = archive.find(job.url, job.format_str) if archive else None
+        if archived:
+            if journal and job.journal_id is not None:
+                journal.set_state(job, "done")
+            self.log_message(f"⏭️ 이미 받은 영상 [#{job.job_id}]: {archived['path']}")
+            return
+
+        if journal:
+            journal.add(job)
+        # 프로필 해석과 공간 예약(예상 크기)에 쓸 포맷 목록을 미리 확인 (이미 받은 영상은 위에서 건너뜀)
+        self.prefetcher.prefetch(job.url)
+        self.add_job_row(job)
+        self.download_queue.submit(job)
+
+    def offer_resume(self):
+        """지난 실행에서 완료되지 않은 작업을 이어서 받을지 확인"""
+        download_path = self.path_entry.get().strip()
+        if not os.path.exists(os.path.join(download_path, JobJournal.FILENAME)):
+            return
+
+        journal = self.get_journal(download_path)
+        rows = journal.unfinished() if journal else []
+        if not rows:
+            return
+
+        resume = messagebox.askyesno(
+            "이어받기",
+            f"지난 실행에서 완료되지 않은 다운로드가 {len(rows)}개 있습니다.\n\n"
+            "이어서 다운로드할까요? (받아 둔 부분부터 계속합니다)"
+        )
+        if not resume:
+            journal.discard([row["id"] for row in rows])
+            self.log_message(f"🗑️ 완료되지 않은 작업 {len(rows)}개를 이어받지 않습니다.")
+            return
+
+        for row in rows:
+            job = job_from_journal(row, self.next_job_id)
+            self.next_job_id += 1
+            self.log_message(f"🔁 이어받기 [#{job.job_id}]: {job.url}")
+            self.submit_job(job)
+        self.update_aggregate_status()
+
+    def on_workers_change(self, value):
+        """동시 다운로드 수 변경"""
+        self.retry.set_target(int(value))
+        self.log_message(f"⚙️ 동시 다운로드 수: {value}")
+        self.update_aggregate_status()
+
+    def on_bandwidth_change(self, event=None):
+        """전체 대역폭 제한 변경 (실행 중인 작업에도 바로 재배분)"""
+        text = self.bandwidth_entry.get().strip()
+        try:
+            mbps = float(text) if text else 0
+        except ValueError:
+            self.log_message("❌ 대역폭 제한은 숫자(Mbps)로 입력하세요.")
+            return
+
+        limit = mbps_to_bytes(mbps)
+        if limit == self.bandwidth.limit:
+            return
+        self.bandwidth.set_limit(limit)
+        self.log_message(f"⚙️ 대역폭 제한: {f'{mbps:g} Mbps' if limit else '무제한'}")
+
+    def on_segmented_change(self):
+        """분할 다운로드 사용 여부 (다음 작업부터 적용)"""
+        self.segmented = self.segmented_var.get()
+        self.log_message(f"⚙️ 분할 다운로드: {'사용' if self.segmented else '사용 안 함'}")
+
+    def on_engine_change(self, display_name):
+        """다운로드 엔진 변경 (다음 작업부터 적용)"""
+        for name, engine_class in ENGINES.items():
+            if engine_class.display_name != display_name:
+                continue
+            if name in ("in-process", "pooled") and not importlib.util.find_spec("yt_dlp"):
+                self.log_message("❌ yt_dlp 모듈이 설치되어 있지 않습니다.")
+                self.engine_menu.set(ENGINES[self.engine_name].display_name)
+                return
+            with self.engine_lock:
+                old_engine, self.engine = self.engine, None
+                self.engine_name = name
+            # 실행 중인 작업은 이전 엔진으로 끝까지 진행 (풀은 쉬고 있는 워커만 종료)
+            if old_engine:
+                old_engine.close()
+            self.log_message(f"⚙️ 다운로드 엔진: {display_name}")
+            return
+
+    def get_engine(self):
+        """현재 엔진 반환 (없으면 생성, 어느 스레드에서나 호출 가능)"""
+        with self.engine_lock:
+            if self.engine is None:
+                self.engine = make_engine(self.engine_name)
+            return self.engine
+
+    def add_job_row(self, job):
+        """작업별 진행률 행 추가"""
+        row = self.next_row
+        self.next_row += 1
+
+        label = ctk.CTkLabel(self.jobs_frame, text=f"#{job.job_id} 대기 중 | {job.url}", font=("", 12), anchor="w")
+        label.grid(row=row * 2, column=0, padx=5, pady=(5, 0), sticky="ew")
+
+        bar = ctk.CTkProgressBar(self.jobs_frame)
+        bar.grid(row=row * 2 + 1, column=0, padx=5, pady=(0, 5), sticky="ew")
+        bar.set(0)
+
+        pause_btn = ctk.CTkButton(self.jobs_frame, text="⏸", width=30, command=lambda: self.toggle_pause(job))
+        pause_btn.grid(row=row * 2, column=1, rowspan=2, padx=(5, 0), pady=5)
+        cancel_btn = ctk.CTkButton(
+            self.jobs_frame, text="✕", width=30, fg_color="firebrick", hover_color="darkred",
+            command=lambda: self.cancel_job(job)
+        )
+        cancel_btn.grid(row=row * 2, column=2, rowspan=2, padx=5, pady=5)
+
+        self.job_rows[job.job_id] = (label, bar, pause_btn, cancel_btn)
+
+    def update_job_row(self, job):
+        """작업 행의 진행률 표시 갱신"""
+        widgets = self.job_rows.get(job.job_id)
+        if widgets is None:
+            return  # 이미 정리한 끝난 작업
+        label, bar, pause_btn, cancel_btn = widgets
+        bar.set(job.progress)
+
+        if job.state == "후처리 중":
+            # 대기열을 떠나 후처리 풀에서 실행 중이므로 취소/일시 정지할 수 없음
+            pause_btn.configure(state="disabled")
+            cancel_btn.configure(state="disabled")
+        elif job.state in self.FINISHED_STATES:
+            pause_btn.configure(state="disabled")
+            cancel_btn.configure(state="disabled")
+            if job.job_id not in self.finished_rows:
+                self.finished_rows.append(job.job_id)
+                self.prune_finished_rows()
+        else:
+            pause_btn.configure(text="▶" if job.state == "일시 정지" else "⏸")
+
+        if job.state == "다운로드 중":
+            speed = format_size(job.speed) + "/s" if job.speed else "계산 중"
+            eta = job.eta or "계산 중"
+            text = f"#{job.job_id} {job.progress*100:.1f}% | 속도: {speed} | 남은 시간: {eta}"
+        else:
+            text = f"#{job.job_id} {job.state} | {job.url}"
+        label.configure(text=text)
+
+    def prune_finished_rows(self):
+        """끝난 작업 행이 FINISHED_ROWS_KEPT개를 넘으면 오래된 것부터 위젯 제거 (채널/재생목록에서 위젯이 계속 늘지 않도록)"""
+        while len(self.finished_rows) > self.FINISHED_ROWS_KEPT:
+            for widget in self.job_rows.pop(self.finished_rows.popleft()):
+                widget.destroy()
+
+    def toggle_pause(self, job):
+        """작업 일시 정지/다시 시작"""
+        journal = self.get_journal(job.download_path)
+        if job.state == "일시 정지":
+            if self.download_queue.resume(job.job_id):
+                if journal:
+                    journal.set_state(job, "queued")
+                self.log_message(f"▶️ 다시 시작 [#{job.job_id}]")
+        else:
+            paused, running = self.download_queue.pause(job.job_id)
+            # 실행 중이던 작업은 execute_job이 프로세스 종료 후 상태를 기록
+            if paused and not running:
+                if journal:
+                    journal.set_state(job, "paused")
+                self.log_message(f"⏸️ 일시 정지 [#{job.job_id}]")
+        self.update_job_row(job)
+        self.update_aggregate_status()
+
+    def cancel_job(self, job):
+        """작업 취소 (실행 중이면 프로세스를 종료하고 임시 파일 삭제)"""
+        cancelled, running = self.download_queue.cancel(job.job_id)
+        if not cancelled:
+            if job.state == "후처리 중":
+                self.log_message(f"⚠️ 후처리 중인 작업은 취소할 수 없습니다 [#{job.job_id}]")
+        elif not running:
+            # 대기 중/일시 정지된 작업도 실행 중 취소와 같은 마무리 (지표 기록 포함)
+            finish_cancelled_job(
+                job, self.engine_name, log_callback=self.log_message, journal=self.get_journal(job.download_path),
+                metrics=self.metrics, volumes=self.volumes,
+            )
+        self.update_job_row(job)
+        self.update_aggregate_status()
+
+    def on_close(self):
+        """창을 닫을 때 실행 중인 다운로드 프로세스를 정리 (받은 부분은 다음 실행에서 이어받기)"""
+        if self.download_queue.active_jobs:
+            self.log_message("⏸️ 종료 중 - 실행 중인 다운로드를 일시 정지합니다...")
+            self.update()
+        self.download_queue.stop_all()
+        self.prefetcher.shutdown()
+        self.pipeline.shutdown()
+        self.metrics.close()
+        with self.engine_lock:
+            engine, self.engine = self.engine, None
+        if engine:
+            engine.close()
+        self.destroy()
+
+    def update_aggregate_status(self):
+        """전체 처리량 및 대기열 상태 표시"""
+        active = len(self.download_queue.active_jobs)
+        pending = self.download_queue.pending_count()
+        if active or pending:
+            speed = format_size(self.download_queue.total_speed())
+            status = f"전체 속도: {speed}/s | 진행 중 {active} | 대기 {pending}"
+            if self.retry.reduced:
+                status += f" | 🐢 동시 {self.download_queue.max_workers}/{self.retry.target}"
+            self.status_label.configure(text=status)
+        else:
+            self.status_label.configure(text="대기 중...")
+
+    def on_job_error(self, job):
+        """작업 실행 중 예외 (대기열 워커에서 호출, 워커는 다음 작업을 계속함)"""
+        self.log_message(f"❌ 예외 발생 [#{job.job_id}]: {job.error}")
+        journal = self.get_journal(job.download_path)
+        if journal:
+            journal.set_state(job, "failed", job.error)
+        self.metrics.record(job, self.engine_name)
+        self.ui_pump.post_progress(job.job_id, job)
+
+    def run_download_job(self, job):
+        """대기열 워커에서 작업 하나를 실행"""
+        def on_progress(job, progress):
+            self.ui_pump.post_progress(job.job_id, job)
+
+        journal = self.get_journal(job.download_path)
+
+        # 프로필 지정 작업은 캐시된 포맷 목록(없으면 한 번 확인)으로 포맷 ID 결정
+        # 확인하는 동안 취소/일시 정지되었으면 실패로 처리하지 않고 execute_job이 정리
+        resolved = resolve_job_format(job, self.get_engine(), self.prefetcher, self.format_profiles,
+                                      log_callback=self.log_message)
+        if not resolved and job.abort_reason not in INTERRUPT_REASONS:
+            job.state = "실패"
+            if journal:
+                journal.set_state(job, "failed", job.error)
+            self.metrics.record(job, self.get_engine().name)
+            on_progress(job, None)
+            return
+
+        execute_job(
+            job, self.get_engine(), log_callback=self.log_message, progress_callback=on_progress,
+            journal=journal, bandwidth=self.bandwidth,
+            tuner=self.tuner if self.segmented else None,
+            pipeline=self.pipeline, on_finished=on_progress, archive=self.get_archive(),
+            retry=self.retry, metrics=self.metrics, volumes=self.volumes
+        )
+
+def main(startup_time):
+    """GUI 실행 (startup_time: 시작 시간 측정 기준, vr_downloader.py가 맨 처음 기록한 값)"""
+    # CustomTkinter 테마 설정
+    ctk.set_appearance_mode("dark")  # "dark", "light", "system"
+    ctk.set_default_color_theme("blue")  # "blue", "green", "dark-blue"
+
+    app = VRDownloaderApp()
+
+    # --startup-benchmark OUT.json: 첫 화면이 그려지면 시작 시간을 기록하고 종료
+    if "--startup-benchmark" in sys.argv:
+        output_path = sys.argv[sys.argv.index("--startup-benchmark") + 1]
+
+        def record_startup():
+            app.update()
+            save_json_file(output_path, {"ready_seconds": time.perf_counter() - startup_time})
+            app.destroy()
+
+        app.after_idle(record_startup)
+
+    app.mainloop()